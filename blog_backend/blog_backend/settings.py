@@ -62,8 +62,12 @@ if DEBUG:
     INSTALLED_APPS.insert(0, "django_extensions")
 
 MIDDLEWARE = [
+    "resource_management.middleware.RequestTimingMiddleware",
+    "resource_management.middleware.MetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.middleware.common.CommonMiddleware",
+    "resource_management.middleware.ReplicaReadMiddleware",
+    "resource_management.middleware.CacheInvalidationMiddleware",
 ]
 
 ROOT_URLCONF = "blog_backend.urls"
@@ -107,6 +111,31 @@ DATABASES = {
 if DEBUG:
     DATABASES["default"]["TEST"]["NAME"] = get_env_value("DB_TEST_NAME")
 
+# Read replicas, as comma-separated "host:port[/name]" (name defaults to
+# DB_NAME). Safe requests (GET, HEAD, OPTIONS) read blog data from a random
+# available replica; uploads and commands always use the primary. A replica
+# failing to connect is skipped for DB_REPLICA_RETRY_SECONDS, and a client
+# reads from the primary for DB_REPLICA_PIN_SECONDS after it wrote data.
+DB_REPLICA_ALIASES = []
+for replica_index, replica in enumerate(
+    filter(None, environ.get("DB_REPLICAS", "").split(","))
+):
+    replica_address, _, replica_name = replica.strip().partition("/")
+    replica_host, _, replica_port = replica_address.rpartition(":")
+    replica_alias = "replica_{0:d}".format(replica_index)
+    DATABASES[replica_alias] = dict(
+        DATABASES["default"],
+        NAME=replica_name or DATABASES["default"]["NAME"],
+        HOST=replica_host,
+        PORT=replica_port,
+        TEST={"MIRROR": "default"},
+    )
+    DB_REPLICA_ALIASES.append(replica_alias)
+
+DATABASE_ROUTERS = ["resource_management.routers.ReplicaRouter"]
+DB_REPLICA_PIN_SECONDS = int(environ.get("DB_REPLICA_PIN_SECONDS", 5))
+DB_REPLICA_RETRY_SECONDS = int(environ.get("DB_REPLICA_RETRY_SECONDS", 30))
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/3.1/topics/i18n/
@@ -141,6 +170,106 @@ if DEBUG:
     OPENED_IMAGE_DIR_TEST = get_env_value("OPENED_IMAGE_DIR_TEST")
     PROTECTED_IMAGE_DIR_TEST = get_env_value("PROTECTED_IMAGE_DIR_TEST")
 
+# Image files are placed under sub-directories named by leading characters
+# of their UUID, IMAGE_SHARD_DEPTH levels deep (0 for flat layout). When
+# changing it, set IMAGE_SHARD_PREVIOUS_DEPTH to the old value until
+# "manage.py shard_images" has moved all existing files.
+IMAGE_SHARD_DEPTH = int(environ.get("IMAGE_SHARD_DEPTH", 0))
+IMAGE_SHARD_PREVIOUS_DEPTH = int(
+    environ.get("IMAGE_SHARD_PREVIOUS_DEPTH", IMAGE_SHARD_DEPTH)
+)
+
+# Sources with more pixels than this are decoded at reduced scale (JPEG
+# only), which is still large enough for the largest rendition.
+IMAGE_DECODE_PIXEL_BUDGET = int(environ.get("IMAGE_DECODE_PIXEL_BUDGET", 24000000))
+# Number of threads resizing images during upload, and estimated memory
+# they can use together. Fewer images are resized at a time when sources
+# are large.
+IMAGE_RESIZE_THREADS = int(environ.get("IMAGE_RESIZE_THREADS", 2))
+IMAGE_RESIZE_MEMORY_BUDGET = int(
+    environ.get("IMAGE_RESIZE_MEMORY_BUDGET", 1024 * 1024 * 1024)
+)
+
+# Number of threads encoding and writing resized images during upload.
+IMAGE_WRITER_THREADS = int(environ.get("IMAGE_WRITER_THREADS", 4))
+
+# Renditions produced during upload are checkpointed here, keyed by digests
+# of the bundle and source images, so retrying a failed upload reuses them.
+# Checkpoint of a bundle is removed once its upload succeeds. When unset, a
+# temporary directory is used and nothing is kept for retries. Renditions are
+# linked from here when possible, so it's better on the same file system as
+# image directories. Not used in lazy rendition mode.
+UPLOAD_CHECKPOINT_DIR = environ.get("UPLOAD_CHECKPOINT_DIR")
+
+# Lazy rendition mode. Only original images are stored at upload time, and
+# resized renditions are created on first access into a size-bounded cache.
+# Like OPENED_IMAGE_DIR, the cache directory should be readable by frontend.
+IMAGE_LAZY_RENDITIONS = bool(int(environ.get("IMAGE_LAZY_RENDITIONS", 0)))
+RENDITION_CACHE_DIR = (
+    get_env_value("RENDITION_CACHE_DIR")
+    if IMAGE_LAZY_RENDITIONS
+    else environ.get("RENDITION_CACHE_DIR")
+)
+RENDITION_CACHE_MAX_BYTES = int(
+    environ.get("RENDITION_CACHE_MAX_BYTES", 2 * 1024 * 1024 * 1024)
+)
+
+# Upload job queue. Submitted bundles are kept in UPLOAD_JOB_DIR until a
+# worker ("manage.py run_upload_worker") processes them. HTTP submission is
+# disabled when UPLOAD_API_TOKEN is not set.
+UPLOAD_JOB_DIR = environ.get("UPLOAD_JOB_DIR")
+UPLOAD_API_TOKEN = environ.get("UPLOAD_API_TOKEN")
+# Workers refresh heartbeat of the running job every
+# UPLOAD_JOB_HEARTBEAT_SECONDS. Running jobs without heartbeat for
+# UPLOAD_JOB_STALE_SECONDS were left by killed workers, and they're queued
+# again until they've been tried UPLOAD_JOB_MAX_ATTEMPTS times.
+UPLOAD_JOB_HEARTBEAT_SECONDS = float(environ.get("UPLOAD_JOB_HEARTBEAT_SECONDS", 30))
+UPLOAD_JOB_STALE_SECONDS = float(environ.get("UPLOAD_JOB_STALE_SECONDS", 300))
+UPLOAD_JOB_MAX_ATTEMPTS = int(environ.get("UPLOAD_JOB_MAX_ATTEMPTS", 3))
+
+# Results of frequent reads (articles, tags, images) are cached in the
+# default cache, and invalidated when their models change.
+RESOURCE_CACHE_ENABLED = bool(int(environ.get("RESOURCE_CACHE_ENABLED", 0)))
+# Expired or invalidated results are rebuilt by one worker at a time. Others
+# get the previous result for up to RESOURCE_CACHE_STALE_SECONDS, or wait up
+# to RESOURCE_CACHE_REBUILD_WAIT_SECONDS for the rebuilt one if there's none.
+RESOURCE_CACHE_STALE_SECONDS = int(environ.get("RESOURCE_CACHE_STALE_SECONDS", 30))
+RESOURCE_CACHE_REBUILD_WAIT_SECONDS = float(
+    environ.get("RESOURCE_CACHE_REBUILD_WAIT_SECONDS", 2)
+)
+# Uploads publish changed data to web workers of all nodes, which either
+# "listen" for PostgreSQL notifications, or "poll" generation counters in
+# the database every RESOURCE_CACHE_POLL_SECONDS. Empty to disable it, e.g.
+# when all workers share the same cache.
+RESOURCE_CACHE_INVALIDATION = environ.get("RESOURCE_CACHE_INVALIDATION", "")
+if RESOURCE_CACHE_INVALIDATION not in ("", "listen", "poll"):
+    raise ImproperlyConfigured(
+        "Unknown RESOURCE_CACHE_INVALIDATION: '{0:s}'".format(
+            RESOURCE_CACHE_INVALIDATION
+        )
+    )
+RESOURCE_CACHE_POLL_SECONDS = float(environ.get("RESOURCE_CACHE_POLL_SECONDS", 5))
+
+# CDN purging. Responses name the data they depend on with Surrogate-Key
+# and Cache-Tag headers, and uploads queue keys of changed data to an outbox
+# drained by "manage.py drain_purge_outbox". Responses are kept by CDN for
+# SURROGATE_CONTROL_MAX_AGE seconds when it's set.
+SURROGATE_KEY_PURGE_ENABLED = bool(int(environ.get("SURROGATE_KEY_PURGE_ENABLED", 0)))
+SURROGATE_CONTROL_MAX_AGE = int(environ.get("SURROGATE_CONTROL_MAX_AGE", 0))
+
+# Timing of each request (wall time, DB queries) in Server-Timing header
+# and "resource_management.requests" log, with latency histograms per URL
+# pattern kept in each worker.
+REQUEST_TIMING_ENABLED = bool(int(environ.get("REQUEST_TIMING_ENABLED", 1)))
+
+# Metrics in Prometheus format, scraped from /resource/metrics with
+# METRICS_API_TOKEN as bearer token (disabled when unset). Processes of a
+# node share METRICS_DIR, where each one writes its metrics every
+# METRICS_FLUSH_SECONDS; it should be emptied before workers are started.
+METRICS_API_TOKEN = environ.get("METRICS_API_TOKEN", "")
+METRICS_DIR = environ.get("METRICS_DIR", "")
+METRICS_FLUSH_SECONDS = float(environ.get("METRICS_FLUSH_SECONDS", 1))
+
 # Disable mailing on critical events
 # Recipe: https://lincolnloop.com/blog/disabling-error-emails-django/
 logging_dict = deepcopy(DEFAULT_LOGGING)
@@ -167,13 +296,23 @@ if not DEBUG:
     logging_dict["root"] = {"handlers": ["file"], "level": "INFO"}
 
 # Cache
+# Each worker keeps recently used entries in memory, in front of the cache
+# files shared by all workers.
 if not DEBUG:
     cache_dir = get_env_value("CACHE_DIR")
     CACHES = {
         "default": {
+            "BACKEND": "resource_management.utils.cache.TwoTierCache",
+            "LOCATION": "shared",
+            "OPTIONS": {
+                "LOCAL_TIMEOUT": int(environ.get("CACHE_LOCAL_TIMEOUT", 5)),
+                "LOCAL_MAX_ENTRIES": int(environ.get("CACHE_LOCAL_MAX_ENTRIES", 1000)),
+            },
+        },
+        "shared": {
             "BACKEND": "django.core.cache.backends.filebased." "FileBasedCache",
             "LOCATION": cache_dir,
-        }
+        },
     }
 
 LOGGING = logging_dict
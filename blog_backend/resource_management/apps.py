@@ -3,3 +3,7 @@ from django.apps import AppConfig
 
 class ResourceManagementConfig(AppConfig):
     name = "resource_management"
+
+    def ready(self):
+        # Connect cache invalidation signals of cached reads.
+        import resource_management.model_operations  # noqa: F401
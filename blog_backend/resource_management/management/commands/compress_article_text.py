@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+from resource_management.service.text_storage import convert_article_text_storage
+
+
+class Command(BaseCommand):
+    help = (
+        "Compress stored raw Markdown documents and edit history patches in "
+        "batches. Rows that are already compressed are skipped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            dest="batch_size",
+            type=int,
+            default=500,
+            help="Number of rows converted in each transaction.",
+        )
+        parser.add_argument(
+            "--decompress",
+            dest="decompress",
+            action="store_true",
+            help="Convert compressed rows back to plain text. Run this before "
+            "reverting the storage migration.",
+        )
+
+    def handle(self, *args, **options):
+        if options["batch_size"] <= 0:
+            raise CommandError("Batch size should be a positive integer.")
+        num_converted = convert_article_text_storage(
+            options["batch_size"], compress=not options["decompress"]
+        )
+        print("Done. {num:d} rows converted.".format(num=num_converted))
@@ -0,0 +1,64 @@
+import shlex
+import subprocess
+from time import sleep
+
+from django.core.management.base import BaseCommand, CommandError
+from resource_management.service.surrogate_keys import drain_purge_outbox
+
+
+class Command(BaseCommand):
+    help = (
+        "Purge CDN cache of responses changed by uploads. Queued surrogate "
+        "keys are passed as arguments to the purge command (e.g. a script "
+        "calling the CDN API), and removed once it succeeds."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "purge_command",
+            type=str,
+            help="Command purging surrogate keys given as its arguments.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            dest="batch_size",
+            type=int,
+            default=100,
+            help="Max number of queued purges done by one purge command.",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            dest="poll_interval",
+            type=float,
+            default=5.0,
+            help="Seconds to wait before polling again when the outbox is empty.",
+        )
+        parser.add_argument(
+            "--once",
+            dest="once",
+            action="store_true",
+            help="Drain the outbox until it's empty, then exit.",
+        )
+
+    def handle(self, *args, **options):
+        if options["poll_interval"] <= 0:
+            raise CommandError("Poll interval should be a positive number.")
+        if options["batch_size"] <= 0:
+            raise CommandError("Batch size should be a positive number.")
+        purge_command = shlex.split(options["purge_command"])
+
+        def purge(surrogate_keys):
+            print("Purging {0:d} keys...".format(len(surrogate_keys)))
+            subprocess.run(purge_command + surrogate_keys, check=True)
+
+        while True:
+            try:
+                purged = drain_purge_outbox(purge, options["batch_size"])
+            except subprocess.CalledProcessError as e:
+                raise CommandError(
+                    "Purge command failed, keys are kept queued: {0!s}".format(e)
+                )
+            if not purged:
+                if options["once"]:
+                    break
+                sleep(options["poll_interval"])
@@ -0,0 +1,59 @@
+from os.path import expanduser, isdir
+
+from django.core.management.base import BaseCommand, CommandError
+from resource_management.service.image_gc import collect_orphaned_images
+
+
+class Command(BaseCommand):
+    help = (
+        "Remove image files which are not referred by any live image entry, "
+        "such as files of removed images or files left by failed uploads."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            dest="dry_run",
+            action="store_true",
+            help="Only report orphaned files without removing them.",
+        )
+        parser.add_argument(
+            "--quarantine-dir",
+            dest="quarantine_dir",
+            type=str,
+            default=None,
+            help="Move orphaned files to this directory instead of removing them.",
+        )
+        parser.add_argument(
+            "--min-age",
+            dest="min_age",
+            type=float,
+            default=3600,
+            help="Skip files modified within this many seconds.",
+        )
+
+    def handle(self, *args, **options):
+        quarantine_dir = options["quarantine_dir"]
+        if quarantine_dir:
+            quarantine_dir = expanduser(quarantine_dir)
+            if not isdir(quarantine_dir):
+                raise CommandError(
+                    "'{:s}' is not a directory.".format(options["quarantine_dir"])
+                )
+        if options["min_age"] < 0:
+            raise CommandError("Minimum age can not be negative.")
+
+        report = collect_orphaned_images(
+            dry_run=options["dry_run"],
+            quarantine_dir=quarantine_dir,
+            min_age=options["min_age"],
+        )
+        print(
+            "Scanned {num_scanned:d} files, {num_orphaned:d} orphaned "
+            "({reclaimed_bytes:d} bytes {action:s}).".format(
+                num_scanned=report.num_scanned,
+                num_orphaned=report.num_orphaned,
+                reclaimed_bytes=report.reclaimed_bytes,
+                action="reclaimable" if options["dry_run"] else "reclaimed",
+            )
+        )
@@ -0,0 +1,39 @@
+from time import sleep
+
+from django.core.management.base import BaseCommand, CommandError
+from resource_management.service.metrics import ensure_metrics_flusher
+from resource_management.service.upload_job import run_next_upload_job
+
+
+class Command(BaseCommand):
+    help = (
+        "Process upload jobs submitted through HTTP. Multiple workers can "
+        "poll the same queue."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--poll-interval",
+            dest="poll_interval",
+            type=float,
+            default=5.0,
+            help="Seconds to wait before polling again when the queue is empty.",
+        )
+        parser.add_argument(
+            "--once",
+            dest="once",
+            action="store_true",
+            help="Process pending jobs until the queue is empty, then exit.",
+        )
+
+    def handle(self, *args, **options):
+        if options["poll_interval"] <= 0:
+            raise CommandError("Poll interval should be a positive number.")
+        # Job durations and written images are scraped from web workers.
+        ensure_metrics_flusher()
+        while True:
+            job = run_next_upload_job()
+            if job is None:
+                if options["once"]:
+                    break
+                sleep(options["poll_interval"])
@@ -0,0 +1,70 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from resource_management.service.image_shard import shard_image_files
+
+
+class Command(BaseCommand):
+    help = (
+        "Move existing image files to the sharded layout of current "
+        "IMAGE_SHARD_DEPTH setting. Files are moved in batches, and can be "
+        "served during the migration."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--from-depth",
+            dest="from_depth",
+            type=int,
+            default=None,
+            help="Shard depth files are currently stored with. "
+            "(default: IMAGE_SHARD_PREVIOUS_DEPTH)",
+        )
+        parser.add_argument(
+            "--batch-size",
+            dest="batch_size",
+            type=int,
+            default=1000,
+            help="Number of files moved between pauses.",
+        )
+        parser.add_argument(
+            "--pause",
+            dest="pause",
+            type=float,
+            default=0.0,
+            help="Seconds to sleep after each batch.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            dest="dry_run",
+            action="store_true",
+            help="Only count files to be moved.",
+        )
+
+    def handle(self, *args, **options):
+        from_depth = options["from_depth"]
+        if from_depth is None:
+            from_depth = settings.IMAGE_SHARD_PREVIOUS_DEPTH
+        if from_depth < 0:
+            raise CommandError("Shard depth can not be negative.")
+        if from_depth == settings.IMAGE_SHARD_DEPTH:
+            raise CommandError(
+                "Files are already stored with shard depth {:d}.".format(from_depth)
+            )
+        if options["batch_size"] <= 0:
+            raise CommandError("Batch size should be a positive number.")
+        if options["pause"] < 0:
+            raise CommandError("Pause can not be negative.")
+
+        report = shard_image_files(
+            from_depth,
+            batch_size=options["batch_size"],
+            pause=options["pause"],
+            dry_run=options["dry_run"],
+        )
+        print(
+            "{num_moved:d} files {action:s}, {num_skipped:d} skipped.".format(
+                num_moved=report.num_moved,
+                action="to be moved" if options["dry_run"] else "moved",
+                num_skipped=report.num_skipped,
+            )
+        )
@@ -1,12 +1,12 @@
 from os.path import expanduser
-from re import match
 from django.core.management.base import BaseCommand, CommandError
+from resource_management.model_operations import LockNotAcquiredError
 from resource_management.service.post_update import PostUpdateHandler
+from resource_management.utils.articles import is_valid_synonym
+from resource_management.utils.instrumentation import Tracer, use_tracer
 
 
 class Command(BaseCommand):
-    _SYNONYM_REGEX = r"^[a-z0-9][a-z0-9\\-]+[a-z0-9]$"
-
     help = (
         "Upload post from bundled post data to create new post, "
         "or update existing post."
@@ -30,18 +30,57 @@ class Command(BaseCommand):
             help="Only create new article and stop when the synonym is already "
             "used by existing article.",
         )
+        parser.add_argument(
+            "--force",
+            dest="force",
+            action="store_true",
+            help="Process the bundle even if it's identical to the last uploaded "
+            "one of the article.",
+        )
+        parser.add_argument(
+            "--no-wait",
+            dest="no_wait",
+            action="store_true",
+            help="Fail immediately instead of waiting when another upload of the "
+            "same synonym is running.",
+        )
+        parser.add_argument(
+            "--trace-file",
+            dest="trace_file",
+            type=str,
+            default=None,
+            help="Write timing spans and counters of the upload to this file "
+            "as JSON lines.",
+        )
+        parser.add_argument(
+            "--no-summary",
+            dest="no_summary",
+            action="store_true",
+            help="Do not print timing summary after the upload.",
+        )
 
     def handle(self, *args, **options):
-        if not self._is_valid_synonym(options["synonym"]):
+        if not is_valid_synonym(options["synonym"]):
             raise CommandError(
                 "'{:s}' is not a valid article synonym.".format(options["synonym"])
             )
-        PostUpdateHandler.upload_article(
-            expanduser(options["archive-path"]),
-            options["synonym"],
-            create_only=options["new_article"],
-        )
-
-    @classmethod
-    def _is_valid_synonym(cls, s: str) -> bool:
-        return match(cls._SYNONYM_REGEX, s) is not None
+        tracer = Tracer()
+        try:
+            with use_tracer(tracer):
+                PostUpdateHandler.upload_article(
+                    expanduser(options["archive-path"]),
+                    options["synonym"],
+                    create_only=options["new_article"],
+                    force=options["force"],
+                    wait_for_lock=not options["no_wait"],
+                )
+        except LockNotAcquiredError as error:
+            raise CommandError(str(error))
+        finally:
+            # Timings are reported even if the upload failed, to tell
+            # where it stopped.
+            if options["trace_file"]:
+                with open(expanduser(options["trace_file"]), "w") as fd_w:
+                    tracer.write_json_lines(fd_w)
+            if not options["no_summary"]:
+                print(tracer.format_summary())
@@ -0,0 +1,142 @@
+from contextlib import ExitStack
+from json import dumps as json_dumps
+from logging import getLogger
+from time import perf_counter
+from typing import final, Final
+
+from django.conf import settings
+from django.db import connections
+
+from .routers import replica_reads, is_primary_pinned
+from .model_operations import ensure_invalidation_subscriber
+from .service.metrics import ensure_metrics_flusher, record_db_connection_state
+from .utils.instrumentation import QueryTimer, record_request
+
+__all__ = [
+    "PRIMARY_PIN_COOKIE",
+    "SERVER_TIMING_HEADER",
+    "UNMATCHED_ROUTE",
+    "ReplicaReadMiddleware",
+    "CacheInvalidationMiddleware",
+    "RequestTimingMiddleware",
+    "MetricsMiddleware",
+]
+
+# Set on clients which wrote data (or saw an upload finish), so they read
+# from the primary until replicas have likely caught up.
+PRIMARY_PIN_COOKIE: Final = "db_primary_pin"
+
+SERVER_TIMING_HEADER: Final = "Server-Timing"
+# Route of requests which matched no URL pattern, e.g. 404
+UNMATCHED_ROUTE: Final = "<unmatched>"
+
+_SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+_request_logger: Final = getLogger("resource_management.requests")
+
+
+@final
+class ReplicaReadMiddleware(object):
+    """Allow safe requests to read blog data from replicas, unless the
+    client recently wrote data.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        enabled = (
+            bool(settings.DB_REPLICA_ALIASES)
+            and request.method in _SAFE_METHODS
+            and PRIMARY_PIN_COOKIE not in request.COOKIES
+        )
+        with replica_reads(enabled=enabled):
+            response = self.get_response(request)
+            pinned = is_primary_pinned()
+
+        if pinned and settings.DB_REPLICA_ALIASES:
+            response.set_cookie(
+                PRIMARY_PIN_COOKIE,
+                "1",
+                max_age=settings.DB_REPLICA_PIN_SECONDS,
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
+
+
+@final
+class CacheInvalidationMiddleware(object):
+    """ Keep the cache invalidation subscriber running in this worker. """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        ensure_invalidation_subscriber()
+        return self.get_response(request)
+
+
+@final
+class RequestTimingMiddleware(object):
+    """Measure wall time, and number and time of database queries of each
+    request. They're sent in Server-Timing header, logged as a JSON line,
+    and recorded in metrics of the URL pattern.
+
+    Placed first, so the time of other middleware is included.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.REQUEST_TIMING_ENABLED:
+            return self.get_response(request)
+
+        query_timer = QueryTimer()
+        start = perf_counter()
+        with ExitStack() as stack:
+            # Replicas included
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(query_timer))
+            response = self.get_response(request)
+        duration = perf_counter() - start
+
+        resolver_match = getattr(request, "resolver_match", None)
+        route = resolver_match.route if resolver_match else UNMATCHED_ROUTE
+        record_request(route, response.status_code, duration, query_timer)
+
+        response[
+            SERVER_TIMING_HEADER
+        ] = 'app;dur={0:.1f}, db;dur={1:.1f};desc="{2:d} queries"'.format(
+            duration * 1000, query_timer.duration * 1000, query_timer.count
+        )
+        _request_logger.info(
+            json_dumps(
+                {
+                    "method": request.method,
+                    "route": route,
+                    "path": request.path,
+                    "status": response.status_code,
+                    "duration_ms": round(duration * 1000, 2),
+                    "db_queries": query_timer.count,
+                    "db_ms": round(query_timer.duration * 1000, 2),
+                }
+            )
+        )
+        return response
+
+
+@final
+class MetricsMiddleware(object):
+    """Keep metrics of this worker written to METRICS_DIR, and record state
+    of its database connections.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        ensure_metrics_flusher()
+        record_db_connection_state()
+        return self.get_response(request)
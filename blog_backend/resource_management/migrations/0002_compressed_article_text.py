@@ -0,0 +1,60 @@
+# Generated by Django 3.1.7 on 2026-10-19 18:27
+
+from django.db import migrations
+import resource_management.models.fields
+
+# Existing text is kept as plain UTF-8 bytes, which CompressedTextField can
+# still read. Run "manage.py compress_article_text" afterwards to compress
+# rows in batches (and "--decompress" before rolling this migration back).
+_COLUMNS = (
+    ("resource_management_rawarticledata", "data"),
+    ("resource_management_articleedithistory", "update_data"),
+    ("resource_management_articleedithistory", "recover_data"),
+)
+
+_FORWARD_SQL = [
+    'ALTER TABLE "{table:s}" ALTER COLUMN "{column:s}" TYPE bytea '
+    "USING convert_to(\"{column:s}\", 'UTF8')".format(table=table, column=column)
+    for table, column in _COLUMNS
+]
+_BACKWARD_SQL = [
+    'ALTER TABLE "{table:s}" ALTER COLUMN "{column:s}" TYPE text '
+    "USING convert_from(\"{column:s}\", 'UTF8')".format(table=table, column=column)
+    for table, column in _COLUMNS
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("resource_management", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunSQL(sql=_FORWARD_SQL, reverse_sql=_BACKWARD_SQL),
+            ],
+            state_operations=[
+                migrations.AlterField(
+                    model_name="articleedithistory",
+                    name="recover_data",
+                    field=resource_management.models.fields.CompressedTextField(
+                        null=True
+                    ),
+                ),
+                migrations.AlterField(
+                    model_name="articleedithistory",
+                    name="update_data",
+                    field=resource_management.models.fields.CompressedTextField(
+                        null=True
+                    ),
+                ),
+                migrations.AlterField(
+                    model_name="rawarticledata",
+                    name="data",
+                    field=resource_management.models.fields.CompressedTextField(),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.1.7 on 2026-10-19 18:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("resource_management", "0003_upload_jobs"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="image",
+            name="placeholder",
+            field=models.TextField(blank=True, null=True),
+        ),
+    ]
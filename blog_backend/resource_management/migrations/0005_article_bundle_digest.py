@@ -0,0 +1,23 @@
+# Generated by Django 3.1.7 on 2026-10-19 18:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("resource_management", "0004_image_placeholder"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="article",
+            name="bundle_digest",
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+        migrations.AddField(
+            model_name="article",
+            name="bundle_version",
+            field=models.CharField(blank=True, max_length=30, null=True),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 3.1.7 on 2026-10-19 18:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("resource_management", "0005_article_bundle_digest"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="image",
+            name="source_digest",
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+        migrations.AddIndex(
+            model_name="image",
+            index=models.Index(
+                fields=["source_digest", "extension", "resolution"],
+                name="idx_image_source",
+            ),
+        ),
+    ]
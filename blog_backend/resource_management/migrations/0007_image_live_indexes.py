@@ -0,0 +1,59 @@
+# Generated by Django 3.1.7 on 2026-10-19 19:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("resource_management", "0006_image_source_digest"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="image",
+            name="idx_image_resolution_group",
+        ),
+        migrations.RemoveIndex(
+            model_name="image",
+            name="idx_image_identity",
+        ),
+        migrations.RemoveIndex(
+            model_name="image",
+            name="idx_image_source",
+        ),
+        migrations.AddIndex(
+            model_name="image",
+            index=models.Index(
+                condition=models.Q(deleted__isnull=True),
+                fields=["article", "alias", "resolution"],
+                name="idx_image_live_identity",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="image",
+            index=models.Index(
+                condition=models.Q(("deleted__isnull", True), ("resolution", 1)),
+                fields=["article", "alias"],
+                name="idx_image_live_original",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="image",
+            index=models.Index(
+                condition=models.Q(deleted__isnull=True),
+                fields=["uuid", "extension"],
+                name="idx_image_live_file",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="image",
+            index=models.Index(
+                condition=models.Q(
+                    ("deleted__isnull", True), ("source_digest__isnull", False)
+                ),
+                fields=["source_digest", "extension", "resolution"],
+                name="idx_image_live_source",
+            ),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 3.1.7 on 2026-10-19 19:04
+
+import django.contrib.postgres.fields
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+
+# Fill tag names of existing articles from their tag relations.
+_BACKFILL_SQL = (
+    'UPDATE "resource_management_article" AS article '
+    'SET "tag_names" = ARRAY('
+    'SELECT tag."tag_name" FROM "resource_management_articletag" AS article_tag '
+    'JOIN "resource_management_tag" AS tag ON tag."id" = article_tag."tag_id" '
+    'WHERE article_tag."article_id" = article."id" ORDER BY tag."tag_name")'
+)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("resource_management", "0007_image_live_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="article",
+            name="tag_names",
+            field=django.contrib.postgres.fields.ArrayField(
+                base_field=models.CharField(max_length=50),
+                blank=True,
+                default=list,
+                size=None,
+            ),
+        ),
+        migrations.RunSQL(_BACKFILL_SQL, migrations.RunSQL.noop),
+        migrations.AddIndex(
+            model_name="article",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["tag_names"], name="idx_article_tag_names"
+            ),
+        ),
+    ]
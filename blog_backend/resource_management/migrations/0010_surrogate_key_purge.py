@@ -0,0 +1,40 @@
+# Generated by Django 3.1.7 on 2026-10-19 19:25
+
+import django.contrib.postgres.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("resource_management", "0009_cache_generation"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SurrogateKeyPurge",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("synonym", models.SlugField(max_length=100)),
+                (
+                    "surrogate_keys",
+                    django.contrib.postgres.fields.ArrayField(
+                        base_field=models.CharField(max_length=200), size=None
+                    ),
+                ),
+                ("created", models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="surrogatekeypurge",
+            index=models.Index(fields=["created"], name="idx_purge_outbox_queue"),
+        ),
+    ]
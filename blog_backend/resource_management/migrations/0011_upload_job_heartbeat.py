@@ -0,0 +1,23 @@
+# Generated by Django 3.1.7 on 2026-10-19 19:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("resource_management", "0010_surrogate_key_purge"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="uploadjob",
+            name="attempts",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="uploadjob",
+            name="heartbeat",
+            field=models.DateTimeField(null=True),
+        ),
+    ]
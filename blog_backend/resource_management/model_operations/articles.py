@@ -1,4 +1,4 @@
-from typing import NamedTuple, Tuple, Optional, final
+from typing import Any, NamedTuple, Sequence, Tuple, Optional, final
 
 from django.db.models.query import QuerySet
 from django.core.exceptions import ObjectDoesNotExist
@@ -8,8 +8,11 @@ from resource_management.models import (
     RawArticleData,
     ArticleEditHistory,
     CompiledArticleData,
+    ArticleTag,
+    Tag,
 )
 from resource_management.model_operations.utils import BaseOperation
+from resource_management.model_operations.cache import cached_read
 
 __all__ = [
     "ArticlePageListResult",
@@ -32,6 +35,7 @@ class ArticleOperations(BaseOperation[Article]):
     base_model = Article
 
     @classmethod
+    @cached_read(Article, CompiledArticleData, ArticleTag, Tag)
     def get_article_by_synonym(
         cls,
         article_synonym: str,
@@ -47,19 +51,54 @@ class ArticleOperations(BaseOperation[Article]):
         return query.get(synonym=article_synonym)
 
     @classmethod
+    def get_uploaded_article(
+        cls, article_synonym: str, bundle_digest: str
+    ) -> Optional[Article]:
+        """ Return the article if its last uploaded bundle has given digest. """
+        return cls.base_model.objects.filter(
+            synonym=article_synonym, bundle_digest=bundle_digest
+        ).first()
+
+    @classmethod
+    def set_uploaded_bundle(
+        cls, article: Article, bundle_digest: str, bundle_version: str
+    ) -> None:
+        """Record the bundle once everything of its upload is written, so
+        a failed upload is never skipped when the bundle is uploaded again.
+        """
+        cls.base_model.objects.filter(id=article.id).update(
+            bundle_digest=bundle_digest, bundle_version=bundle_version
+        )
+        article.bundle_digest = bundle_digest
+        article.bundle_version = bundle_version
+
+    @classmethod
+    @cached_read(Article)
     def get_prev_and_next_article_synonyms(
         cls, article: Article
     ) -> Tuple[Optional[str], Optional[str]]:
+        return cls._get_prev_and_next_article_values(article, "synonym")
+
+    @classmethod
+    def get_prev_and_next_article_ids(
+        cls, article: Article
+    ) -> Tuple[Optional[int], Optional[int]]:
+        return cls._get_prev_and_next_article_values(article, "id")
+
+    @classmethod
+    def _get_prev_and_next_article_values(
+        cls, article: Article, field: str
+    ) -> Tuple[Any, Any]:
         prev_post = (
             cls.base_model.objects.filter(id__lt=article.id)
             .order_by("-id")
-            .values_list("synonym", flat=True)
+            .values_list(field, flat=True)
             .first()
         )
         next_post = (
             cls.base_model.objects.filter(id__gt=article.id)
             .order_by("id")
-            .values_list("synonym", flat=True)
+            .values_list(field, flat=True)
             .first()
         )
 
@@ -72,8 +111,15 @@ class ArticleOperations(BaseOperation[Article]):
         page_size: int = 10,
         tag: Optional[str] = None,
         prefetch_for_blog: bool = False,
+        tags: Optional[Sequence[str]] = None,
+        match_all: bool = True,
     ) -> ArticlePageListResult:
-        """ It's strongly suggested to apply offset for this function. """
+        """It's strongly suggested to apply offset for this function.
+
+        Articles can be filtered by a single tag, or by multiple tags which
+        are either all (match_all) or any of them attached to the article.
+        Both run on the tag name array with its GIN index, without joins.
+        """
         if (not isinstance(page, int)) or page <= 0:
             raise ValueError('"page" can not be float or non-positive integer.')
         if (not isinstance(page_size, int)) or page_size <= 0:
@@ -82,14 +128,18 @@ class ArticleOperations(BaseOperation[Article]):
         offset = (page - 1) * page_size
         article_list = cls.base_model.objects
         if tag:
-            article_list = article_list.filter(article_tag__tag__tag_name=tag)
+            tags = [tag]
+        if tags:
+            article_list = article_list.filter(
+                **{"tag_names__contains" if match_all else "tag_names__overlap": tags}
+            )
         # TODO: We need a better way to prefetch tags (sorted lexicographically)
         if prefetch_for_blog:
             article_list = article_list.prefetch_related("tags_of_article__tag")
         article_list = article_list.order_by("-id")[offset : (offset + page_size + 1)]
         # TODO: Set up test for initial state without article
         #       Expected behavior: Only pass when on page one, without tag filtering
-        if (not article_list) and ((page > 1) or tag):
+        if (not article_list) and ((page > 1) or tags):
             raise ObjectDoesNotExist()
         has_prev_page = len(article_list) == page_size + 1
 
@@ -133,6 +183,7 @@ class CompiledArticleDataOperations(BaseOperation[CompiledArticleData]):
     base_model = CompiledArticleData
 
     @classmethod
+    @cached_read(CompiledArticleData)
     def get_compiled_data(cls, article: Article) -> CompiledArticleData:
         return cls.base_model.objects.get(article=article)
 
@@ -0,0 +1,344 @@
+""" cache.py
+
+    Cache-aside for read operations.
+
+    Cached results are tagged with generation numbers of the models they're
+    read from. Any change of a model (save/delete signals, bulk operations)
+    bumps its generation once committed, which makes results read from it
+    stale. Generations are counted in CacheGeneration table, and mirrored
+    into the cache for readers.
+
+    Stale or expired results are rebuilt by one worker at a time, holding an
+    advisory lock on the key in the database (cache backends like
+    FileBasedCache can't add keys atomically). Meanwhile others get the stale
+    result, or wait for the rebuilt one when there's none.
+"""
+from contextlib import ExitStack
+from functools import wraps
+from hashlib import sha256
+from time import sleep, time, time_ns
+from typing import (
+    final,
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+    TypeVar,
+    cast,
+)
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, connections, transaction, DEFAULT_DB_ALIAS
+from django.db.models import Model
+from django.db.models.query import QuerySet
+from django.db.models.signals import post_delete, post_save
+
+from resource_management.models import CacheGeneration
+from resource_management.model_operations.locks import (
+    LOCK_NAMESPACE_CACHE,
+    LockNotAcquiredError,
+    advisory_lock,
+)
+from resource_management.routers import is_cache_bypassed
+from resource_management.utils.instrumentation import METRICS
+
+__all__ = [
+    "cached_read",
+    "cached_result",
+    "invalidate_models",
+    "bump_generations",
+    "load_generations",
+    "store_generations",
+]
+
+_F = TypeVar("_F", bound=Callable[..., Any])
+
+_GENERATION_KEY = "resource:generation:{0:s}"
+_RESULT_KEY = "resource:{name:s}:{args:s}"
+
+# Interval of checking whether the result is rebuilt by another worker.
+_REBUILD_POLL_SECONDS = 0.05
+
+# Results of cached reads: "hit", "stale" (served while another worker
+# rebuilds it), "wait" (rebuilt by another worker), or "miss" (built).
+_CACHE_READS = METRICS.counter(
+    "blog_resource_cache_reads_total",
+    "Cached reads, by name of the read and result.",
+    ["name", "result"],
+)
+
+
+@final
+class _CachedResult(NamedTuple):
+    generations: Tuple[int, ...]
+    # Timestamp the result expires at; it's kept as a stale result for
+    # RESOURCE_CACHE_STALE_SECONDS longer.
+    fresh_until: float
+    result: Any
+
+
+def _get_generation_key(name: str) -> str:
+    return _GENERATION_KEY.format(name)
+
+
+def _get_model_names(models: Iterable[Type[Model]]) -> List[str]:
+    # Sorted, so rows are always locked in the same order.
+    return sorted(set(model._meta.label_lower for model in models))
+
+
+def load_generations(names: Sequence[str]) -> Dict[str, int]:
+    """ Read current generations of the models from the database. """
+    query = CacheGeneration.objects.using(DEFAULT_DB_ALIAS)
+    generations = dict(query.filter(name__in=names).values_list("name", "generation"))
+    missing = [name for name in names if name not in generations]
+    if missing:
+        # Start from current time rather than 0, so a new row never comes
+        # back to a value used by cached results.
+        query.bulk_create(
+            [CacheGeneration(name=name, generation=time_ns()) for name in missing],
+            ignore_conflicts=True,
+        )
+        generations.update(
+            query.filter(name__in=missing).values_list("name", "generation")
+        )
+    return generations
+
+
+def store_generations(generations: Dict[str, int]) -> None:
+    """Mirror generations read from the database into the cache, unless
+    it has them (or newer ones) already.
+
+    Workers storing generations at the same time could leave an older one
+    in the cache, so each write is checked against the database again until
+    they match.
+    """
+    while generations:
+        keys = {name: _get_generation_key(name) for name in generations}
+        cached = cache.get_many(list(keys.values()))
+        outdated = {
+            name: generation
+            for name, generation in generations.items()
+            if cached.get(keys[name]) is None or cached[keys[name]] < generation
+        }
+        if not outdated:
+            return
+        # Deleted first, so a failed write leaves no generation (which is
+        # read from the database) rather than an old one. It drops the old
+        # values from local tiers of all processes of TwoTierCache as well.
+        cache.delete_many([keys[name] for name in outdated])
+        cache.set_many(
+            {keys[name]: generation for name, generation in outdated.items()},
+            timeout=None,
+        )
+        generations = load_generations(list(outdated))
+
+
+def _get_generations(models: Iterable[Type[Model]]) -> List[int]:
+    names = [model._meta.label_lower for model in models]
+    keys = [_get_generation_key(name) for name in names]
+    generations = cache.get_many(keys)
+    missing = [name for name, key in zip(names, keys) if key not in generations]
+    if missing:
+        # Added rather than set, so it never overwrites a newer generation
+        # stored by a writer meanwhile.
+        for name, generation in load_generations(missing).items():
+            key = _get_generation_key(name)
+            cache.add(key, generation, timeout=None)
+            generations[key] = cache.get(key, generation)
+
+    return [generations[key] for key in keys]
+
+
+def bump_generations(models: Iterable[Type[Model]]) -> Dict[str, int]:
+    """Bump generations of the models in the database, and mirror them into
+    the cache. Return the new generations by label of the model.
+    """
+    names = _get_model_names(models)
+    table = CacheGeneration._meta.db_table
+    with connections[DEFAULT_DB_ALIAS].cursor() as cursor:
+        # Incremented by the database, so concurrent bumps never collapse.
+        cursor.execute(
+            "INSERT INTO {table:s} (name, generation, updated) "
+            "SELECT name, %s, now() FROM unnest(%s::varchar[]) AS name "
+            "ON CONFLICT (name) DO UPDATE "
+            "SET generation = {table:s}.generation + 1, updated = now() "
+            "RETURNING name, generation".format(table=table),
+            [time_ns(), names],
+        )
+        generations = dict(cursor.fetchall())
+    store_generations(generations)
+    return generations
+
+
+def invalidate_models(*models: Type[Model]) -> None:
+    """Invalidate cached results read from the models.
+
+    Inside a transaction, it's done on commit, since other readers could
+    cache the old rows until then.
+    """
+    if not settings.RESOURCE_CACHE_ENABLED:
+        return
+
+    # Run right away outside of transactions.
+    transaction.on_commit(lambda: bump_generations(models))
+
+
+def _get_arg_key(value: Any) -> str:
+    if isinstance(value, Model):
+        return "{0:s}#{1!s}".format(value._meta.label_lower, value.pk)
+    return repr(value)
+
+
+def _get_args_key(args: Iterable[Any], kwargs: Dict[str, Any]) -> str:
+    key = "|".join(
+        [_get_arg_key(value) for value in args]
+        + [
+            "{0:s}={1:s}".format(name, _get_arg_key(value))
+            for name, value in sorted(kwargs.items())
+        ]
+    )
+    return sha256(key.encode("utf-8")).hexdigest()
+
+
+def _invalidate_on_change(sender: Type[Model], **_: Any) -> None:
+    invalidate_models(sender)
+
+
+def _connect_signals(model: Type[Model]) -> None:
+    # Connected once per model, however many reads depend on it.
+    dispatch_uid = "resource_cache:" + model._meta.label_lower
+    post_save.connect(_invalidate_on_change, sender=model, dispatch_uid=dispatch_uid)
+    post_delete.connect(_invalidate_on_change, sender=model, dispatch_uid=dispatch_uid)
+
+
+def _is_fresh(entry: Optional[_CachedResult], generations: Tuple[int, ...]) -> bool:
+    return (
+        entry is not None
+        and entry.generations == generations
+        and time() < entry.fresh_until
+    )
+
+
+def _get_or_build(
+    name: str,
+    models: Tuple[Type[Model], ...],
+    args_key: str,
+    build: Callable[[], Any],
+    timeout: int,
+) -> Any:
+    if not settings.RESOURCE_CACHE_ENABLED or is_cache_bypassed():
+        return build()
+
+    key = _RESULT_KEY.format(name=name, args=args_key)
+    generations = tuple(_get_generations(models))
+    entry: Optional[_CachedResult] = cache.get(key)
+    if _is_fresh(entry, generations):
+        _CACHE_READS.inc(name=name, result="hit")
+        return cast(_CachedResult, entry).result
+    # Uncommitted rows could be rolled back, so don't cache nor wait for them.
+    if connection.in_atomic_block:
+        return build()
+
+    with ExitStack() as lease_stack:
+        try:
+            lease_stack.enter_context(
+                advisory_lock(LOCK_NAMESPACE_CACHE, key, wait=False)
+            )
+        except LockNotAcquiredError:
+            pass
+        else:
+            # Rebuilt by another worker, which released the lock meanwhile.
+            rebuilt_entry: Optional[_CachedResult] = cache.get(key)
+            if _is_fresh(rebuilt_entry, generations):
+                _CACHE_READS.inc(name=name, result="wait")
+                return cast(_CachedResult, rebuilt_entry).result
+
+            _CACHE_READS.inc(name=name, result="miss")
+            result = build()
+            if isinstance(result, QuerySet):
+                result = list(result)
+            if result is not None:
+                cache.set(
+                    key,
+                    _CachedResult(generations, time() + timeout, result),
+                    timeout=timeout + settings.RESOURCE_CACHE_STALE_SECONDS,
+                )
+            return result
+
+    # Another worker is rebuilding the result.
+    if entry is not None:
+        _CACHE_READS.inc(name=name, result="stale")
+        return entry.result
+    deadline = time() + settings.RESOURCE_CACHE_REBUILD_WAIT_SECONDS
+    while time() < deadline:
+        sleep(_REBUILD_POLL_SECONDS)
+        entry = cache.get(key)
+        if entry is not None and entry.generations == generations:
+            _CACHE_READS.inc(name=name, result="wait")
+            return entry.result
+    _CACHE_READS.inc(name=name, result="miss")
+    return build()
+
+
+def cached_read(*models: Type[Model]) -> Callable[[_F], _F]:
+    """Cache results of a read classmethod of operations class for its
+    CACHE_TIMEOUT seconds. Results are invalidated by changes of given
+    models, i.e. all models the read touches (incl. prefetched relations).
+
+    QuerySet results are cached as lists. Results aren't cached while in a
+    transaction, or after the current context wrote data, so both read
+    their own writes. Inside primary_reads(), they're always read from the
+    database.
+
+    Usage:
+        @classmethod
+        @cached_read(Tag, ArticleTag)
+        def get_something(cls, ...):
+    """
+
+    def decorator(f: _F) -> _F:
+        for model in models:
+            _connect_signals(model)
+
+        @wraps(f)
+        def wrapper(cls, *args: Any, **kwargs: Any) -> Any:
+            return _get_or_build(
+                "{0:s}.{1:s}".format(cls.__name__, f.__name__),
+                models,
+                _get_args_key(args, kwargs),
+                lambda: f(cls, *args, **kwargs),
+                cls.CACHE_TIMEOUT,
+            )
+
+        return cast(_F, wrapper)
+
+    return decorator
+
+
+def cached_result(*models: Type[Model], timeout: int) -> Callable[[_F], _F]:
+    """ Same as cached_read(), but for functions, e.g. of service layer. """
+
+    def decorator(f: _F) -> _F:
+        for model in models:
+            _connect_signals(model)
+
+        @wraps(f)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            return _get_or_build(
+                "{0:s}.{1:s}".format(f.__module__, f.__qualname__),
+                models,
+                _get_args_key(args, kwargs),
+                lambda: f(*args, **kwargs),
+                timeout,
+            )
+
+        return cast(_F, wrapper)
+
+    return decorator
@@ -1,5 +1,5 @@
 from os.path import splitext
-from typing import final, Iterable
+from typing import final, Iterable, Iterator
 
 from safedelete.queryset import SafeDeleteQueryset
 
@@ -11,6 +11,7 @@ from resource_management.model_operations.utils import (
     BaseOperation,
     BaseBulkOperation,
 )
+from resource_management.model_operations.cache import cached_read
 
 __all__ = [
     "ImageOperations",
@@ -20,6 +21,9 @@ __all__ = [
 @final
 class ImageOperations(BaseOperation[Image], BaseBulkOperation[Image]):
     base_model = Image
+    UUID_FETCH_CHUNK_SIZE = 10000
+    # Files of an entry never change, only the entry can be deleted.
+    CACHE_TIMEOUT = 3600
 
     # These methods will pull out all available image data, and exclude
     # original file by default.
@@ -49,6 +53,15 @@ class ImageOperations(BaseOperation[Image], BaseBulkOperation[Image]):
             resolution=Image.ImageResolutionType.ORIGINAL,
         )
 
+    @classmethod
+    def get_original_image(cls, entry: Image) -> Image:
+        """ Return the original image entry of the given rendition. """
+        return cls.base_model.objects.get(
+            article_id=entry.article_id,
+            alias=entry.alias,
+            resolution=Image.ImageResolutionType.ORIGINAL,
+        )
+
     @classmethod
     def get_original_images_by_article_synonym(
         cls, article_synonym: str
@@ -85,9 +98,29 @@ class ImageOperations(BaseOperation[Image], BaseBulkOperation[Image]):
         return query
 
     @classmethod
+    def get_images_by_source_digest(
+        cls, source_digest: str, extension: str
+    ) -> SafeDeleteQueryset[Image]:
+        """Return live images created from the source file with given digest,
+        ordered by resolution.
+        """
+        return cls.base_model.objects.filter(
+            source_digest=source_digest, extension=extension
+        ).order_by("resolution")
+
+    @classmethod
+    @cached_read(Image)
     def get_image_by_file_name(cls, file_name: str) -> Image:
         """ Return the object, or None if it doesn't exist in DB """
         uuid_str, ext = splitext(file_name)
         ext = ext.replace(".", "")
 
         return cls.base_model.objects.filter(uuid=uuid_str, extension=ext).get()
+
+    @classmethod
+    def iter_live_image_uuids(cls) -> Iterator[str]:
+        """Stream UUID strings of all images which are not (soft-)deleted."""
+        query = cls.base_model.objects.values_list("uuid", flat=True).order_by()
+        return (
+            str(uuid) for uuid in query.iterator(chunk_size=cls.UUID_FETCH_CHUNK_SIZE)
+        )
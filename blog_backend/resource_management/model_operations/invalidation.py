@@ -0,0 +1,296 @@
+""" invalidation.py
+
+    Invalidation bus of cached results across workers and nodes.
+
+    Writers bump counters of changed models in CacheGeneration once their
+    transaction is committed, and publish them with NOTIFY. Web workers
+    either LISTEN for the notifications (InvalidationListener), or poll the
+    counters (GenerationPoller), and mirror them into the cache of their
+    node, which invalidates cached results read from the models. Generations
+    applied to the cache are recorded in it, so each one is mirrored by one
+    worker of the node.
+
+    Cached results are invalidated by model, not by the synonym or tags of
+    the changed article.
+"""
+import os
+import select
+from json import dumps as json_dumps, loads as json_loads
+from threading import Event, Lock, Thread
+from typing import final, Final, Any, Callable, Dict, Iterable, Optional, Type
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections, transaction, DatabaseError, DEFAULT_DB_ALIAS
+from django.db.models import Model
+
+from resource_management.models import CacheGeneration
+from resource_management.model_operations.utils import BaseOperation
+from resource_management.model_operations.cache import (
+    bump_generations,
+    load_generations,
+    store_generations,
+)
+
+__all__ = [
+    "INVALIDATION_CHANNEL",
+    "INVALIDATION_LISTEN",
+    "INVALIDATION_POLL",
+    "CacheGenerationOperations",
+    "publish_invalidation",
+    "apply_invalidation",
+    "InvalidationListener",
+    "GenerationPoller",
+    "ensure_invalidation_subscriber",
+]
+
+INVALIDATION_CHANNEL: Final = "resource_invalidation"
+
+# Values of RESOURCE_CACHE_INVALIDATION
+INVALIDATION_LISTEN: Final = "listen"
+INVALIDATION_POLL: Final = "poll"
+
+# Seconds between checks whether the listener is stopped, and before
+# reconnecting after losing the connection.
+_LISTEN_TIMEOUT_SECONDS: Final = 1.0
+_RECONNECT_SECONDS: Final = 5.0
+
+# Records of generations applied to the cache of the node. They're only
+# needed while all workers of the node receive the same generations.
+_APPLIED_KEY: Final = "resource:generation-applied:{name:s}:{generation:d}"
+_APPLIED_TIMEOUT_SECONDS: Final = 60 * 60
+
+
+@final
+class CacheGenerationOperations(BaseOperation[CacheGeneration]):
+    base_model = CacheGeneration
+
+    @classmethod
+    def get_generations(cls) -> Dict[str, int]:
+        return dict(cls.base_model.objects.values_list("name", "generation"))
+
+
+def publish_invalidation(
+    models: Iterable[Type[Model]], using: str = DEFAULT_DB_ALIAS, **details: Any
+) -> None:
+    """Tell all workers to invalidate cached results read from the models,
+    once the current transaction is committed. Details (e.g. synonym of the
+    article) are only informative.
+    """
+    if not settings.RESOURCE_CACHE_ENABLED:
+        return
+
+    models = list(models)
+
+    def publish() -> None:
+        generations = bump_generations(models)
+        # Mirrored by this worker already.
+        _record_applied(generations)
+        payload = json_dumps(
+            dict(details, models=sorted(generations), generations=generations)
+        )
+        with connections[using].cursor() as cursor:
+            cursor.execute("SELECT pg_notify(%s, %s)", [INVALIDATION_CHANNEL, payload])
+
+    # Generations are bumped after the changes are visible to others, so
+    # results cached from the old rows meanwhile are invalidated as well.
+    transaction.on_commit(publish, using=using)
+
+
+def _record_applied(generations: Dict[str, int]) -> Dict[str, int]:
+    """Record the generations as applied to the cache of this node. Return
+    ones which weren't recorded by another worker yet.
+    """
+    return {
+        name: generation
+        for name, generation in generations.items()
+        if cache.add(
+            _APPLIED_KEY.format(name=name, generation=generation),
+            True,
+            timeout=_APPLIED_TIMEOUT_SECONDS,
+        )
+    }
+
+
+def apply_invalidation(generations: Dict[str, int]) -> None:
+    """Invalidate cached results read from the models in the cache of this
+    node, by mirroring their generations from the database. Generations
+    applied by another worker of the node already are skipped.
+    """
+    known_generations: Dict[str, int] = {}
+    for name, generation in generations.items():
+        try:
+            apps.get_model(name)
+        except LookupError:
+            # Published by a newer version, which has models we don't know.
+            continue
+        known_generations[name] = generation
+
+    applied = _record_applied(known_generations)
+    try:
+        store_generations(applied)
+    except Exception:
+        # Removed, so it's applied again, e.g. by the next poll.
+        cache.delete_many(
+            [
+                _APPLIED_KEY.format(name=name, generation=generation)
+                for name, generation in applied.items()
+            ]
+        )
+        raise
+
+
+def _invalidate_all() -> None:
+    """ Used when changes could be missed, e.g. while disconnected. """
+    apply_invalidation(
+        load_generations(
+            [
+                model._meta.label_lower
+                for model in apps.get_app_config("resource_management").get_models()
+            ]
+        )
+    )
+
+
+@final
+class InvalidationListener(Thread):
+    """Apply published invalidations as soon as they're committed. It keeps
+    a dedicated connection to the database, outside of Django's connection
+    handling.
+    """
+
+    def __init__(self, using: str = DEFAULT_DB_ALIAS):
+        super().__init__(name="invalidation-listener", daemon=True)
+        self.using = using
+        self.listening = Event()
+        self._stopped = Event()
+
+    def stop(self) -> None:
+        self._stopped.set()
+
+    def run(self) -> None:
+        connected_before = False
+        try:
+            while not self._stopped.is_set():
+                try:
+                    self._listen(invalidate_all=connected_before)
+                # Errors of the raw connection aren't wrapped by Django.
+                except (
+                    connections[self.using].Database.Error,
+                    DatabaseError,
+                    OSError,
+                ) as e:
+                    print("Invalidation listener disconnected: {0!s}".format(e))
+                    # Generations are read through Django's connection.
+                    connections[DEFAULT_DB_ALIAS].close()
+                self.listening.clear()
+                connected_before = True
+                self._stopped.wait(_RECONNECT_SECONDS)
+        finally:
+            connections.close_all()
+
+    def _listen(self, invalidate_all: bool) -> None:
+        wrapper = connections[self.using]
+        conn = wrapper.get_new_connection(wrapper.get_connection_params())
+        try:
+            conn.autocommit = True
+            with conn.cursor() as cursor:
+                cursor.execute("LISTEN " + INVALIDATION_CHANNEL)
+            if invalidate_all:
+                _invalidate_all()
+            self.listening.set()
+
+            while not self._stopped.is_set():
+                readable, _, _ = select.select([conn], [], [], _LISTEN_TIMEOUT_SECONDS)
+                if not readable:
+                    continue
+                conn.poll()
+                while conn.notifies:
+                    message = json_loads(conn.notifies.pop(0).payload)
+                    if "generations" in message:
+                        apply_invalidation(message["generations"])
+                    else:
+                        # Published by an older version.
+                        apply_invalidation(load_generations(message["models"]))
+        finally:
+            conn.close()
+
+
+@final
+class GenerationPoller(Thread):
+    """Apply invalidations by polling CacheGeneration, for deployments where
+    long-lived listener connections aren't allowed.
+    """
+
+    def __init__(self, interval: float):
+        super().__init__(name="generation-poller", daemon=True)
+        self.interval = interval
+        self._generations: Optional[Dict[str, int]] = None
+        self._stopped = Event()
+
+    def stop(self) -> None:
+        self._stopped.set()
+
+    def load_baseline(self) -> None:
+        self._generations = CacheGenerationOperations.get_generations()
+
+    def poll(self) -> None:
+        generations = CacheGenerationOperations.get_generations()
+        if self._generations is None:
+            # Baseline couldn't be loaded, so anything could have changed.
+            _invalidate_all()
+        else:
+            apply_invalidation(
+                {
+                    name: generation
+                    for name, generation in generations.items()
+                    if self._generations.get(name) != generation
+                }
+            )
+        self._generations = generations
+
+    def run(self) -> None:
+        try:
+            # Baseline is loaded before the first wait, so changes made
+            # meanwhile are found by the first poll.
+            self._run_query(self.load_baseline)
+            while not self._stopped.wait(self.interval):
+                self._run_query(self.poll)
+        finally:
+            connections.close_all()
+
+    @staticmethod
+    def _run_query(query: Callable[[], None]) -> None:
+        try:
+            query()
+        except DatabaseError as e:
+            # Last good generations are kept, so changes made meanwhile are
+            # found by the next successful poll.
+            print("Failed to poll cache generations: {0!s}".format(e))
+            connections[DEFAULT_DB_ALIAS].close()
+
+
+_subscriber_lock = Lock()
+_subscriber_pid: Optional[int] = None
+
+
+def ensure_invalidation_subscriber() -> None:
+    """Start the subscriber configured by RESOURCE_CACHE_INVALIDATION in
+    this process, if it isn't running yet. Started lazily (e.g. on first
+    request) rather than on import, so it's started in each forked worker.
+    """
+    global _subscriber_pid
+    mode = settings.RESOURCE_CACHE_INVALIDATION
+    if not (settings.RESOURCE_CACHE_ENABLED and mode) or _subscriber_pid == os.getpid():
+        return
+
+    with _subscriber_lock:
+        if _subscriber_pid == os.getpid():
+            return
+        # The mode is validated in settings.
+        if mode == INVALIDATION_LISTEN:
+            InvalidationListener().start()
+        else:
+            GenerationPoller(settings.RESOURCE_CACHE_POLL_SECONDS).start()
+        _subscriber_pid = os.getpid()
@@ -0,0 +1,121 @@
+from datetime import datetime
+from typing import List, Optional, Tuple, final
+
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.query import QuerySet
+from django.utils import timezone
+
+from resource_management.models import UploadJob, UploadJobStage
+from resource_management.model_operations.utils import BaseOperation
+
+__all__ = [
+    "UploadJobOperations",
+    "UploadJobStageOperations",
+]
+
+
+@final
+class UploadJobOperations(BaseOperation[UploadJob]):
+    base_model = UploadJob
+
+    @classmethod
+    def get_job(cls, job_id: str) -> UploadJob:
+        return cls.base_model.objects.get(uuid=job_id)
+
+    @classmethod
+    @transaction.atomic
+    def claim_next_job(cls) -> Optional[UploadJob]:
+        """Mark the oldest pending job as running and return it.
+
+        Note: Rows locked by other workers are skipped, so multiple workers
+              can poll the same queue without picking up the same job.
+        """
+        job = (
+            cls.base_model.objects.select_for_update(skip_locked=True)
+            .filter(status=UploadJob.JobStatus.PENDING)
+            .order_by("created")
+            .first()
+        )
+        if job is None:
+            return None
+        job.status = UploadJob.JobStatus.RUNNING
+        job.started = job.heartbeat = timezone.now()
+        job.attempts += 1
+        job.save(update_fields=["status", "started", "heartbeat", "attempts"])
+
+        return job
+
+    @classmethod
+    def refresh_heartbeat(cls, job: UploadJob) -> None:
+        cls.base_model.objects.filter(
+            uuid=job.uuid, status=UploadJob.JobStatus.RUNNING
+        ).update(heartbeat=timezone.now())
+
+    @classmethod
+    @transaction.atomic
+    def recover_stale_jobs(
+        cls, stale_before: datetime, max_attempts: int
+    ) -> Tuple[List[UploadJob], List[UploadJob]]:
+        """Queue running jobs without heartbeat since `stale_before` again, or
+        mark them as failed when they've been tried `max_attempts` times.
+        Return lists of requeued and failed jobs.
+
+        Note: Jobs claimed before heartbeat was introduced are checked by the
+              time they were started.
+        """
+        jobs = list(
+            cls.base_model.objects.select_for_update(skip_locked=True).filter(
+                Q(heartbeat__lt=stale_before)
+                | Q(heartbeat__isnull=True, started__lt=stale_before),
+                status=UploadJob.JobStatus.RUNNING,
+            )
+        )
+        requeued = [job for job in jobs if job.attempts < max_attempts]
+        failed = [job for job in jobs if job.attempts >= max_attempts]
+        for job in requeued:
+            job.status = UploadJob.JobStatus.PENDING
+            job.save(update_fields=["status"])
+        for job in failed:
+            cls.finish_job(
+                job,
+                success=False,
+                error_message=(
+                    "Worker stopped while running the job ({:d} attempts).".format(
+                        job.attempts
+                    )
+                ),
+            )
+
+        return requeued, failed
+
+    @classmethod
+    def finish_job(
+        cls, job: UploadJob, success: bool, error_message: Optional[str] = None
+    ) -> None:
+        job.status = (
+            UploadJob.JobStatus.SUCCEEDED if success else UploadJob.JobStatus.FAILED
+        )
+        job.finished = timezone.now()
+        job.error_message = error_message
+        job.save(update_fields=["status", "finished", "error_message"])
+
+
+@final
+class UploadJobStageOperations(BaseOperation[UploadJobStage]):
+    base_model = UploadJobStage
+
+    @classmethod
+    def get_stages(cls, job: UploadJob) -> QuerySet[UploadJobStage]:
+        return cls.base_model.objects.filter(job=job).order_by("started", "id")
+
+    @classmethod
+    def finish_open_stages(cls, job: UploadJob) -> None:
+        cls.base_model.objects.filter(job=job, finished__isnull=True).update(
+            finished=timezone.now()
+        )
+
+    @classmethod
+    def start_stage(cls, job: UploadJob, name: str) -> UploadJobStage:
+        cls.finish_open_stages(job)
+        return cls.create(job=job, name=name)
@@ -0,0 +1,61 @@
+from contextlib import contextmanager
+from hashlib import sha256
+from typing import final, Final, Iterator
+
+from django.db import connections, DEFAULT_DB_ALIAS
+
+__all__ = [
+    "LockNotAcquiredError",
+    "LOCK_NAMESPACE_ARTICLE",
+    "LOCK_NAMESPACE_CACHE",
+    "get_advisory_lock_key",
+    "advisory_lock",
+]
+
+# Namespaces keep keys of different kinds of resources apart.
+LOCK_NAMESPACE_ARTICLE: Final = "article"
+# Rebuilds of cached results, by cache key
+LOCK_NAMESPACE_CACHE: Final = "cache"
+
+
+@final
+class LockNotAcquiredError(Exception):
+    pass
+
+
+def get_advisory_lock_key(namespace: str, name: str) -> int:
+    """ Map the resource name to a signed 64-bit advisory lock key. """
+    digest = sha256("{0:s}:{1:s}".format(namespace, name).encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big", signed=True)
+
+
+@contextmanager
+def advisory_lock(
+    namespace: str, name: str, wait: bool = True, using: str = DEFAULT_DB_ALIAS
+) -> Iterator[None]:
+    """Hold a PostgreSQL session-level advisory lock on the resource.
+
+    Unlike row locks, it's kept across transactions, so it can guard a
+    process which commits more than once, or writes files outside of the
+    DB. When wait is False, LockNotAcquiredError is raised immediately if
+    another session holds the lock.
+
+    Note: Locks are re-entrant within the same DB session.
+    """
+    key = get_advisory_lock_key(namespace, name)
+    with connections[using].cursor() as cursor:
+        if wait:
+            cursor.execute("SELECT pg_advisory_lock(%s)", [key])
+        else:
+            cursor.execute("SELECT pg_try_advisory_lock(%s)", [key])
+            if not cursor.fetchone()[0]:
+                raise LockNotAcquiredError(
+                    "'{name:s}' ({namespace:s}) is locked by another session.".format(
+                        name=name, namespace=namespace
+                    )
+                )
+    try:
+        yield
+    finally:
+        with connections[using].cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_unlock(%s)", [key])
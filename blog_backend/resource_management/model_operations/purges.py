@@ -0,0 +1,30 @@
+from typing import final, List
+
+from resource_management.models import SurrogateKeyPurge
+from resource_management.model_operations.utils import BaseOperation
+
+__all__ = [
+    "SurrogateKeyPurgeOperations",
+]
+
+
+@final
+class SurrogateKeyPurgeOperations(BaseOperation[SurrogateKeyPurge]):
+    base_model = SurrogateKeyPurge
+
+    @classmethod
+    def claim_purges(cls, batch_size: int) -> List[SurrogateKeyPurge]:
+        """Lock and return the oldest queued purges. Call it in a transaction,
+        and delete the purges in the same one once they're done.
+
+        Note: Rows locked by other purgers are skipped.
+        """
+        return list(
+            cls.base_model.objects.select_for_update(skip_locked=True).order_by(
+                "created"
+            )[:batch_size]
+        )
+
+    @classmethod
+    def delete_purges(cls, purges: List[SurrogateKeyPurge]) -> None:
+        cls.base_model.objects.filter(pk__in=[purge.pk for purge in purges]).delete()
@@ -11,6 +11,7 @@ from resource_management.model_operations.utils import (
     BaseOperation,
     BaseBulkOperation,
 )
+from resource_management.model_operations.cache import cached_read
 
 __all__ = [
     "TagOperations",
@@ -21,8 +22,10 @@ __all__ = [
 @final
 class TagOperations(BaseOperation[Tag], BaseBulkOperation[Tag]):
     base_model = Tag
+    CACHE_TIMEOUT = 600
 
     @classmethod
+    @cached_read(Tag)
     def get_tag_by_name(cls, tag_name: str) -> Tag:
         return cls.base_model.objects.get(tag_name=tag_name)
 
@@ -47,6 +50,7 @@ class TagOperations(BaseOperation[Tag], BaseBulkOperation[Tag]):
         return query
 
     @classmethod
+    @cached_read(Tag)
     def get_all_tags(cls) -> Iterable[str]:
         return cls.base_model.objects.values_list("tag_name", flat=True).order_by(
             "tag_name"
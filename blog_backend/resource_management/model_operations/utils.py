@@ -5,6 +5,7 @@ from django.db import transaction
 from safedelete.models import SafeDeleteModel
 
 from resource_management.models.utils import BaseModel
+from resource_management.model_operations.cache import invalidate_models
 
 
 _T = TypeVar("_T", bound=Union[BaseModel, SafeDeleteModel])
@@ -18,6 +19,9 @@ def mypy_safe_property(f: Callable[..., Any]) -> Any:
 
 
 class BaseOperation(Generic[_T], metaclass=ABCMeta):
+    # Seconds results of @cached_read methods are kept.
+    CACHE_TIMEOUT = 300
+
     @mypy_safe_property
     @abstractmethod
     def base_model(self) -> _T:
@@ -46,11 +50,14 @@ class BaseBulkOperation(Generic[_T], metaclass=ABCMeta):
     @classmethod
     def bulk_create(cls, items: Iterable[_T]) -> List[_T]:
         """ Note: Only Postgresql backend will fill PK back to the entries. """
-        return cls.base_model.objects.bulk_create(
+        entries = cls.base_model.objects.bulk_create(
             items,
             batch_size=cls.CREATE_BATCH_SIZE,
             ignore_conflicts=False,
         )
+        # Bulk operations don't send signals, so invalidate explicitly.
+        invalidate_models(cls.base_model)
+        return entries
 
     @classmethod
     @transaction.atomic
@@ -59,7 +66,9 @@ class BaseBulkOperation(Generic[_T], metaclass=ABCMeta):
         is enabled in bulk_create(). So we need to iterate through the
         dicts and call get_or_create() for entries with PK.
         """
-        return [cls.base_model.objects.get_or_create(**item)[0] for item in items]
+        entries = [cls.base_model.objects.get_or_create(**item)[0] for item in items]
+        invalidate_models(cls.base_model)
+        return entries
 
     @classmethod
     def bulk_update(cls, items: Iterable[_T], fields: Iterable[str]) -> None:
@@ -69,3 +78,4 @@ class BaseBulkOperation(Generic[_T], metaclass=ABCMeta):
             fields,
             batch_size=cls.UPDATE_BATCH_SIZE,
         )
+        invalidate_models(cls.base_model)
@@ -1,3 +1,6 @@
 from .articles import *  # noqa: F401, F403
 from .images import *  # noqa: F401, F403
 from .tags import *  # noqa: F401, F403
+from .jobs import *  # noqa: F401, F403
+from .cache import *  # noqa: F401, F403
+from .purges import *  # noqa: F401, F403
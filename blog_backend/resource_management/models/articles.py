@@ -5,8 +5,11 @@
 """
 from typing import final
 
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
 from django.db import models
 from .utils import BaseModel
+from .fields import CompressedTextField
 
 __all__ = ["Article", "RawArticleData", "ArticleEditHistory", "CompiledArticleData"]
 
@@ -15,12 +18,27 @@ __all__ = ["Article", "RawArticleData", "ArticleEditHistory", "CompiledArticleDa
 # It has reference to CompiledArticleData in order to retrieve compiled HTML.
 @final
 class Article(BaseModel):
+    class Meta:
+        indexes = [
+            GinIndex(fields=["tag_names"], name="idx_article_tag_names"),
+        ]
+
     synonym = models.SlugField(
         db_index=True, max_length=100, unique=True, null=False, blank=False
     )
     title = models.CharField(max_length=200, null=False, blank=False)
     created = models.DateTimeField(auto_now_add=True)
     updated = models.DateTimeField(auto_now=True)
+    # SHA-256 digest and meta version of the last uploaded bundle, used to
+    # skip re-uploads of an identical bundle.
+    bundle_digest = models.CharField(max_length=64, null=True, blank=True)
+    bundle_version = models.CharField(max_length=30, null=True, blank=True)
+    # Names of tags (sorted), denormalized from ArticleTag so articles can
+    # be filtered by multiple tags without joins. Kept in sync whenever tags
+    # of the article are written.
+    tag_names = ArrayField(
+        models.CharField(max_length=50), default=list, blank=True, null=False
+    )
 
 
 # Raw Markdown article data.
@@ -36,7 +54,7 @@ class RawArticleData(BaseModel):
     created = models.DateTimeField(auto_now_add=True)
     version = models.CharField(max_length=30, null=False, blank=False)
     last_update = models.DateTimeField(auto_now=True)
-    data = models.TextField(null=False, blank=False)
+    data = CompressedTextField(null=False, blank=False)
 
 
 # Unified document diff information for each update.
@@ -62,8 +80,8 @@ class ArticleEditHistory(BaseModel):
     # Modifications on RawArticleData instance
     previous_version = models.CharField(max_length=30, null=True)
     #   Text diff info to n
-    update_data = models.TextField(null=True)
-    recover_data = models.TextField(null=True)
+    update_data = CompressedTextField(null=True)
+    recover_data = CompressedTextField(null=True)
 
 
 @final
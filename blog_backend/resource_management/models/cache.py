@@ -0,0 +1,20 @@
+""" cache.py
+
+    This defines generation counters of cached data, bumped whenever the
+    data changes. Web workers which can't keep a listener connection poll
+    them to find out which cached results to invalidate.
+"""
+from typing import final
+
+from django.db import models
+from .utils import BaseModel
+
+__all__ = ["CacheGeneration"]
+
+
+@final
+class CacheGeneration(BaseModel):
+    # Label of the model, e.g. "resource_management.article"
+    name = models.CharField(max_length=100, primary_key=True)
+    generation = models.BigIntegerField(default=0)
+    updated = models.DateTimeField(auto_now=True)
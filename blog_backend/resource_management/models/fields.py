@@ -0,0 +1,73 @@
+""" fields.py
+
+    Custom model fields shared by resource models.
+"""
+import zlib
+from typing import Final, Optional, Any, Union
+
+from django.db import models
+
+__all__ = [
+    "COMPRESSED_TEXT_HEADER",
+    "CompressedTextField",
+    "compress_text",
+    "decompress_text",
+]
+
+# Compressed payloads start with this header. A UTF-8 encoded document can
+# never start with a NUL byte, so rows that still hold plain text bytes
+# (not converted yet) can be told apart and decoded as-is.
+COMPRESSED_TEXT_HEADER: Final = b"\x00zlib:"
+_COMPRESSION_LEVEL: Final = 9
+_TEXT_ENCODING: Final = "utf-8"
+
+
+def compress_text(text: str) -> bytes:
+    return COMPRESSED_TEXT_HEADER + zlib.compress(
+        text.encode(_TEXT_ENCODING), _COMPRESSION_LEVEL
+    )
+
+
+def decompress_text(data: Union[bytes, memoryview]) -> str:
+    # DB drivers may hand back memoryview objects, and slicing them avoids
+    # copying the full payload before decompression.
+    view = memoryview(data).cast("B")
+    header_size = len(COMPRESSED_TEXT_HEADER)
+    if view[:header_size].tobytes() == COMPRESSED_TEXT_HEADER:
+        return zlib.decompress(view[header_size:]).decode(_TEXT_ENCODING)
+    return str(view, _TEXT_ENCODING)
+
+
+class CompressedTextField(models.BinaryField):
+    """Text field stored as zlib-compressed bytes.
+
+    Model instances always see plain strings. Values are compressed right
+    before they're sent to the DB, and decompressed when they're loaded.
+    """
+
+    def get_default(self) -> Any:
+        # BinaryField falls back to b"", which is not a valid text value.
+        return models.Field.get_default(self)
+
+    def from_db_value(
+        self,
+        value: Optional[Union[bytes, memoryview]],
+        expression: Any,
+        connection: Any,
+    ) -> Optional[str]:
+        if value is None:
+            return value
+        return decompress_text(value)
+
+    def to_python(self, value: Any) -> Optional[str]:
+        if value is None or isinstance(value, str):
+            return value
+        return decompress_text(value)
+
+    def get_db_prep_value(self, value: Any, connection: Any, prepared: bool = False):
+        if isinstance(value, str):
+            value = compress_text(value)
+        return super().get_db_prep_value(value, connection, prepared)
+
+    def value_to_string(self, obj: models.Model) -> str:
+        return self.value_from_object(obj)
@@ -9,6 +9,7 @@ from uuid import uuid4
 from typing import Final, final
 
 from django.db import models
+from django.db.models import Q
 from safedelete.models import SafeDeleteModel, SOFT_DELETE_CASCADE
 
 from resource_management.models import Article
@@ -23,14 +24,33 @@ class Image(SafeDeleteModel):
     _safedelete_policy = SOFT_DELETE_CASCADE
 
     class Meta:
+        # Lookups always go through the soft-delete manager, which filters on
+        # "deleted IS NULL", so indexes only cover live images. Soft-deleted
+        # ones are still reachable through the index of article foreign key.
         indexes = [
+            # Images of an article, optionally by alias, ordered by resolution
+            models.Index(
+                fields=["article", "alias", "resolution"],
+                name="idx_image_live_identity",
+                condition=Q(deleted__isnull=True),
+            ),
+            # Original images of an article. ImageResolutionType can't be
+            # referred here, 1 is ORIGINAL.
             models.Index(
                 fields=["article", "alias"],
-                name="idx_image_resolution_group",
+                name="idx_image_live_original",
+                condition=Q(deleted__isnull=True, resolution=1),
             ),
+            # Lookup by file name, and index-only scan of live UUIDs
             models.Index(
-                fields=["article", "alias", "resolution"],
-                name="idx_image_identity",
+                fields=["uuid", "extension"],
+                name="idx_image_live_file",
+                condition=Q(deleted__isnull=True),
+            ),
+            models.Index(
+                fields=["source_digest", "extension", "resolution"],
+                name="idx_image_live_source",
+                condition=Q(deleted__isnull=True, source_digest__isnull=False),
             ),
         ]
 
@@ -60,6 +80,12 @@ class Image(SafeDeleteModel):
     resolution = models.IntegerField(choices=ImageResolutionType.choices)
     height = models.PositiveIntegerField(null=True)
     width = models.PositiveIntegerField(null=True)
+    # Tiny preview shown while loading the image (data URI). Only stored in
+    # entries of original resolution.
+    placeholder = models.TextField(null=True, blank=True)
+    # SHA-256 digest of the source file in the uploaded bundle. Renditions
+    # of an identical source are reused across aliases and articles.
+    source_digest = models.CharField(max_length=64, null=True, blank=True)
 
     @property
     def file_name(self) -> str:
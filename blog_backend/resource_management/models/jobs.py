@@ -0,0 +1,55 @@
+""" jobs.py
+
+    This defines queued upload jobs submitted through HTTP, and the stage
+    records reported while a worker processes them.
+"""
+from uuid import uuid4
+from typing import final
+
+from django.db import models
+from .utils import BaseModel
+
+__all__ = ["UploadJob", "UploadJobStage"]
+
+
+@final
+class UploadJob(BaseModel):
+    class Meta:
+        indexes = [
+            # Workers pick up the oldest pending job first.
+            models.Index(fields=["status", "created"], name="idx_upload_job_queue"),
+        ]
+
+    class JobStatus(models.IntegerChoices):
+        PENDING = 1
+        RUNNING = 2
+        SUCCEEDED = 3
+        FAILED = 4
+
+    uuid = models.UUIDField(primary_key=True, default=uuid4)
+    synonym = models.SlugField(max_length=100, null=False, blank=False)
+    create_only = models.BooleanField(default=False)
+    # Submitted bundle, removed once the job is finished.
+    archive_path = models.CharField(max_length=500, null=False, blank=False)
+    status = models.IntegerField(choices=JobStatus.choices, default=JobStatus.PENDING)
+    created = models.DateTimeField(auto_now_add=True)
+    started = models.DateTimeField(null=True)
+    finished = models.DateTimeField(null=True)
+    error_message = models.TextField(null=True)
+    # Refreshed by the worker while the job is running. Running jobs which
+    # stop getting refreshed are left by workers that were killed.
+    heartbeat = models.DateTimeField(null=True)
+    attempts = models.IntegerField(default=0)
+
+
+@final
+class UploadJobStage(BaseModel):
+    job = models.ForeignKey(
+        UploadJob,
+        on_delete=models.CASCADE,
+        related_name="stages",
+        related_query_name="stage",
+    )
+    name = models.CharField(max_length=50, null=False, blank=False)
+    started = models.DateTimeField(auto_now_add=True)
+    finished = models.DateTimeField(null=True)
@@ -0,0 +1,26 @@
+""" purges.py
+
+    This defines the outbox of CDN purges. Each upload queues surrogate keys
+    of responses it changed, in the same transaction as the change, and a
+    local purger drains them ("manage.py drain_purge_outbox").
+"""
+from typing import final
+
+from django.contrib.postgres.fields import ArrayField
+from django.db import models
+from .utils import BaseModel
+
+__all__ = ["SurrogateKeyPurge"]
+
+
+@final
+class SurrogateKeyPurge(BaseModel):
+    class Meta:
+        indexes = [
+            models.Index(fields=["created"], name="idx_purge_outbox_queue"),
+        ]
+
+    # Synonym of the uploaded article, for reference only.
+    synonym = models.SlugField(max_length=100, null=False, blank=False)
+    surrogate_keys = ArrayField(models.CharField(max_length=200), null=False)
+    created = models.DateTimeField(auto_now_add=True)
@@ -0,0 +1,176 @@
+""" routers.py
+
+    Route reads of blog data to read replicas.
+
+    Reads only go to replicas inside replica_reads() context, which is
+    entered by ReplicaReadMiddleware for safe HTTP methods. Everything else
+    (uploads, management commands, writes) stays on the primary database,
+    so a lagging replica never affects decisions made on data it returns.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from random import shuffle
+from threading import Lock
+from time import monotonic
+from typing import final, Final, Dict, Iterator, List, Optional
+
+from django.conf import settings
+from django.db import connections, DEFAULT_DB_ALIAS
+
+from .utils.instrumentation import METRICS
+
+__all__ = [
+    "ReplicaRouter",
+    "replica_reads",
+    "primary_reads",
+    "pin_primary",
+    "is_primary_pinned",
+    "is_cache_bypassed",
+    "get_replica_aliases",
+]
+
+# Models of blog data which can be read from replicas. Others (e.g. upload
+# jobs, which are polled right after being written) are always read from
+# the primary.
+_REPLICA_MODELS = frozenset(
+    (
+        "article",
+        "rawarticledata",
+        "articleedithistory",
+        "compiledarticledata",
+        "tag",
+        "articletag",
+        "image",
+    )
+)
+
+
+@final
+class _RoutingState(object):
+    def __init__(self, replica_reads: bool, bypass_cache: bool = False):
+        self.replica_reads = replica_reads
+        # Set by primary_reads(), so cached reads are read from the database.
+        self.bypass_cache = bypass_cache
+        # Set after a write, so later reads in the same context see it.
+        self.pinned = False
+
+
+_routing_state: ContextVar[Optional[_RoutingState]] = ContextVar(
+    "routing_state", default=None
+)
+
+# Replicas which failed to connect are skipped until the retry time.
+_unavailable_until: Dict[str, float] = {}
+_unavailable_lock = Lock()
+
+_REPLICA_FAILURES: Final = METRICS.counter(
+    "blog_db_replica_failures_total",
+    "Failed connections to read replicas, which are skipped for a while.",
+    ["alias"],
+)
+
+
+def get_replica_aliases() -> List[str]:
+    return list(settings.DB_REPLICA_ALIASES)
+
+
+@contextmanager
+def replica_reads(
+    enabled: bool = True, bypass_cache: bool = False
+) -> Iterator[_RoutingState]:
+    """Allow reads of blog data in this context to go to replicas."""
+    state = _RoutingState(replica_reads=enabled, bypass_cache=bypass_cache)
+    token = _routing_state.set(state)
+    try:
+        yield state
+    finally:
+        _routing_state.reset(token)
+
+
+@contextmanager
+def primary_reads() -> Iterator[_RoutingState]:
+    """Read everything from the primary in this context, bypassing cached
+    reads as well, e.g. for read-modify-write. Writes made in it still pin
+    the outer context.
+    """
+    with replica_reads(enabled=False, bypass_cache=True) as state:
+        try:
+            yield state
+        finally:
+            pinned = state.pinned
+    if pinned:
+        pin_primary()
+
+
+def pin_primary() -> None:
+    """Read from the primary for the rest of the context, e.g. after data
+    was written. ReplicaReadMiddleware keeps the pin for following requests
+    of the same client as well.
+    """
+    state = _routing_state.get()
+    if state:
+        state.pinned = True
+
+
+def is_primary_pinned() -> bool:
+    state = _routing_state.get()
+    return bool(state and state.pinned)
+
+
+def is_cache_bypassed() -> bool:
+    """ Whether cached reads must be read from the database. """
+    state = _routing_state.get()
+    return bool(state and (state.pinned or state.bypass_cache))
+
+
+def _is_available(alias: str) -> bool:
+    with _unavailable_lock:
+        if _unavailable_until.get(alias, 0.0) > monotonic():
+            return False
+    try:
+        connections[alias].ensure_connection()
+    except Exception:
+        with _unavailable_lock:
+            _unavailable_until[alias] = monotonic() + settings.DB_REPLICA_RETRY_SECONDS
+        _REPLICA_FAILURES.inc(alias=alias)
+        return False
+
+    return True
+
+
+def _choose_replica() -> str:
+    """ Return a random available replica, or the primary if none is. """
+    aliases = get_replica_aliases()
+    shuffle(aliases)
+    for alias in aliases:
+        if _is_available(alias):
+            return alias
+
+    return DEFAULT_DB_ALIAS
+
+
+@final
+class ReplicaRouter(object):
+    def db_for_read(self, model, **hints) -> str:
+        state = _routing_state.get()
+        if (
+            state is None
+            or not state.replica_reads
+            or state.pinned
+            or model._meta.model_name not in _REPLICA_MODELS
+            # Reads inside a transaction must see its own writes.
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return DEFAULT_DB_ALIAS
+        return _choose_replica()
+
+    def db_for_write(self, model, **hints) -> str:
+        pin_primary()
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints) -> bool:
+        # Replicas hold the same data as the primary.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints) -> bool:
+        return db == DEFAULT_DB_ALIAS
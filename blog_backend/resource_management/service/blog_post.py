@@ -1,52 +1,96 @@
-from typing import Final, List, Dict, Optional, Any
+from typing import Final, Iterable, List, Dict, Optional, Any
+
+from resource_management.models import Article, ArticleTag, CompiledArticleData, Tag
 
 from resource_management.model_operations import (
     ArticleOperations,
     CompiledArticleDataOperations,
     TagOperations,
+    cached_result,
+)
+from resource_management.utils.serialization import dumps_json
+from resource_management.service.surrogate_keys import (
+    PayloadResult,
+    SURROGATE_KEY_PAGE_LISTING,
+    SURROGATE_KEY_TAG_LIST,
+    get_article_key,
+    get_tag_key,
 )
 
 __all__ = [
     "get_posts_by_page",
+    "get_posts_by_page_and_tags",
     "get_post_data",
     "get_all_tags",
 ]
 
 DATE_FORMAT: Final = "%Y%m%d-%H%m%S"
+# Seconds payloads are cached (see RESOURCE_CACHE_ENABLED)
+PAYLOAD_CACHE_TIMEOUT: Final = 300
 
 
+@cached_result(Article, timeout=PAYLOAD_CACHE_TIMEOUT)
 def get_posts_by_page(
     page: int, page_size: int, tag: Optional[str] = None
-) -> Dict[str, Any]:
+) -> PayloadResult:
     """Provide title, alias, time, and tags. Ordered by time in desc order.
     Also, points out whether the previous or next page exists.
     """
+    search_result = ArticleOperations.get_article_page_list(page, page_size, tag=tag)
+
+    data = {
+        "page_num": page,
+        "tag": tag,
+        "has_next_page": search_result.has_next_page,
+        "has_prev_page": search_result.has_prev_page,
+        "posts": _get_post_list(search_result.article_list),
+    }
+    return PayloadResult(dumps_json(data), _get_listing_keys([tag] if tag else []))
+
+
+@cached_result(Article, timeout=PAYLOAD_CACHE_TIMEOUT)
+def get_posts_by_page_and_tags(
+    page: int, page_size: int, tags: List[str], match_all: bool
+) -> PayloadResult:
+    """Same as get_posts_by_page(), but filtered by posts tagged with all
+    (match_all) or any of the tags.
+    """
     search_result = ArticleOperations.get_article_page_list(
-        page, page_size, tag=tag, prefetch_for_blog=True
+        page, page_size, tags=tags, match_all=match_all
     )
-    posts = [
+
+    data = {
+        "page_num": page,
+        "tags": tags,
+        "match_all": match_all,
+        "has_next_page": search_result.has_next_page,
+        "has_prev_page": search_result.has_prev_page,
+        "posts": _get_post_list(search_result.article_list),
+    }
+    return PayloadResult(dumps_json(data), _get_listing_keys(tags))
+
+
+def _get_listing_keys(tags: Iterable[str]) -> List[str]:
+    return [SURROGATE_KEY_PAGE_LISTING] + [get_tag_key(tag) for tag in tags]
+
+
+def _get_post_list(article_list: Iterable[Article]) -> List[Dict[str, Any]]:
+    # Tag names are read from the article itself, so no query is run per post.
+    return [
         {
             "title": article_entry.title,
             "synonym": article_entry.synonym,
             "timestamp": article_entry.created.strftime(DATE_FORMAT),
-            "tags": [
-                tag_entry.tag_name
-                for tag_entry in TagOperations.get_tags_from_article(article_entry)
-            ],
+            "tags": article_entry.tag_names,
         }
-        for article_entry in search_result.article_list
+        for article_entry in article_list
     ]
 
-    return {
-        "page_num": page,
-        "tag": tag,
-        "has_next_page": search_result.has_next_page,
-        "has_prev_page": search_result.has_prev_page,
-        "posts": posts,
-    }
 
-
-def get_post_data(synonym: str) -> Dict[str, Any]:
+@cached_result(
+    Article, CompiledArticleData, ArticleTag, Tag, timeout=PAYLOAD_CACHE_TIMEOUT
+)
+def get_post_data(synonym: str) -> PayloadResult:
     """ Provide post title, XML based on article alias """
     post_entry = ArticleOperations.get_article_by_synonym(
         synonym, prefetch_for_blog=True
@@ -55,18 +99,27 @@ def get_post_data(synonym: str) -> Dict[str, Any]:
         post_entry
     )
     raw_xml = CompiledArticleDataOperations.get_compiled_data(post_entry).data
-    return {
+    tags = [
+        tag_entry.tag_name
+        for tag_entry in TagOperations.get_tags_from_article(post_entry)
+    ]
+    data = {
         "title": post_entry.title,
         "timestamp": post_entry.created.strftime(DATE_FORMAT),
         "content": raw_xml,
-        "tags": [
-            tag_entry.tag_name
-            for tag_entry in TagOperations.get_tags_from_article(post_entry)
-        ],
+        "tags": tags,
         "synonym_prev": prev_post,
         "synonym_next": next_post,
     }
+    return PayloadResult(
+        dumps_json(data),
+        [get_article_key(post_entry.id)] + [get_tag_key(tag) for tag in tags],
+    )
 
 
-def get_all_tags() -> List[str]:
-    return list(TagOperations.get_all_tags())
+@cached_result(Tag, timeout=PAYLOAD_CACHE_TIMEOUT)
+def get_all_tags() -> PayloadResult:
+    return PayloadResult(
+        dumps_json({"data": list(TagOperations.get_all_tags())}),
+        [SURROGATE_KEY_TAG_LIST],
+    )
@@ -1,8 +1,11 @@
+from os.path import exists
+
+from django.conf import settings
 from django.core.exceptions import ObjectDoesNotExist
 
 from resource_management.models import Image
 from resource_management.model_operations.images import ImageOperations
-from resource_management.utils.images import get_image_full_path
+from resource_management.utils.images import locate_image_file, RenditionCache
 
 __all__ = [
     "get_full_file_path",
@@ -14,4 +17,13 @@ def get_full_file_path(filename: str) -> dict:
     if image_entry.resolution == Image.ImageResolutionType.ORIGINAL:
         raise ObjectDoesNotExist()
 
-    return {"data": get_image_full_path(image_entry)}
+    image_path = locate_image_file(image_entry)
+    # In lazy mode, renditions which were not stored at upload time are
+    # created from the original image on first access.
+    if settings.IMAGE_LAZY_RENDITIONS and not exists(image_path):
+        original_entry = ImageOperations.get_original_image(image_entry)
+        image_path = RenditionCache.from_settings().get_or_create(
+            image_entry, locate_image_file(original_entry)
+        )
+
+    return {"data": image_path}
@@ -0,0 +1,136 @@
+import os
+import shutil
+from os.path import join as path_join
+from time import time
+from typing import Final, NamedTuple, List, Optional, Iterable, final
+from uuid import UUID
+
+from django.conf import settings
+
+from resource_management.model_operations import ImageOperations
+from resource_management.utils.images import TEMP_FILE_PREFIX
+
+__all__ = [
+    "OrphanedImageReport",
+    "collect_orphaned_images",
+]
+
+_DEFAULT_MIN_AGE: Final = 60 * 60
+
+
+@final
+class OrphanedImageReport(NamedTuple):
+    num_scanned: int
+    num_orphaned: int
+    reclaimed_bytes: int
+
+
+@final
+class _ScannedFile(NamedTuple):
+    # None for temporary files left by interrupted writers.
+    uuid_str: Optional[str]
+    path: str
+    dir_entry: os.DirEntry
+
+
+def _is_uuid(s: str) -> bool:
+    try:
+        UUID(s)
+    except ValueError:
+        return False
+    return True
+
+
+def _get_image_dirs() -> List[str]:
+    image_dirs = [settings.OPENED_IMAGE_DIR, settings.PROTECTED_IMAGE_DIR]
+    if settings.RENDITION_CACHE_DIR:
+        image_dirs.append(settings.RENDITION_CACHE_DIR)
+    # The same directory can be assigned to both groups in dev environment.
+    return list(dict.fromkeys(image_dirs))
+
+
+def _scan_image_files(image_dirs: Iterable[str]) -> List[_ScannedFile]:
+    scanned_files = []
+    # Image directories may be sharded into sub-directories.
+    pending_dirs = list(image_dirs)
+    while pending_dirs:
+        with os.scandir(pending_dirs.pop()) as it:
+            for dir_entry in it:
+                is_temp_file = dir_entry.name.startswith(TEMP_FILE_PREFIX)
+                # Other hidden files are locks owned by writers.
+                if dir_entry.name.startswith(".") and not is_temp_file:
+                    continue
+                if dir_entry.is_dir(follow_symlinks=False):
+                    pending_dirs.append(dir_entry.path)
+                    continue
+                if not dir_entry.is_file(follow_symlinks=False):
+                    continue
+                uuid_str = None if is_temp_file else dir_entry.name.split(".", 1)[0]
+                scanned_files.append(_ScannedFile(uuid_str, dir_entry.path, dir_entry))
+
+    return scanned_files
+
+
+def collect_orphaned_images(
+    dry_run: bool = False,
+    quarantine_dir: Optional[str] = None,
+    min_age: float = _DEFAULT_MIN_AGE,
+) -> OrphanedImageReport:
+    """Remove (or move to quarantine_dir) image files which are not referred
+    by any live image entry, including files of soft-deleted entries and
+    temporary files left by interrupted writes.
+
+    Note: Files are scanned before fetching live UUIDs, and image files are
+          always written after their entries are committed. So a file that
+          belongs to an upload running concurrently is never treated as an
+          orphan. Files modified within min_age seconds are skipped anyway
+          as a safety margin.
+    """
+    scanned_files = _scan_image_files(_get_image_dirs())
+    live_uuids = set(ImageOperations.iter_live_image_uuids())
+    age_threshold = time() - min_age
+
+    num_orphaned = 0
+    reclaimed_bytes = 0
+    for scanned_file in scanned_files:
+        if scanned_file.uuid_str is not None:
+            if scanned_file.uuid_str in live_uuids:
+                continue
+            # Leave files not created by this application alone.
+            if not _is_uuid(scanned_file.uuid_str):
+                continue
+        try:
+            file_stat = scanned_file.dir_entry.stat(follow_symlinks=False)
+        except FileNotFoundError:
+            continue
+        if file_stat.st_mtime > age_threshold:
+            continue
+
+        num_orphaned += 1
+        reclaimed_bytes += file_stat.st_size
+        print(
+            "{action:s} orphaned file '{path:s}' ({size:d} bytes).".format(
+                action="Found" if dry_run else "Removing",
+                path=scanned_file.path,
+                size=file_stat.st_size,
+            )
+        )
+        if dry_run:
+            continue
+        try:
+            if quarantine_dir:
+                shutil.move(
+                    scanned_file.path,
+                    path_join(quarantine_dir, scanned_file.dir_entry.name),
+                )
+            else:
+                os.remove(scanned_file.path)
+        except FileNotFoundError:
+            num_orphaned -= 1
+            reclaimed_bytes -= file_stat.st_size
+
+    return OrphanedImageReport(
+        num_scanned=len(scanned_files),
+        num_orphaned=num_orphaned,
+        reclaimed_bytes=reclaimed_bytes,
+    )
@@ -0,0 +1,110 @@
+import os
+from os.path import dirname, join as path_join, samefile
+from time import sleep
+from typing import Final, NamedTuple, Iterator, final
+
+from django.conf import settings
+
+from resource_management.utils.images import get_image_shard_dirs
+
+__all__ = [
+    "ShardMigrationReport",
+    "shard_image_files",
+]
+
+_DEFAULT_BATCH_SIZE: Final = 1000
+
+
+@final
+class ShardMigrationReport(NamedTuple):
+    num_moved: int
+    num_skipped: int
+
+
+def _iter_image_files(root_dir: str, depth: int) -> Iterator[os.DirEntry]:
+    """Yield files placed exactly depth levels below root_dir. Hidden files
+    and directories are ignored.
+    """
+    with os.scandir(root_dir) as it:
+        for dir_entry in it:
+            if dir_entry.name.startswith("."):
+                continue
+            if depth == 0:
+                if dir_entry.is_file(follow_symlinks=False):
+                    yield dir_entry
+            elif dir_entry.is_dir(follow_symlinks=False):
+                yield from _iter_image_files(dir_entry.path, depth - 1)
+
+
+def _move_file(source_path: str, target_path: str) -> bool:
+    """Move file by hard-linking it to the target path first, so the file
+    is reachable through at least one of the paths at any moment.
+    """
+    os.makedirs(dirname(target_path), exist_ok=True)
+    try:
+        os.link(source_path, target_path)
+    except FileExistsError:
+        # A previous run may have stopped right after linking.
+        if not samefile(source_path, target_path):
+            return False
+    os.remove(source_path)
+    return True
+
+
+def shard_image_files(
+    from_depth: int,
+    batch_size: int = _DEFAULT_BATCH_SIZE,
+    pause: float = 0.0,
+    dry_run: bool = False,
+) -> ShardMigrationReport:
+    """Move image files stored with shard depth from_depth to the layout of
+    current IMAGE_SHARD_DEPTH setting.
+
+    Note: Files are moved in batches while the server is running. Set
+          IMAGE_SHARD_PREVIOUS_DEPTH to from_depth until it's finished, so
+          image lookups check both layouts.
+    """
+    to_depth = settings.IMAGE_SHARD_DEPTH
+    num_moved = 0
+    num_skipped = 0
+    for image_dir in dict.fromkeys(
+        (settings.OPENED_IMAGE_DIR, settings.PROTECTED_IMAGE_DIR)
+    ):
+        num_batch_moved = 0
+        for dir_entry in _iter_image_files(image_dir, from_depth):
+            file_name = dir_entry.name
+            # Skip files that do not belong to the source layout.
+            if dir_entry.path != path_join(
+                image_dir, *get_image_shard_dirs(file_name, from_depth), file_name
+            ):
+                continue
+            target_path = path_join(
+                image_dir, *get_image_shard_dirs(file_name, to_depth), file_name
+            )
+            if dry_run:
+                num_moved += 1
+                continue
+
+            try:
+                moved = _move_file(dir_entry.path, target_path)
+            except FileNotFoundError:
+                # Removed by someone else while moving.
+                moved = False
+            if not moved:
+                print(
+                    "Skipped file '{path:s}': '{target_path:s}' exists.".format(
+                        path=dir_entry.path, target_path=target_path
+                    )
+                )
+                num_skipped += 1
+                continue
+
+            num_moved += 1
+            num_batch_moved += 1
+            if num_batch_moved >= batch_size:
+                print("Moved {:d} files so far...".format(num_moved))
+                num_batch_moved = 0
+                if pause:
+                    sleep(pause)
+
+    return ShardMigrationReport(num_moved=num_moved, num_skipped=num_skipped)
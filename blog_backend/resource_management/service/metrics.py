@@ -0,0 +1,101 @@
+""" metrics.py
+
+    Scraping of metrics in Prometheus format. With METRICS_DIR set, each
+    process (web or upload worker) writes its metrics there, and the scrape
+    includes all processes sharing the directory.
+"""
+import os
+from atexit import register as atexit_register
+from threading import Lock
+from typing import Any, Final, Optional
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.base.base import BaseDatabaseWrapper
+from django.db.backends.signals import connection_created
+
+from resource_management.utils.instrumentation import (
+    METRICS,
+    MetricsFlusher,
+    compact_metrics_dir,
+    format_metrics,
+    read_metrics_dir,
+    write_metrics_file,
+)
+
+__all__ = [
+    "METRICS_CONTENT_TYPE",
+    "ensure_metrics_flusher",
+    "record_db_connection_state",
+    "get_metrics_text",
+]
+
+METRICS_CONTENT_TYPE: Final = "text/plain; version=0.0.4; charset=utf-8"
+
+_DB_CONNECTIONS_CREATED: Final = METRICS.counter(
+    "blog_db_connections_created_total",
+    "Database connections opened, by alias.",
+    ["alias"],
+)
+_DB_CONNECTIONS_OPEN: Final = METRICS.gauge(
+    "blog_db_connections_open",
+    "Persistent database connections kept open between requests, by alias.",
+    ["alias"],
+)
+
+
+def _count_connection(connection: BaseDatabaseWrapper, **_: Any) -> None:
+    _DB_CONNECTIONS_CREATED.inc(alias=connection.alias)
+
+
+connection_created.connect(_count_connection, dispatch_uid="metrics:connection")
+
+
+def record_db_connection_state() -> None:
+    """Record whether connections of the current thread are open. Called
+    before requests, when only persistent connections (CONN_MAX_AGE) are.
+    """
+    for alias in connections:
+        _DB_CONNECTIONS_OPEN.set(
+            int(connections[alias].connection is not None), alias=alias
+        )
+
+
+_flusher_lock = Lock()
+_flusher: Optional[MetricsFlusher] = None
+_flusher_pid: Optional[int] = None
+
+
+def _flush_on_exit() -> None:
+    if _flusher is not None and _flusher_pid == os.getpid():
+        _flusher.flush()
+
+
+def ensure_metrics_flusher() -> None:
+    """Start writing metrics of this process to METRICS_DIR, if it isn't
+    started yet. Started lazily, so it's started in each forked worker.
+    """
+    global _flusher, _flusher_pid
+    if not settings.METRICS_DIR or _flusher_pid == os.getpid():
+        return
+
+    with _flusher_lock:
+        if _flusher_pid == os.getpid():
+            return
+        _flusher = MetricsFlusher(
+            METRICS, settings.METRICS_DIR, settings.METRICS_FLUSH_SECONDS
+        )
+        _flusher.start()
+        if _flusher_pid is None:
+            atexit_register(_flush_on_exit)
+        _flusher_pid = os.getpid()
+
+
+def get_metrics_text() -> str:
+    if not settings.METRICS_DIR:
+        return format_metrics(METRICS.dump())
+    # Metrics of this process are written first, so they're up to date.
+    write_metrics_file(METRICS, settings.METRICS_DIR)
+    # Files of exited processes (e.g. recycled workers) don't pile up.
+    compact_metrics_dir(settings.METRICS_DIR)
+    return format_metrics(read_metrics_dir(settings.METRICS_DIR))
@@ -1,7 +1,11 @@
 import os
 import os.path
+from concurrent.futures import Future
 from collections import ItemsView
+from contextlib import ExitStack
+from functools import partial
 from pathlib import Path
+from tempfile import TemporaryDirectory
 from itertools import groupby, chain
 from json import (
     load as json_load,
@@ -21,8 +25,10 @@ from typing import (
     Optional,
     Any,
     Union,
+    Callable,
 )
 
+from django.conf import settings
 from django.core.exceptions import ObjectDoesNotExist
 from django.db import transaction
 from django.db.models.query import QuerySet
@@ -47,25 +53,78 @@ from resource_management.model_operations import (
     TagOperations,
     ArticleTagOperations,
     ImageOperations,
+    advisory_lock,
+    LOCK_NAMESPACE_ARTICLE,
+    publish_invalidation,
 )
+from resource_management.routers import primary_reads
 
 from resource_management.utils.images import (
-    resize_image,
+    plan_renditions,
+    plan_renditions_by_size,
+    create_placeholder,
+    load_placeholder,
     image_compare,
-    save_image,
     get_image_full_path,
+    locate_image_file,
+    ImageWriteBatch,
+    RenditionPool,
+    RenditionCheckpoint,
+    get_digest,
+    CheckpointedImage,
+    ResizedImage,
 )
 
+from resource_management.service.surrogate_keys import queue_article_purge
 from resource_management.utils.articles import DocumentPatchCreator, PatchResult
+from resource_management.utils.instrumentation import get_tracer, traced
 
 from bs4 import BeautifulSoup
 from bs4.element import ResultSet  # Typing
-from PIL import Image as PILImage
 
 __all__ = [
     "PostUpdateHandler",
+    "StageCallback",
+    "STAGE_READ_ARCHIVE",
+    "STAGE_VALIDATE",
+    "STAGE_COMPARE",
+    "STAGE_PROCESS_IMAGES",
+    "STAGE_WRITE_DB",
+    "STAGE_SAVE_IMAGES",
+    "SPAN_WAIT_LOCK",
+    "SPAN_PARSE_XML",
+    "SPAN_DIFF_DOCUMENT",
+    "SPAN_COMPARE_IMAGES",
+    "SPAN_RENDER_XML",
+    "COUNTER_ARCHIVE_BYTES",
+    "COUNTER_PIXELS_PROCESSED",
+    "COUNTER_BYTES_WRITTEN",
+    "COUNTER_FILES_WRITTEN",
 ]
 
+# Upload stages reported to the optional stage callback
+STAGE_READ_ARCHIVE: Final = "read_archive"
+STAGE_VALIDATE: Final = "validate"
+STAGE_COMPARE: Final = "compare"
+STAGE_PROCESS_IMAGES: Final = "process_images"
+STAGE_WRITE_DB: Final = "write_db"
+STAGE_SAVE_IMAGES: Final = "save_images"
+
+StageCallback = Callable[[str], None]
+
+# Instrumentation spans (stages above are recorded as spans as well) and
+# counters, see utils.instrumentation.
+SPAN_UPLOAD_ARTICLE: Final = "upload_article"
+SPAN_WAIT_LOCK: Final = "wait_lock"
+SPAN_PARSE_XML: Final = "parse_xml"
+SPAN_DIFF_DOCUMENT: Final = "diff_document"
+SPAN_COMPARE_IMAGES: Final = "compare_images"
+SPAN_RENDER_XML: Final = "render_xml"
+COUNTER_ARCHIVE_BYTES: Final = "archive_bytes"
+COUNTER_PIXELS_PROCESSED: Final = "pixels_processed"
+COUNTER_BYTES_WRITTEN: Final = "bytes_written"
+COUNTER_FILES_WRITTEN: Final = "files_written"
+
 
 # CONSTANTS
 _META_FILENAME: Final = "meta.json"
@@ -82,6 +141,9 @@ _HTML_IMAGE_TAG: Final = "img"
 _HTML_IMAGE_CLASS_ATTR: Final = "class"
 _HTML_IMAGE_ALIAS_ATTR: Final = "alias"
 _HTML_IMAGE_SRC_ATTR: Final = "src"
+_HTML_IMAGE_DATA_SRC_ATTR: Final = "data-src"
+_HTML_IMAGE_WIDTH_ATTR: Final = "width"
+_HTML_IMAGE_HEIGHT_ATTR: Final = "height"
 _HTML_IMAGE_SRCSET_ATTR: Final = "data-srcset"
 _HTML_LAZYLOAD_SIZE_ATTR: Final = "data-sizes"
 
@@ -109,16 +171,88 @@ class ValidatedDocument(NamedTuple):
     image_tags: ResultSet
 
 
+@final
+class _RenditionSet(NamedTuple):
+    """ Renditions of a source image, wherever they were produced. """
+
+    original_size: Tuple[int, int]
+    placeholder: str
+    # (resolution, size, path of encoded file)
+    renditions: List[Tuple[int, Tuple[int, int], str]]
+    # Existing file identical to the original, linked instead of copied
+    original_path: Optional[str] = None
+
+
 @final
 class PostUpdateHandler(object):
     @classmethod
+    @traced(SPAN_UPLOAD_ARTICLE)
     def upload_article(
-        cls, bundle: str, doc_synonym: str, create_only: bool = False
+        cls,
+        bundle: str,
+        doc_synonym: str,
+        create_only: bool = False,
+        stage_callback: Optional[StageCallback] = None,
+        force: bool = False,
+        wait_for_lock: bool = True,
+    ) -> None:
+        """Create or update the article from the bundle.
+
+        Uploads of the same synonym are serialized with an advisory lock,
+        from reading the current article to writing the last image file.
+        When wait_for_lock is False, LockNotAcquiredError is raised if
+        another upload of the synonym is running. Everything is read from the
+        primary database, even if replica reads are enabled by the caller.
+        """
+        with primary_reads(), ExitStack() as lock_stack:
+            with get_tracer().span(SPAN_WAIT_LOCK):
+                lock_stack.enter_context(
+                    advisory_lock(LOCK_NAMESPACE_ARTICLE, doc_synonym, wait_for_lock)
+                )
+            cls._upload_article(bundle, doc_synonym, create_only, stage_callback, force)
+
+    @classmethod
+    def _upload_article(
+        cls,
+        bundle: str,
+        doc_synonym: str,
+        create_only: bool,
+        stage_callback: Optional[StageCallback],
+        force: bool,
     ) -> None:
         print("Reading target archive file...")
-        with tarfile.open(bundle, "r:gz") as archive:
+        cls._report_stage(stage_callback, STAGE_READ_ARCHIVE)
+        tracer = get_tracer()
+        with tracer.span(STAGE_READ_ARCHIVE):
+            bundle_digest = cls._get_bundle_digest(bundle)
+            # Identical bundle has nothing to update, so it's skipped before
+            # any parsing or image I/O.
+            if not (create_only or force):
+                target_article = ArticleOperations.get_uploaded_article(
+                    doc_synonym, bundle_digest
+                )
+                if target_article:
+                    print(
+                        "Bundle of '{synonym:s}' (version {version:s}) is already "
+                        "uploaded. Nothing to update.".format(
+                            synonym=doc_synonym,
+                            version=target_article.bundle_version or "unknown",
+                        )
+                    )
+                    return
+            archive = tarfile.open(bundle, "r:gz")
+            checkpoint = RenditionCheckpoint.from_settings(bundle_digest)
+        with archive, ExitStack() as scratch_stack:
+            if checkpoint is None and not settings.IMAGE_LAZY_RENDITIONS:
+                # Renditions are still encoded into files as soon as they're
+                # resized, so decoded buffers aren't held until images are saved.
+                checkpoint = RenditionCheckpoint(
+                    scratch_stack.enter_context(TemporaryDirectory()), bundle_digest
+                )
+            tracer.add(COUNTER_ARCHIVE_BYTES, os.path.getsize(bundle))
             # Step 1: Validate archive and create parsed data (JSON, XML, ...)
             print("Validating archive...")
+            cls._report_stage(stage_callback, STAGE_VALIDATE)
             validated_doc = cls._validate_archive(archive)
             # Step 2: Is this a new article, or existing one?
             update_flag = True
@@ -141,13 +275,41 @@ class PostUpdateHandler(object):
                     "Synonym '{synonym:s}' has been registered. "
                     "Try to update existing entry...".format(synonym=doc_synonym)
                 )
-                cls._update_article(target_article, validated_doc, archive)
+                cls._update_article(
+                    target_article,
+                    validated_doc,
+                    archive,
+                    bundle_digest,
+                    stage_callback,
+                    checkpoint,
+                )
             else:
                 print(
                     "Synonym '{synonym:s}' has not been registered. "
                     "Start creating new article entry...".format(synonym=doc_synonym)
                 )
-                cls._create_article(doc_synonym, validated_doc, archive)
+                cls._create_article(
+                    doc_synonym,
+                    validated_doc,
+                    archive,
+                    bundle_digest,
+                    stage_callback,
+                    checkpoint,
+                )
+
+        # Renditions are kept for retries only when the upload failed.
+        if checkpoint:
+            checkpoint.clear()
+
+    @staticmethod
+    def _get_bundle_digest(bundle: str) -> str:
+        with open(bundle, "rb") as fd_r:
+            return get_digest(fd_r)
+
+    @staticmethod
+    def _report_stage(stage_callback: Optional[StageCallback], stage: str) -> None:
+        if stage_callback:
+            stage_callback(stage)
 
     @classmethod
     def _extractfile(cls, archive: TarFile, file_info: TarInfo) -> IO[bytes]:
@@ -171,6 +333,7 @@ class PostUpdateHandler(object):
             return r_stream.read().decode("utf-8")
 
     @classmethod
+    @traced(SPAN_PARSE_XML)
     def _get_parsed_xml_document(cls, archive: TarFile) -> BeautifulSoup:
         file_info = archive.getmember(_COMPILED_DOC_FILENAME)
         with cls._extractfile(archive, file_info) as r_stream:
@@ -181,6 +344,7 @@ class PostUpdateHandler(object):
         return archive.getmember("/".join([_IMG_SOURCE_PATH, img_name]))
 
     @classmethod
+    @traced(STAGE_VALIDATE)
     def _validate_archive(cls, archive: TarFile) -> ValidatedDocument:
         # Step 1: Make sure the archive meets all basic requirements
         meta = cls._get_parsed_meta(archive)
@@ -208,8 +372,15 @@ class PostUpdateHandler(object):
 
     @classmethod
     def _update_article(
-        cls, target_article: Article, validated_doc: ValidatedDocument, archive: TarFile
+        cls,
+        target_article: Article,
+        validated_doc: ValidatedDocument,
+        archive: TarFile,
+        bundle_digest: str,
+        stage_callback: Optional[StageCallback] = None,
+        checkpoint: Optional[RenditionCheckpoint] = None,
     ) -> None:
+        cls._report_stage(stage_callback, STAGE_COMPARE)
         # Most of the uninitialized data here are used as indicator of
         # article update.
         original_title: Optional[str] = None
@@ -217,7 +388,7 @@ class PostUpdateHandler(object):
         edit_patches: Optional[PatchResult] = None
         edit_history_entry: Optional[ArticleEditHistory] = None
         created_image_entries: Optional[List[Image]] = None
-        created_image_buffers: Optional[List[PILImage.Image]] = None
+        created_image_files: Optional[List[Optional[str]]] = None
 
         # Update Article entry as needed (title)
         if target_article.title != validated_doc.title:
@@ -233,9 +404,10 @@ class PostUpdateHandler(object):
         raw_document = RawArticleDataOperations.get_raw_data(target_article)
         if raw_document.data != validated_doc.raw_document:
             print("Detect modification on raw Markdown file. Creating patch...")
-            edit_patches = DocumentPatchCreator().create_patch_files(
-                validated_doc.raw_document, validated_doc.raw_document
-            )
+            with get_tracer().span(SPAN_DIFF_DOCUMENT):
+                edit_patches = DocumentPatchCreator().create_patch_files(
+                    validated_doc.raw_document, validated_doc.raw_document
+                )
             raw_document.data = validated_doc.raw_document
         if raw_document.version != validated_doc.version:
             print(
@@ -263,23 +435,31 @@ class PostUpdateHandler(object):
 
         # Scan through original images to sort out groups require removal or renewal
         original_image_entries = ImageOperations.get_original_images(target_article)
-        for entry in original_image_entries:
-            if entry.alias in updated_images:
-                updated_image_info = validated_doc.image_info[entry.alias]
-                original_image_path = get_image_full_path(entry)
-                with cls._extractfile(
-                    archive, updated_image_info
-                ) as updated_image_stream:
-                    if not image_compare(updated_image_stream, original_image_path):
-                        renewed_images.add(entry.alias)
-                        print(
-                            "Detect image changed: {alias:s}".format(alias=entry.alias)
-                        )
-                    else:
-                        updated_images.remove(entry.alias)
-            else:
-                removed_images.add(entry.alias)
-                print("Detect image removed: {alias:s}".format(alias=entry.alias))
+        with get_tracer().span(SPAN_COMPARE_IMAGES):
+            for entry in original_image_entries:
+                if entry.alias in updated_images:
+                    updated_image_info = validated_doc.image_info[entry.alias]
+                    original_image_path = locate_image_file(entry)
+                    with cls._extractfile(
+                        archive, updated_image_info
+                    ) as updated_image_stream:
+                        # Files can be missing if writing them failed in a
+                        # previous upload.
+                        if not (
+                            os.path.exists(original_image_path)
+                            and image_compare(updated_image_stream, original_image_path)
+                        ):
+                            renewed_images.add(entry.alias)
+                            print(
+                                "Detect image changed: {alias:s}".format(
+                                    alias=entry.alias
+                                )
+                            )
+                        else:
+                            updated_images.remove(entry.alias)
+                else:
+                    removed_images.add(entry.alias)
+                    print("Detect image removed: {alias:s}".format(alias=entry.alias))
 
         created_images = updated_images - removed_images  # New + Renewed
         deleted_images = removed_images | renewed_images  # Removed + Renewed
@@ -291,13 +471,26 @@ class PostUpdateHandler(object):
             .exclude(alias__in=(created_images | deleted_images))
             .order_by("alias", "resolution")
         )
+        # Images uploaded before placeholders were introduced don't have one.
+        backfilled_image_entries: List[Image] = []
+        for entry in kept_image_entries.filter(
+            resolution=Image.ImageResolutionType.ORIGINAL, placeholder__isnull=True
+        ):
+            print("Create missing placeholder: {alias:s}".format(alias=entry.alias))
+            with cls._extractfile(
+                archive, validated_doc.image_info[entry.alias]
+            ) as image_stream:
+                entry.placeholder = load_placeholder(image_stream)
+            backfilled_image_entries.append(entry)
 
         if created_images:
-            created_image_entries, created_image_buffers = cls._create_image_data(
+            cls._report_stage(stage_callback, STAGE_PROCESS_IMAGES)
+            created_image_entries, created_image_files = cls._create_image_data(
                 target_article,
                 validated_doc.image_info,
                 archive,
                 filter_list=created_images,
+                checkpoint=checkpoint,
             )
 
         # We need to update the compiled document when meeting one of the conditions:
@@ -305,8 +498,15 @@ class PostUpdateHandler(object):
         # 2. Change on raw Markdown document
         # 3. New image entry created (adding new alias, or file update on existing ones)
         # 4. Removal of existing image
+        # 5. Placeholder created for existing image
         compiled_document: Optional[CompiledArticleData] = None
-        if original_version or edit_patches or created_images or removed_images:
+        if (
+            original_version
+            or edit_patches
+            or created_images
+            or removed_images
+            or backfilled_image_entries
+        ):
             compiled_document = CompiledArticleDataOperations.get_compiled_data(
                 target_article
             )
@@ -339,7 +539,7 @@ class PostUpdateHandler(object):
             original_title  # Article
             or (edit_patches or original_version)  # Raw Data
             or (removed_tags or created_tags)  # Tags
-            or (created_images or removed_images)  # Images
+            or (created_images or removed_images or backfilled_image_entries)  # Images
         ):
             article_updated = target_article
 
@@ -349,6 +549,7 @@ class PostUpdateHandler(object):
 
         write_success_flag: bool = False
         try:
+            cls._report_stage(stage_callback, STAGE_WRITE_DB)
             created_image_entries, update_flag = cls._run_write_operations(
                 article_updated,
                 validated_doc,
@@ -359,11 +560,13 @@ class PostUpdateHandler(object):
                 article_tags_deleted=removed_tag_relations,
                 images_created=created_image_entries,
                 images_kept=kept_image_entries,
+                images_backfilled=backfilled_image_entries,
                 images_deleted=removed_image_entries,
             )
-            if created_image_entries and created_image_buffers:
+            if created_image_entries and created_image_files:
+                cls._report_stage(stage_callback, STAGE_SAVE_IMAGES)
                 cls._save_images(
-                    created_image_buffers,
+                    created_image_files,
                     created_image_entries,
                     validated_doc.image_info,
                     archive,
@@ -375,14 +578,22 @@ class PostUpdateHandler(object):
             if not write_success_flag:
                 cls._error_cleanup(created_image_entries)
 
+        # Record the bundle, so uploading it again can be skipped
+        ArticleOperations.set_uploaded_bundle(
+            target_article, bundle_digest, validated_doc.version
+        )
+
     @classmethod
     def _create_article(
-        cls, doc_synonym: str, validated_doc: ValidatedDocument, archive: TarFile
+        cls,
+        doc_synonym: str,
+        validated_doc: ValidatedDocument,
+        archive: TarFile,
+        bundle_digest: str,
+        stage_callback: Optional[StageCallback] = None,
+        checkpoint: Optional[RenditionCheckpoint] = None,
     ) -> None:
-        article = Article(
-            synonym=doc_synonym,
-            title=validated_doc.title,
-        )
+        article = Article(synonym=doc_synonym, title=validated_doc.title)
         raw_data = RawArticleData(
             article=article,
             version=validated_doc.version,
@@ -395,13 +606,15 @@ class PostUpdateHandler(object):
                 num_images=len(validated_doc.image_info)
             )
         )
-        image_entries, image_buffers = cls._create_image_data(
-            article, validated_doc.image_info, archive
+        cls._report_stage(stage_callback, STAGE_PROCESS_IMAGES)
+        image_entries, image_files = cls._create_image_data(
+            article, validated_doc.image_info, archive, checkpoint=checkpoint
         )
 
         write_success_flag: bool = False
         try:
             print("Handling DB write operations...")
+            cls._report_stage(stage_callback, STAGE_WRITE_DB)
             updated_image_entries, update_flag = cls._run_write_operations(
                 article,
                 validated_doc,
@@ -411,11 +624,12 @@ class PostUpdateHandler(object):
             )
             print("Done with writing to the DB.")
             print("Handling image saving...")
+            cls._report_stage(stage_callback, STAGE_SAVE_IMAGES)
             # Logic here is to ensure mypy we're using non-None input on
             # buffers and entries
-            if image_buffers and updated_image_entries:
+            if image_files and updated_image_entries:
                 num_saved_images = cls._save_images(
-                    image_buffers,
+                    image_files,
                     updated_image_entries,
                     validated_doc.image_info,
                     archive,
@@ -431,7 +645,13 @@ class PostUpdateHandler(object):
                 print("Error happened during writing process. Running cleanup...")
                 cls._error_cleanup(image_entries)
 
+        # Record the bundle, so uploading it again can be skipped
+        ArticleOperations.set_uploaded_bundle(
+            article, bundle_digest, validated_doc.version
+        )
+
     @classmethod
+    @traced(SPAN_RENDER_XML)
     @transaction.atomic
     def _process_compiled_data(
         cls,
@@ -448,6 +668,7 @@ class PostUpdateHandler(object):
         compiled_entry.save()
 
     @classmethod
+    @traced(STAGE_WRITE_DB)
     @transaction.atomic
     def _run_write_operations(
         cls,
@@ -459,6 +680,7 @@ class PostUpdateHandler(object):
         tags_updated: Optional[Iterable[str]] = None,
         article_tags_deleted: Optional[QuerySet[ArticleTag]] = None,
         images_kept: Optional[SafeDeleteQueryset[Image]] = None,
+        images_backfilled: Optional[List[Image]] = None,
         images_created: Optional[List[Image]] = None,
         images_deleted: Optional[SafeDeleteQueryset[Image]] = None,
     ) -> Tuple[Optional[List[Image]], bool]:
@@ -473,6 +695,9 @@ class PostUpdateHandler(object):
         # We need this flag to identify raw data, compiled data, and
         # article-tag relations are created or updated
         is_new_article = target_article.id is None
+        previous_tag_names = list(target_article.tag_names)
+        if tags_updated is not None:
+            target_article.tag_names = sorted(set(tags_updated))
         target_article.save()
 
         if raw_data_updated:
@@ -514,6 +739,9 @@ class PostUpdateHandler(object):
                 image_entry.article = target_article
             images_created = ImageOperations.bulk_create(images_created)
 
+        if images_backfilled:
+            ImageOperations.bulk_update(images_backfilled, ["placeholder"])
+
         # Image data's ready. Modify converted XML then dump to DB entry as needed.
         if is_new_article or compiled_data_updated:
             print("Need to create or update compiled XML. Processing...")
@@ -528,54 +756,100 @@ class PostUpdateHandler(object):
                 validated_doc,
             )
 
+        # Tell web workers of every node to drop cached results, once this
+        # transaction is committed.
+        publish_invalidation(
+            (
+                Article,
+                RawArticleData,
+                ArticleEditHistory,
+                CompiledArticleData,
+                Tag,
+                ArticleTag,
+                Image,
+            ),
+            synonym=target_article.synonym,
+            tags=target_article.tag_names,
+        )
+        # Tag listings the article left need to be purged as well.
+        queue_article_purge(
+            target_article,
+            set(previous_tag_names) | set(target_article.tag_names),
+            is_new_article,
+        )
+
         return images_created, True
 
     @classmethod
+    @traced(STAGE_SAVE_IMAGES)
     def _save_images(
         cls,
-        image_buffers: List[PILImage.Image],
+        image_files: List[Optional[str]],
         image_entries: List[Image],
         image_info: Dict[str, TarInfo],
         archive: TarFile,
     ) -> int:
-        for image_buffer, image_entry in zip(image_buffers, image_entries):
-            # To copy the original file, we need to stream data from archive
-            # instead of copying from PIL.Image buffer.
-            if image_entry.resolution == Image.ImageResolutionType.ORIGINAL:
-                with cls._extractfile(
-                    archive, image_info[image_entry.alias]
-                ) as image_stream:
-                    save_image(image_entry, img_stream=image_stream)
+        # Files are staged as temporary files first, and published together
+        # only after all of them are written.
+        with ImageWriteBatch() as write_batch:
+            for image_file, image_entry in zip(image_files, image_entries):
+                if image_file is not None:
+                    write_batch.save_file(image_entry, image_file)
+                # Original file is copied from archive, unless an identical
+                # one can be linked.
+                elif image_entry.resolution == Image.ImageResolutionType.ORIGINAL:
+                    with cls._extractfile(
+                        archive, image_info[image_entry.alias]
+                    ) as image_stream:
+                        saved_info = write_batch.save_stream(image_entry, image_stream)
                     print(
-                        "Original image '{file_name:s}'({alias:s}) saved.".format(
+                        "Original image '{file_name:s}'({alias:s}) written "
+                        "({size:d} bytes, sha256: {digest:s}).".format(
                             file_name=image_entry.file_name,
                             alias=image_entry.alias,
+                            size=saved_info.bytes_written,
+                            digest=saved_info.sha256,
                         )
                     )
-            else:
-                save_image(image_entry, image_buffer)
+                # Otherwise it's a lazy rendition, which will be created on first access.
+
+            staged_images = write_batch.publish()
+
+        tracer = get_tracer()
+        for staged_image in staged_images:
+            tracer.add(COUNTER_FILES_WRITTEN)
+            tracer.add(COUNTER_BYTES_WRITTEN, staged_image.info.bytes_written)
+            if staged_image.entry.resolution != Image.ImageResolutionType.ORIGINAL:
                 print(
                     "Resized image '{file_name:s}({alias:s}/{resolution:s})' saved.".format(
-                        file_name=image_entry.file_name,
-                        alias=image_entry.alias,
+                        file_name=staged_image.entry.file_name,
+                        alias=staged_image.entry.alias,
                         resolution=Image.ImageResolutionType(
-                            image_entry.resolution
+                            staged_image.entry.resolution
                         ).name,
                     )
                 )
 
-        return len(image_entries)
+        return len(staged_images)
 
     @classmethod
+    @traced(STAGE_PROCESS_IMAGES)
     def _create_image_data(
         cls,
         article: Optional[Article],
         image_info: Dict[str, TarInfo],
         archive: TarFile,
         filter_list: Optional[Iterable[str]] = None,
-    ) -> Tuple[List[Image], List[PILImage.Image]]:
+        checkpoint: Optional[RenditionCheckpoint] = None,
+    ) -> Tuple[List[Image], List[Optional[str]]]:
+        """Create image entries, and files to be saved for them (None for the
+        original and lazy renditions). Checkpoint is required unless lazy
+        rendition mode is enabled.
+        """
+        if checkpoint is None and not settings.IMAGE_LAZY_RENDITIONS:
+            raise ValueError("Checkpoint is required to create renditions.")
         image_entries = []
-        image_buffers = []
+        image_files: List[Optional[str]] = []
 
         image_info_iter: Union[
             Iterable[Tuple[str, TarInfo]], ItemsView[str, TarInfo]
@@ -587,22 +861,199 @@ class PostUpdateHandler(object):
                 if (alias in filter_list)
             )
 
-        for alias, file_info in image_info_iter:
-            resize_data = resize_image(cls._extractfile(archive, file_info)).items()
-            for resolution, image_buffer in resize_data:
+        # (alias, extension, source digest, job, reused without resizing)
+        resize_jobs: List[Tuple[str, str, str, "Future[Any]", bool]] = []
+        with RenditionPool() as rendition_pool:
+            for alias, file_info in image_info_iter:
+                extension = os.path.splitext(file_info.name)[1].replace(".", "")
+                if settings.IMAGE_LAZY_RENDITIONS:
+                    # Only the original gets stored. Entries for other resolutions
+                    # are still created since srcset requires their widths.
+                    with cls._extractfile(archive, file_info) as image_stream:
+                        rendition_sizes = plan_renditions(image_stream).items()
+                    with cls._extractfile(archive, file_info) as image_stream:
+                        placeholder = load_placeholder(image_stream)
+                    with cls._extractfile(archive, file_info) as image_stream:
+                        source_digest = get_digest(image_stream)
+                    for resolution, (width, height) in rendition_sizes:
+                        image_entries.append(
+                            Image(
+                                article=article,
+                                alias=alias,
+                                extension=extension,
+                                resolution=resolution,
+                                width=width,
+                                height=height,
+                                placeholder=(
+                                    placeholder
+                                    if resolution == Image.ImageResolutionType.ORIGINAL
+                                    else None
+                                ),
+                                source_digest=source_digest,
+                            )
+                        )
+                        image_files.append(None)
+                    continue
+
+                with cls._extractfile(archive, file_info) as image_stream:
+                    source_digest = get_digest(image_stream)
+                reused_image: Any = cls._find_reusable_renditions(
+                    source_digest, extension
+                )
+                if reused_image:
+                    print(
+                        "Reuse renditions of identical image: {alias:s}".format(
+                            alias=alias
+                        )
+                    )
+                elif checkpoint:
+                    # Renditions stored by a previous attempt are reused.
+                    reused_image = checkpoint.load(source_digest)
+                    if reused_image:
+                        print(
+                            "Reuse checkpointed renditions of image: {alias:s}".format(
+                                alias=alias
+                            )
+                        )
+
+                if reused_image:
+                    resize_job: "Future[Any]" = Future()
+                    resize_job.set_result(reused_image)
+                else:
+                    # Renditions are encoded into the checkpoint by the pool,
+                    # so decoded buffers are dropped as soon as they're resized.
+                    resize_job = rendition_pool.submit(
+                        partial(cls._extractfile, archive, file_info),
+                        file_info.size,
+                        partial(
+                            cls._store_checkpoint, checkpoint, source_digest, extension
+                        ),
+                    )
+                resize_jobs.append(
+                    (alias, extension, source_digest, resize_job, bool(reused_image))
+                )
+
+            for alias, extension, source_digest, resize_job, reused in resize_jobs:
+                result: Union[CheckpointedImage, _RenditionSet] = resize_job.result()
+                if not reused:
+                    get_tracer().add(
+                        COUNTER_PIXELS_PROCESSED,
+                        result.original_size[0] * result.original_size[1],
+                    )
+                rendition_set = cls._get_rendition_set(result)
                 image_entries.append(
                     Image(
                         article=article,
                         alias=alias,
-                        extension=os.path.splitext(file_info.name)[1].replace(".", ""),
-                        resolution=resolution,
-                        width=image_buffer.size[0],
-                        height=image_buffer.size[1],
+                        extension=extension,
+                        resolution=Image.ImageResolutionType.ORIGINAL,
+                        width=rendition_set.original_size[0],
+                        height=rendition_set.original_size[1],
+                        placeholder=rendition_set.placeholder,
+                        source_digest=source_digest,
                     )
                 )
-                image_buffers.append(image_buffer)
+                # Original file is copied from archive, unless an identical
+                # one can be linked.
+                image_files.append(rendition_set.original_path)
+                for (
+                    resolution,
+                    (width, height),
+                    image_file,
+                ) in rendition_set.renditions:
+                    image_entries.append(
+                        Image(
+                            article=article,
+                            alias=alias,
+                            extension=extension,
+                            resolution=resolution,
+                            width=width,
+                            height=height,
+                            source_digest=source_digest,
+                        )
+                    )
+                    image_files.append(image_file)
+
+        return image_entries, image_files
+
+    @classmethod
+    def _find_reusable_renditions(
+        cls, source_digest: str, extension: str
+    ) -> Optional[_RenditionSet]:
+        """Look up existing images of an identical source, e.g. after its
+        alias is renamed or it's moved to another article. They're reused
+        only if every rendition planned for the source has a stored file.
+        """
+        entries: Dict[int, Image] = {}
+        for entry in ImageOperations.get_images_by_source_digest(
+            source_digest, extension
+        ):
+            entries.setdefault(entry.resolution, entry)
+        original_entry = entries.get(Image.ImageResolutionType.ORIGINAL)
+        if not (original_entry and original_entry.placeholder and original_entry.width):
+            return None
+
+        original_size = (original_entry.width, original_entry.height)
+        file_paths: Dict[int, str] = {}
+        for resolution, size in plan_renditions_by_size(original_size).items():
+            entry = entries.get(resolution)
+            if entry is None or (entry.width, entry.height) != size:
+                return None
+            file_paths[resolution] = locate_image_file(entry)
+            if not os.path.exists(file_paths[resolution]):
+                return None
+
+        original_path = file_paths.pop(Image.ImageResolutionType.ORIGINAL)
+        return _RenditionSet(
+            original_size=original_size,
+            placeholder=original_entry.placeholder,
+            renditions=[
+                (
+                    resolution,
+                    (entries[resolution].width, entries[resolution].height),
+                    path,
+                )
+                for resolution, path in file_paths.items()
+            ],
+            original_path=original_path,
+        )
 
-        return image_entries, image_buffers
+    @staticmethod
+    def _get_rendition_set(
+        result: Union[CheckpointedImage, _RenditionSet]
+    ) -> _RenditionSet:
+        if isinstance(result, _RenditionSet):
+            return result
+        return _RenditionSet(
+            original_size=result.original_size,
+            placeholder=result.placeholder,
+            renditions=[
+                (resolution, rendition.size, rendition.path)
+                for resolution, rendition in result.renditions.items()
+            ],
+        )
+
+    @staticmethod
+    def _create_placeholder(resized_image: ResizedImage) -> str:
+        # LOW rendition is always available, and much cheaper to shrink.
+        return create_placeholder(
+            resized_image.renditions[Image.ImageResolutionType.LOW]
+        )
+
+    @classmethod
+    def _store_checkpoint(
+        cls,
+        checkpoint: RenditionCheckpoint,
+        image_digest: str,
+        extension: str,
+        resized_image: ResizedImage,
+    ) -> CheckpointedImage:
+        return checkpoint.store(
+            image_digest,
+            extension,
+            resized_image,
+            cls._create_placeholder(resized_image),
+        )
 
     @staticmethod
     def _convert_article_xml(
@@ -631,6 +1082,9 @@ class PostUpdateHandler(object):
               options will be ordered by image resolution (width).
               As for responsive options, we'll let lazyload library help making the
               decision at the frontend (with 'auto' option on 'data-sizes' attribute).
+              When a placeholder is available, it's used as 'src' and the LOW
+              resolution is moved to 'data-src'. Intrinsic size of the original
+              image is set to 'width' and 'height' to reserve the layout.
         """
         alias_imgattr_mapping: Dict[str, Dict[str, str]] = {}
         for alias, entries in groupby(entry_list, cls._image_entry_grouping_by_alias):
@@ -642,8 +1096,18 @@ class PostUpdateHandler(object):
                 _HTML_LAZYLOAD_SIZE_ATTR: _LAZYLOAD_SIZE_AUTO,
             }
             srcset_tokens = []
+            placeholder: Optional[str] = None
             for entry in entries:
-                if entry.resolution != Image.ImageResolutionType.ORIGINAL:
+                if entry.resolution == Image.ImageResolutionType.ORIGINAL:
+                    placeholder = entry.placeholder
+                    if entry.width and entry.height:
+                        alias_imgattr_mapping[alias][_HTML_IMAGE_WIDTH_ATTR] = str(
+                            entry.width
+                        )
+                        alias_imgattr_mapping[alias][_HTML_IMAGE_HEIGHT_ATTR] = str(
+                            entry.height
+                        )
+                else:
                     if entry.resolution == Image.ImageResolutionType.LOW:
                         alias_imgattr_mapping[alias][
                             _HTML_IMAGE_SRC_ATTR
@@ -656,6 +1120,11 @@ class PostUpdateHandler(object):
             alias_imgattr_mapping[alias][_HTML_IMAGE_SRCSET_ATTR] = ",".join(
                 srcset_tokens
             )
+            if placeholder:
+                alias_imgattr_mapping[alias][
+                    _HTML_IMAGE_DATA_SRC_ATTR
+                ] = alias_imgattr_mapping[alias][_HTML_IMAGE_SRC_ATTR]
+                alias_imgattr_mapping[alias][_HTML_IMAGE_SRC_ATTR] = placeholder
 
         return alias_imgattr_mapping
 
@@ -0,0 +1,99 @@
+""" surrogate_keys.py
+
+    Surrogate keys (a.k.a. cache tags) name the data a response depends on,
+    so CDN can keep responses for long, and purge only the ones of changed
+    data after each upload.
+"""
+from typing import final, Final, Callable, Iterable, List, NamedTuple
+from urllib.parse import quote
+
+from django.conf import settings
+from django.db import transaction
+
+from resource_management.models import Article, SurrogateKeyPurge
+from resource_management.model_operations import (
+    ArticleOperations,
+    SurrogateKeyPurgeOperations,
+)
+
+__all__ = [
+    "PayloadResult",
+    "SURROGATE_KEY_PAGE_LISTING",
+    "SURROGATE_KEY_TAG_LIST",
+    "get_article_key",
+    "get_tag_key",
+    "queue_article_purge",
+    "drain_purge_outbox",
+]
+
+# Responses of all page listings, with or without tag filters
+SURROGATE_KEY_PAGE_LISTING: Final = "page-listing"
+SURROGATE_KEY_TAG_LIST: Final = "tag-list"
+
+
+@final
+class PayloadResult(NamedTuple):
+    # Serialized JSON payload, so cached results are served without encoding.
+    content: bytes
+    surrogate_keys: List[str]
+
+
+def get_article_key(article_id: int) -> str:
+    return "article-{0:d}".format(article_id)
+
+
+def get_tag_key(tag_name: str) -> str:
+    # Keys are separated by spaces (Surrogate-Key) or commas (Cache-Tag).
+    return "tag-" + quote(tag_name, safe="")
+
+
+def queue_article_purge(
+    article: Article, tag_names: Iterable[str], is_new_article: bool
+) -> None:
+    """Queue purges of responses depending on the uploaded article, in the
+    current transaction. Tags the article had before the upload should be
+    included in tag_names too.
+    """
+    if not settings.SURROGATE_KEY_PURGE_ENABLED:
+        return
+
+    surrogate_keys = [
+        get_article_key(article.id),
+        SURROGATE_KEY_PAGE_LISTING,
+        SURROGATE_KEY_TAG_LIST,
+    ]
+    surrogate_keys.extend(get_tag_key(tag_name) for tag_name in sorted(tag_names))
+    # Previous and next posts of a new article now link to it.
+    if is_new_article:
+        surrogate_keys.extend(
+            get_article_key(article_id)
+            for article_id in ArticleOperations.get_prev_and_next_article_ids(article)
+            if article_id is not None
+        )
+    SurrogateKeyPurgeOperations.create(
+        synonym=article.synonym, surrogate_keys=surrogate_keys
+    )
+
+
+def drain_purge_outbox(
+    purge: Callable[[List[str]], None], batch_size: int = 100
+) -> int:
+    """Purge keys of the oldest queued purges (at most batch_size) with the
+    given function, and remove them from the outbox. They're kept queued if
+    the function raises.
+
+    Return the number of purges done.
+    """
+    with transaction.atomic():
+        purges: List[SurrogateKeyPurge] = SurrogateKeyPurgeOperations.claim_purges(
+            batch_size
+        )
+        if not purges:
+            return 0
+        surrogate_keys = sorted(
+            set(key for purge_entry in purges for key in purge_entry.surrogate_keys)
+        )
+        purge(surrogate_keys)
+        SurrogateKeyPurgeOperations.delete_purges(purges)
+
+    return len(purges)
@@ -0,0 +1,125 @@
+from typing import Final, Tuple, Type, Iterable
+
+from django.db import models, transaction
+from django.db.models import Q, Sum, Value
+from django.db.models.functions import Coalesce, Length, Substr
+
+from resource_management.models import RawArticleData, ArticleEditHistory
+from resource_management.models.fields import COMPRESSED_TEXT_HEADER
+
+__all__ = [
+    "convert_article_text_storage",
+]
+
+# Models and their CompressedTextField columns
+_COMPRESSED_TEXT_COLUMNS: Final = (
+    (RawArticleData, ("data",)),
+    (ArticleEditHistory, ("update_data", "recover_data")),
+)
+
+_HEADER_ANNOTATION_FORMAT: Final = "{field:s}_storage_header"
+
+
+def _header_annotations(field_names: Iterable[str]) -> dict:
+    # Only compare the leading bytes, so the filter does not need to pull
+    # the full column back to the application.
+    return {
+        _HEADER_ANNOTATION_FORMAT.format(field=name): Substr(
+            name, 1, len(COMPRESSED_TEXT_HEADER), output_field=models.BinaryField()
+        )
+        for name in field_names
+    }
+
+
+def _pending_condition(field_names: Iterable[str], compress: bool) -> Q:
+    condition = Q()
+    for name in field_names:
+        annotation = _HEADER_ANNOTATION_FORMAT.format(field=name)
+        if compress:
+            condition |= Q(**{name + "__isnull": False}) & ~Q(
+                **{annotation: COMPRESSED_TEXT_HEADER}
+            )
+        else:
+            condition |= Q(**{annotation: COMPRESSED_TEXT_HEADER})
+    return condition
+
+
+def _storage_size(model: Type[models.Model], field_names: Iterable[str]) -> int:
+    aggregated = model.objects.aggregate(
+        **{name: Coalesce(Sum(Length(name)), 0) for name in field_names}
+    )
+    return sum(aggregated.values())
+
+
+def _convert_model(
+    model: Type[models.Model],
+    field_names: Tuple[str, ...],
+    batch_size: int,
+    compress: bool,
+) -> int:
+    num_converted = 0
+    last_pk = None
+    while True:
+        # Keyset pagination on PK keeps every batch query cheap, and rows
+        # that have been converted are skipped on re-runs.
+        query = (
+            model.objects.annotate(**_header_annotations(field_names))
+            .filter(_pending_condition(field_names, compress))
+            .only("pk", *field_names)
+            .order_by("pk")
+        )
+        if last_pk is not None:
+            query = query.filter(pk__gt=last_pk)
+        batch = list(query[:batch_size])
+        if not batch:
+            break
+
+        if not compress:
+            # Write plain UTF-8 bytes back and bypass field compression.
+            for entry in batch:
+                for name in field_names:
+                    text = getattr(entry, name)
+                    if text is not None:
+                        setattr(
+                            entry,
+                            name,
+                            Value(
+                                text.encode("utf-8"), output_field=models.BinaryField()
+                            ),
+                        )
+
+        with transaction.atomic():
+            model.objects.bulk_update(batch, field_names)
+
+        last_pk = batch[-1].pk
+        num_converted += len(batch)
+        print(
+            "{model:s}: {num:d} rows converted...".format(
+                model=model.__name__, num=num_converted
+            )
+        )
+
+    return num_converted
+
+
+def convert_article_text_storage(batch_size: int, compress: bool = True) -> int:
+    """Convert stored raw documents and edit patches in batches.
+
+    With compress=False, compressed rows are converted back to plain
+    UTF-8 bytes, which is required before reverting the schema migration.
+    """
+    if batch_size <= 0:
+        raise ValueError('"batch_size" should be a positive integer.')
+
+    total_converted = 0
+    for model, field_names in _COMPRESSED_TEXT_COLUMNS:
+        size_before = _storage_size(model, field_names)
+        total_converted += _convert_model(model, field_names, batch_size, compress)
+        size_after = _storage_size(model, field_names)
+        print(
+            "{model:s}: {before:d} -> {after:d} bytes.".format(
+                model=model.__name__, before=size_before, after=size_after
+            )
+        )
+
+    return total_converted
@@ -0,0 +1,209 @@
+from datetime import timedelta
+from os.path import join as path_join
+from pathlib import Path
+from threading import Event, Thread
+from time import perf_counter
+from traceback import format_exc
+from typing import Final, Dict, Iterable, Optional, Any, final
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import DatabaseError, connections
+from django.utils import timezone
+
+from resource_management.models import UploadJob
+from resource_management.model_operations import (
+    UploadJobOperations,
+    UploadJobStageOperations,
+)
+from resource_management.service.post_update import PostUpdateHandler
+from resource_management.utils.articles import is_valid_synonym
+from resource_management.utils.instrumentation import METRICS
+
+__all__ = [
+    "InvalidUploadJobError",
+    "submit_upload_job",
+    "get_upload_job_status",
+    "get_upload_job_progress",
+    "recover_stale_upload_jobs",
+    "run_next_upload_job",
+]
+
+_ARCHIVE_FILENAME_FORMAT: Final = "{job_id:s}.tgz"
+
+_UPLOAD_JOB_DURATION: Final = METRICS.histogram(
+    "blog_upload_job_duration_seconds",
+    "Time of running upload jobs, by result (succeeded or failed).",
+    ["result"],
+    buckets=(1.0, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0, float("inf")),
+)
+
+
+@final
+class InvalidUploadJobError(ValueError):
+    pass
+
+
+def _format_timestamp(value) -> Optional[str]:
+    return value.isoformat() if value else None
+
+
+def _get_job_dir() -> str:
+    job_dir = settings.UPLOAD_JOB_DIR
+    if not job_dir:
+        raise ImproperlyConfigured("UPLOAD_JOB_DIR is required for upload jobs.")
+    return job_dir
+
+
+def submit_upload_job(
+    archive_chunks: Iterable[bytes], synonym: str, create_only: bool = False
+) -> UploadJob:
+    """Persist the submitted bundle and queue it for the upload worker.
+
+    Note: Archive content is written chunk by chunk, so large bundles are
+          never held in memory as a whole.
+    """
+    if not is_valid_synonym(synonym):
+        raise InvalidUploadJobError(
+            "'{:s}' is not a valid article synonym.".format(synonym)
+        )
+
+    job = UploadJob(synonym=synonym, create_only=create_only)
+    job.archive_path = path_join(
+        _get_job_dir(), _ARCHIVE_FILENAME_FORMAT.format(job_id=str(job.uuid))
+    )
+    with open(job.archive_path, "wb") as fd_w:
+        for chunk in archive_chunks:
+            fd_w.write(chunk)
+    try:
+        job.save()
+    except Exception:
+        Path(job.archive_path).unlink(missing_ok=True)
+        raise
+
+    return job
+
+
+def get_upload_job_status(job_id: str) -> Dict[str, Any]:
+    job = UploadJobOperations.get_job(job_id)
+    return {
+        "id": str(job.uuid),
+        "synonym": job.synonym,
+        "status": UploadJob.JobStatus(job.status).name.lower(),
+        "created": _format_timestamp(job.created),
+        "started": _format_timestamp(job.started),
+        "finished": _format_timestamp(job.finished),
+        "error": job.error_message,
+    }
+
+
+def get_upload_job_progress(job_id: str) -> Dict[str, Any]:
+    job = UploadJobOperations.get_job(job_id)
+    stages = [
+        {
+            "name": stage.name,
+            "started": _format_timestamp(stage.started),
+            "finished": _format_timestamp(stage.finished),
+        }
+        for stage in UploadJobStageOperations.get_stages(job)
+    ]
+    current_stage = None
+    if job.status == UploadJob.JobStatus.RUNNING and stages:
+        current_stage = stages[-1]["name"]
+
+    return {
+        "id": str(job.uuid),
+        "status": UploadJob.JobStatus(job.status).name.lower(),
+        "current_stage": current_stage,
+        "stages": stages,
+    }
+
+
+@final
+class _JobHeartbeat(Thread):
+    """ Refresh heartbeat of the running job, so it's not taken as stale. """
+
+    def __init__(self, job: UploadJob, interval: float):
+        super().__init__(name="upload-job-heartbeat", daemon=True)
+        self.job = job
+        self.interval = interval
+        self._stopped = Event()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self.join()
+
+    def run(self) -> None:
+        try:
+            while not self._stopped.wait(self.interval):
+                try:
+                    UploadJobOperations.refresh_heartbeat(self.job)
+                except DatabaseError as e:
+                    print("Failed to refresh job heartbeat: {0!s}".format(e))
+                    connections.close_all()
+        finally:
+            connections.close_all()
+
+
+def recover_stale_upload_jobs() -> None:
+    """Queue jobs left running by killed workers again, or mark them as failed
+    when they're out of attempts.
+    """
+    requeued, failed = UploadJobOperations.recover_stale_jobs(
+        timezone.now() - timedelta(seconds=settings.UPLOAD_JOB_STALE_SECONDS),
+        settings.UPLOAD_JOB_MAX_ATTEMPTS,
+    )
+    for job in requeued:
+        print("Requeued stale upload job {:s}.".format(str(job.uuid)))
+    for job in failed:
+        print("Stale upload job {:s} failed.".format(str(job.uuid)))
+        UploadJobStageOperations.finish_open_stages(job)
+        Path(job.archive_path).unlink(missing_ok=True)
+
+
+def run_next_upload_job() -> Optional[UploadJob]:
+    """Claim the oldest pending job and run it. Return None when the queue
+    is empty.
+
+    Note: Jobs left running by killed workers are recovered before claiming.
+    """
+    recover_stale_upload_jobs()
+    job = UploadJobOperations.claim_next_job()
+    if job is None:
+        return None
+
+    print(
+        "Running upload job {job_id:s} ({synonym:s})...".format(
+            job_id=str(job.uuid), synonym=job.synonym
+        )
+    )
+    success_flag: bool = False
+    error_message: Optional[str] = None
+    start = perf_counter()
+    heartbeat = _JobHeartbeat(job, settings.UPLOAD_JOB_HEARTBEAT_SECONDS)
+    heartbeat.start()
+    try:
+        PostUpdateHandler.upload_article(
+            job.archive_path,
+            job.synonym,
+            create_only=job.create_only,
+            stage_callback=lambda stage: UploadJobStageOperations.start_stage(
+                job, stage
+            ),
+        )
+        success_flag = True
+    except Exception:
+        error_message = format_exc()
+        print(error_message)
+    finally:
+        heartbeat.stop()
+        UploadJobStageOperations.finish_open_stages(job)
+        UploadJobOperations.finish_job(
+            job, success=success_flag, error_message=error_message
+        )
+        Path(job.archive_path).unlink(missing_ok=True)
+        _UPLOAD_JOB_DURATION.observe(
+            perf_counter() - start, result="succeeded" if success_flag else "failed"
+        )
+
+    return job
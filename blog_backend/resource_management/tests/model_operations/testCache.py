@@ -0,0 +1,200 @@
+from threading import current_thread, Event, Thread
+from time import sleep
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.db import connections, transaction
+from django.test import TransactionTestCase, override_settings
+
+from resource_management.models import Article, CompiledArticleData, Image, Tag
+import resource_management.model_operations.cache as cache_operations
+from resource_management.model_operations import (
+    ArticleOperations,
+    ImageOperations,
+    TagOperations,
+    bump_generations,
+    cached_result,
+    invalidate_models,
+    store_generations,
+)
+from resource_management.routers import pin_primary, primary_reads, replica_reads
+
+
+# Results are only cached outside of transactions, so TestCase can't be used.
+@override_settings(RESOURCE_CACHE_ENABLED=True)
+class CachedReadTestCase(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def test_invalidate_on_save(self):
+        tag = Tag.objects.create(tag_name="tag-1")
+        # Built while holding the lock on the key.
+        with self.assertNumQueries(3):
+            TagOperations.get_tag_by_name("tag-1")
+        with self.assertNumQueries(0):
+            self.assertEqual(TagOperations.get_tag_by_name("tag-1").pk, tag.pk)
+
+        tag.tag_name = "tag-2"
+        tag.save()
+        with self.assertRaises(Tag.DoesNotExist):
+            TagOperations.get_tag_by_name("tag-1")
+        self.assertEqual(TagOperations.get_tag_by_name("tag-2").pk, tag.pk)
+
+    def test_invalidate_on_bulk_create(self):
+        TagOperations.bulk_create([Tag(tag_name="tag-2")])
+        self.assertEqual(TagOperations.get_all_tags(), ["tag-2"])
+        TagOperations.bulk_create([Tag(tag_name="tag-1")])
+        self.assertEqual(TagOperations.get_all_tags(), ["tag-1", "tag-2"])
+
+    def test_invalidate_on_soft_delete(self):
+        article = Article.objects.create(synonym="test-article", title="Test")
+        entry = Image.objects.create(
+            article=article,
+            alias="image",
+            extension="jpg",
+            resolution=Image.ImageResolutionType.ORIGINAL,
+        )
+        self.assertEqual(ImageOperations.get_image_by_file_name(entry.file_name), entry)
+
+        entry.delete()
+        with self.assertRaises(Image.DoesNotExist):
+            ImageOperations.get_image_by_file_name(entry.file_name)
+
+    def test_invalidate_on_related_change(self):
+        article = Article.objects.create(synonym="test-article", title="Test")
+        compiled_data = CompiledArticleData.objects.create(article=article, data="1")
+        ArticleOperations.get_article_by_synonym("test-article", prefetch_for_blog=True)
+        with self.assertNumQueries(0):
+            ArticleOperations.get_article_by_synonym(
+                "test-article", prefetch_for_blog=True
+            )
+
+        compiled_data.data = "2"
+        compiled_data.save()
+        entry = ArticleOperations.get_article_by_synonym(
+            "test-article", prefetch_for_blog=True
+        )
+        self.assertEqual(entry.compiled_data.data, "2")
+
+    def test_read_own_writes(self):
+        tag = Tag.objects.create(tag_name="tag-1")
+        with transaction.atomic():
+            TagOperations.get_tag_by_name("tag-1")
+            tag.tag_name = "tag-2"
+            tag.save()
+            self.assertEqual(TagOperations.get_tag_by_name("tag-2").pk, tag.pk)
+        with self.assertNumQueries(3):
+            self.assertEqual(TagOperations.get_tag_by_name("tag-2").pk, tag.pk)
+
+        with replica_reads():
+            pin_primary()
+            with self.assertNumQueries(1):
+                TagOperations.get_tag_by_name("tag-2")
+
+    def test_primary_reads(self):
+        tag = Tag.objects.create(tag_name="tag-1")
+        TagOperations.get_tag_by_name("tag-1")
+        # Updated without signals, so the cached result is stale.
+        Tag.objects.filter(pk=tag.pk).update(tag_name="tag-2")
+        self.assertEqual(TagOperations.get_tag_by_name("tag-1").pk, tag.pk)
+
+        with primary_reads():
+            with self.assertRaises(Tag.DoesNotExist):
+                TagOperations.get_tag_by_name("tag-1")
+            with self.assertNumQueries(1):
+                self.assertEqual(TagOperations.get_tag_by_name("tag-2").pk, tag.pk)
+
+    def test_store_outdated_generation(self):
+        name = Tag._meta.label_lower
+        key = cache_operations._get_generation_key(name)
+        generation = bump_generations([Tag])[name]
+        self.assertEqual(bump_generations([Tag]), {name: generation + 1})
+
+        # Stored by the worker which bumped the older generation, after the
+        # newer one was written. It's checked against the database.
+        cache.delete(key)
+        store_generations({name: generation})
+        self.assertEqual(cache.get(key), generation + 1)
+
+
+@override_settings(
+    RESOURCE_CACHE_ENABLED=True,
+    RESOURCE_CACHE_STALE_SECONDS=30,
+    RESOURCE_CACHE_REBUILD_WAIT_SECONDS=5,
+)
+class SingleFlightTestCase(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.version = 0
+        self.builds = 0
+        self.build_started = Event()
+        self.build_blocked = Event()
+        self.build_blocked.set()
+
+        @cached_result(Tag, timeout=60)
+        def get_payload():
+            self.builds += 1
+            self.build_started.set()
+            self.build_blocked.wait()
+            return {"version": self.version}
+
+        self.get_payload = get_payload
+
+    def _get_payload(self, results):
+        try:
+            results.append(self.get_payload())
+        finally:
+            # Rebuilds are locked with connections of each thread.
+            connections.close_all()
+
+    def _build_in_thread(self):
+        self.build_started.clear()
+        self.build_blocked.clear()
+        results = []
+        thread = Thread(target=self._get_payload, args=(results,))
+        thread.start()
+        self.build_started.wait()
+        return thread, results
+
+    def test_single_flight(self):
+        thread, results = self._build_in_thread()
+        waiting = set()
+        all_waiting = Event()
+
+        def wait(seconds):
+            waiting.add(current_thread())
+            if len(waiting) == 4:
+                all_waiting.set()
+            sleep(seconds)
+
+        waiters = [Thread(target=self._get_payload, args=(results,)) for _ in range(4)]
+        with patch.object(cache_operations, "sleep", wait):
+            for waiter in waiters:
+                waiter.start()
+            # None of the waiters gets the lock while the result is built.
+            self.assertTrue(all_waiting.wait(5))
+            self.build_blocked.set()
+            for t in [thread] + waiters:
+                t.join()
+        for t in [thread] + waiters:
+            t.join()
+
+        self.assertEqual(self.builds, 1)
+        self.assertEqual(results, [{"version": 0}] * 5)
+
+    def test_stale_while_revalidate(self):
+        self.get_payload()
+        self.version = 1
+        invalidate_models(Tag)
+
+        thread, results = self._build_in_thread()
+        # Previous result is served while it's rebuilt.
+        self.assertEqual(self.get_payload(), {"version": 0})
+        self.build_blocked.set()
+        thread.join()
+
+        self.assertEqual(results, [{"version": 1}])
+        self.assertEqual(self.get_payload(), {"version": 1})
+        self.assertEqual(self.builds, 2)
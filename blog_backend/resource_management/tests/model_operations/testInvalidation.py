@@ -0,0 +1,128 @@
+from time import monotonic, sleep
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.db import DatabaseError, transaction
+from django.db.models import F
+from django.test import TransactionTestCase, override_settings
+
+import resource_management.model_operations.cache as cache_operations
+import resource_management.model_operations.invalidation as invalidation
+from resource_management.models import Article, CacheGeneration, Tag
+from resource_management.model_operations import (
+    GenerationPoller,
+    InvalidationListener,
+    apply_invalidation,
+    publish_invalidation,
+)
+
+
+def _get_generation(model):
+    return cache_operations._get_generations([model])[0]
+
+
+# Notifications are only delivered on commit, so TestCase can't be used.
+@override_settings(RESOURCE_CACHE_ENABLED=True)
+class InvalidationListenerTestCase(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        listener = InvalidationListener()
+        listener.start()
+        self.addCleanup(listener.join)
+        self.addCleanup(listener.stop)
+        self.assertTrue(listener.listening.wait(5))
+
+    def test_listen(self):
+        tag_generation = _get_generation(Tag)
+        article_generation = _get_generation(Article)
+        # Published by a worker of another node, which mirrors generations
+        # into its own cache.
+        with patch.object(cache_operations, "store_generations"), patch.object(
+            invalidation, "_record_applied", side_effect=lambda generations: generations
+        ):
+            with transaction.atomic():
+                publish_invalidation([Tag], synonym="test-article", tags=["tag"])
+
+        deadline = monotonic() + 5
+        while _get_generation(Tag) == tag_generation and monotonic() < deadline:
+            sleep(0.01)
+        self.assertNotEqual(_get_generation(Tag), tag_generation)
+        self.assertEqual(_get_generation(Article), article_generation)
+
+
+@override_settings(RESOURCE_CACHE_ENABLED=True)
+class ApplyInvalidationTestCase(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def test_apply_once_per_node(self):
+        name = Tag._meta.label_lower
+        generation = _get_generation(Tag)
+        # Bumped by a worker of another node.
+        CacheGeneration.objects.filter(name=name).update(generation=F("generation") + 1)
+
+        with patch.object(
+            invalidation,
+            "store_generations",
+            wraps=invalidation.store_generations,
+        ) as store_generations:
+            # Received by all workers of this node.
+            apply_invalidation({name: generation + 1})
+            apply_invalidation({name: generation + 1})
+            # Published by a worker of this node, which mirrored it already.
+            publish_invalidation([Tag])
+            apply_invalidation({name: generation + 2})
+
+        self.assertEqual(_get_generation(Tag), generation + 2)
+        self.assertEqual(
+            [call[0][0] for call in store_generations.call_args_list],
+            [{name: generation + 1}, {}, {}],
+        )
+
+
+# Generations are bumped on commit.
+@override_settings(RESOURCE_CACHE_ENABLED=True)
+class GenerationPollerTestCase(TransactionTestCase):
+    @patch("resource_management.model_operations.invalidation.apply_invalidation")
+    def test_poll(self, apply_invalidation):
+        poller = GenerationPoller(interval=1)
+        poller.load_baseline()
+        publish_invalidation([Article])
+        poller.poll()
+        self.assertEqual(
+            list(apply_invalidation.call_args[0][0]), ["resource_management.article"]
+        )
+
+        # Generations are kept when polling fails.
+        publish_invalidation([Tag])
+        with patch(
+            "resource_management.model_operations.invalidation."
+            "CacheGenerationOperations.get_generations",
+            side_effect=DatabaseError("Connection lost"),
+        ), patch("resource_management.model_operations.invalidation.connections"):
+            poller._run_query(poller.poll)
+        poller.poll()
+        self.assertEqual(
+            list(apply_invalidation.call_args[0][0]), ["resource_management.tag"]
+        )
+
+        publish_invalidation([Tag])
+        poller.poll()
+        self.assertEqual(
+            list(apply_invalidation.call_args[0][0]), ["resource_management.tag"]
+        )
+
+        publish_invalidation([Article, Tag])
+        poller.poll()
+        self.assertEqual(
+            sorted(apply_invalidation.call_args[0][0]),
+            ["resource_management.article", "resource_management.tag"],
+        )
+
+    @patch("resource_management.model_operations.invalidation.apply_invalidation")
+    def test_poll_without_baseline(self, apply_invalidation):
+        poller = GenerationPoller(interval=1)
+        poller.poll()
+        self.assertIn("resource_management.article", apply_invalidation.call_args[0][0])
@@ -0,0 +1,54 @@
+from django.db import connection, models
+from django.db.models import Value
+from django.test import TestCase
+
+from resource_management.models import Article, RawArticleData
+from resource_management.models.fields import (
+    COMPRESSED_TEXT_HEADER,
+    compress_text,
+    decompress_text,
+)
+
+
+class CompressedTextFieldTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.text = "# Article\nSome text with non-ASCII characters: 中文\n" * 50
+        cls.article = Article.objects.create(
+            synonym="test-article",
+            title="Test Article",
+        )
+        cls.raw_data = RawArticleData.objects.create(
+            article=cls.article,
+            version="0.0.1",
+            data=cls.text,
+        )
+
+    def test_compress_text(self):
+        compressed = compress_text(self.text)
+        self.assertTrue(compressed.startswith(COMPRESSED_TEXT_HEADER))
+        self.assertLess(len(compressed), len(self.text.encode("utf-8")))
+        self.assertEqual(decompress_text(compressed), self.text)
+
+    def test_decompress_plain_text(self):
+        self.assertEqual(decompress_text(self.text.encode("utf-8")), self.text)
+
+    def test_round_trip(self):
+        raw_data = RawArticleData.objects.get(article=self.article)
+        self.assertEqual(raw_data.data, self.text)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT data FROM {table:s} WHERE article_id = %s".format(
+                    table=RawArticleData._meta.db_table
+                ),
+                [self.article.id],
+            )
+            stored = bytes(cursor.fetchone()[0])
+        self.assertTrue(stored.startswith(COMPRESSED_TEXT_HEADER))
+
+    def test_read_plain_text_row(self):
+        RawArticleData.objects.filter(article=self.article).update(
+            data=Value(self.text.encode("utf-8"), output_field=models.BinaryField())
+        )
+        raw_data = RawArticleData.objects.get(article=self.article)
+        self.assertEqual(raw_data.data, self.text)
@@ -0,0 +1,142 @@
+from random import Random
+
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+
+from resource_management.models import Article, Image
+from resource_management.model_operations import ImageOperations
+
+_NUM_ARTICLES = 20
+_NUM_ALIASES = 20
+# Each update of an article soft-deletes its images and creates new ones,
+# so deleted rows outnumber live ones.
+_NUM_DELETED_VERSIONS = 4
+
+
+def _create_images():
+    articles = Article.objects.bulk_create(
+        Article(synonym="test-article-{0:d}".format(i), title="Test Article")
+        for i in range(_NUM_ARTICLES)
+    )
+    deleted = timezone.now()
+    entries = []
+    for article in articles:
+        for i in range(_NUM_ALIASES):
+            for resolution in Image.ImageResolutionType.values:
+                deleted_values = [None] + [deleted] * _NUM_DELETED_VERSIONS
+                for deleted_value in deleted_values:
+                    entries.append(
+                        Image(
+                            article=article,
+                            alias="image-{0:d}".format(i),
+                            extension="jpg",
+                            resolution=resolution,
+                            source_digest="{0:064d}".format(i),
+                            deleted=deleted_value,
+                        )
+                    )
+    # Images of an article are created over time, so they're spread over
+    # the table instead of stored next to each other.
+    Random(0).shuffle(entries)
+    Image.all_objects.bulk_create(entries)
+
+
+def _get_scans(plan):
+    scans = []
+    if "Index Name" in plan:
+        scans.append((plan["Node Type"], plan["Index Name"]))
+    for sub_plan in plan.get("Plans", ()):
+        scans.extend(_get_scans(sub_plan))
+    return scans
+
+
+class ImageIndexTestCase(TestCase):
+    """Check that Image lookups are planned with the intended indexes.
+
+    Sequential scans are disabled while explaining, since the seeded table
+    is still small enough for the planner to prefer them.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        _create_images()
+        cls.article = Article.objects.first()
+        cls.entry = Image.objects.filter(article=cls.article).first()
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE resource_management_image")
+
+    def _explain(self, queryset):
+        # Soft-delete filter is only added when the queryset is evaluated
+        # (QuerySet.explain() doesn't count), so apply it to a clone here.
+        queryset = queryset.all()
+        queryset._filter_visibility()
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+            try:
+                cursor.execute("EXPLAIN (FORMAT JSON) " + sql, params)
+                plan = cursor.fetchone()[0][0]["Plan"]
+            finally:
+                cursor.execute("SET LOCAL enable_seqscan = on")
+        return _get_scans(plan)
+
+    def _assert_index_scan(self, queryset, index_name):
+        scans = self._explain(queryset)
+        self.assertIn(index_name, [name for _, name in scans], scans)
+
+    def test_get_images_by_article(self):
+        self._assert_index_scan(
+            ImageOperations.get_images_by_article(self.article),
+            "idx_image_live_identity",
+        )
+        self._assert_index_scan(
+            ImageOperations.get_images_by_article_and_aliases(
+                self.article, ["image-1", "image-2"], include_original=True
+            ),
+            "idx_image_live_identity",
+        )
+
+    def test_get_original_images(self):
+        self._assert_index_scan(
+            ImageOperations.get_original_images(self.article),
+            "idx_image_live_original",
+        )
+
+    def test_get_image_by_file_name(self):
+        uuid_str, extension = self.entry.file_name.split(".")
+        scans = self._explain(Image.objects.filter(uuid=uuid_str, extension=extension))
+        # Primary key is as selective as the partial index here.
+        self.assertTrue(
+            set(name for _, name in scans)
+            & {"idx_image_live_file", Image._meta.db_table + "_pkey"},
+            scans,
+        )
+
+    def test_get_images_by_source_digest(self):
+        self._assert_index_scan(
+            ImageOperations.get_images_by_source_digest("{0:064d}".format(1), "jpg"),
+            "idx_image_live_source",
+        )
+
+
+class LiveImageUuidScanTestCase(TransactionTestCase):
+    """Check that listing live UUIDs is an index-only scan on
+    idx_image_live_file, without disabling other plans. It needs a vacuumed
+    table (so pages are marked all-visible), which can't be done inside the
+    transaction of TestCase.
+    """
+
+    def setUp(self):
+        _create_images()
+        with connection.cursor() as cursor:
+            cursor.execute("VACUUM ANALYZE resource_management_image")
+
+    def test_iter_live_image_uuids(self):
+        queryset = Image.objects.values_list("uuid", flat=True).order_by().all()
+        queryset._filter_visibility()
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute("EXPLAIN (FORMAT JSON) " + sql, params)
+            scans = _get_scans(cursor.fetchone()[0][0]["Plan"])
+        self.assertEqual(scans, [("Index Only Scan", "idx_image_live_file")])
@@ -0,0 +1,119 @@
+from os import listdir
+from os.path import exists, join as path_join
+from tempfile import TemporaryDirectory
+from uuid import uuid4
+
+from django.conf import settings
+from django.test import TestCase
+
+from resource_management.models import Article, Image
+from resource_management.service.image_gc import collect_orphaned_images
+from resource_management.tests.test_utils import (
+    use_test_image_dir,
+    clear_test_image_dirs,
+)
+from resource_management.utils.images import get_image_full_path
+
+
+class ImageGCTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.article = Article.objects.create(
+            synonym="test-article",
+            title="Test Article",
+        )
+        cls.live_images = [
+            Image.objects.create(
+                article=cls.article,
+                alias="live-image",
+                extension="jpg",
+                resolution=resolution,
+                height=100,
+                width=100,
+            )
+            for resolution in (
+                Image.ImageResolutionType.ORIGINAL,
+                Image.ImageResolutionType.LOW,
+            )
+        ]
+        cls.deleted_image = Image.objects.create(
+            article=cls.article,
+            alias="deleted-image",
+            extension="jpg",
+            resolution=Image.ImageResolutionType.LOW,
+            height=100,
+            width=100,
+        )
+        cls.deleted_image.delete()
+
+    @staticmethod
+    def _write_file(path, size=10):
+        with open(path, "wb") as fd_w:
+            fd_w.write(b"\0" * size)
+        return path
+
+    def _create_files(self):
+        self.live_paths = [
+            self._write_file(get_image_full_path(entry)) for entry in self.live_images
+        ]
+        self.orphaned_paths = [
+            self._write_file(get_image_full_path(self.deleted_image), size=20),
+            self._write_file(
+                path_join(settings.OPENED_IMAGE_DIR, "{0:s}.jpg".format(str(uuid4()))),
+                size=30,
+            ),
+        ]
+        # Files which are not named by this application are left untouched.
+        self.unknown_path = self._write_file(
+            path_join(settings.OPENED_IMAGE_DIR, "README.txt")
+        )
+
+    @use_test_image_dir
+    def test_collect_orphaned_images(self):
+        self._create_files()
+        report = collect_orphaned_images(min_age=0)
+        self.assertEqual(report.num_scanned, 5)
+        self.assertEqual(report.num_orphaned, 2)
+        self.assertEqual(report.reclaimed_bytes, 50)
+        self.assertTrue(all(exists(path) for path in self.live_paths))
+        self.assertFalse(any(exists(path) for path in self.orphaned_paths))
+        self.assertTrue(exists(self.unknown_path))
+
+    @use_test_image_dir
+    def test_collect_orphaned_images_dry_run(self):
+        self._create_files()
+        report = collect_orphaned_images(dry_run=True, min_age=0)
+        self.assertEqual(report.num_orphaned, 2)
+        self.assertEqual(report.reclaimed_bytes, 50)
+        self.assertTrue(all(exists(path) for path in self.orphaned_paths))
+
+    @use_test_image_dir
+    def test_collect_orphaned_images_min_age(self):
+        self._create_files()
+        report = collect_orphaned_images()
+        self.assertEqual(report.num_orphaned, 0)
+        self.assertTrue(all(exists(path) for path in self.orphaned_paths))
+
+    @use_test_image_dir
+    def test_collect_orphaned_images_temp_files(self):
+        temp_path = self._write_file(
+            path_join(settings.PROTECTED_IMAGE_DIR, ".tmp-abcd1234.jpg"), size=40
+        )
+        lock_path = self._write_file(path_join(settings.OPENED_IMAGE_DIR, ".lock-00"))
+        report = collect_orphaned_images(min_age=0)
+        self.assertEqual(report.num_orphaned, 1)
+        self.assertEqual(report.reclaimed_bytes, 40)
+        self.assertFalse(exists(temp_path))
+        self.assertTrue(exists(lock_path))
+
+    @use_test_image_dir
+    def test_collect_orphaned_images_quarantine(self):
+        self._create_files()
+        with TemporaryDirectory() as quarantine_dir:
+            report = collect_orphaned_images(quarantine_dir=quarantine_dir, min_age=0)
+            self.assertEqual(report.num_orphaned, 2)
+            self.assertEqual(len(listdir(quarantine_dir)), 2)
+        self.assertFalse(any(exists(path) for path in self.orphaned_paths))
+
+    def tearDown(self):
+        clear_test_image_dirs()
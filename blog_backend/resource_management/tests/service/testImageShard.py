@@ -0,0 +1,101 @@
+from os import listdir
+from os.path import exists, isdir, join as path_join
+
+from django.conf import settings
+from django.test import TestCase, override_settings
+
+from resource_management.models import Image
+from resource_management.service.image import get_full_file_path
+from resource_management.service.image_shard import shard_image_files
+from resource_management.service.post_update import PostUpdateHandler
+from resource_management.tests.test_utils import (
+    use_test_image_dir,
+    clear_test_image_dirs,
+    TEST_FILE_ROOT_DIR,
+)
+from resource_management.utils.images import get_image_full_path
+
+
+class ImageShardTestCase(TestCase):
+    @staticmethod
+    def _upload_article():
+        PostUpdateHandler.upload_article(
+            path_join(TEST_FILE_ROOT_DIR, "TestData_05_title_tag_image.tgz"),
+            "test-article",
+            create_only=True,
+        )
+
+    @use_test_image_dir
+    def test_upload_article_sharded(self):
+        with override_settings(IMAGE_SHARD_DEPTH=2, IMAGE_SHARD_PREVIOUS_DEPTH=2):
+            self._upload_article()
+            # Only shard directories are placed at the top level.
+            for dir_path in (
+                settings.OPENED_IMAGE_DIR,
+                settings.PROTECTED_IMAGE_DIR,
+            ):
+                for name in listdir(dir_path):
+                    self.assertEqual(len(name), 2)
+                    self.assertTrue(isdir(path_join(dir_path, name)))
+
+            entry = Image.objects.filter(
+                resolution=Image.ImageResolutionType.LOW
+            ).first()
+            uuid_str = str(entry.uuid)
+            expected_path = path_join(
+                settings.OPENED_IMAGE_DIR,
+                uuid_str[0:2],
+                uuid_str[2:4],
+                entry.file_name,
+            )
+            self.assertEqual(get_image_full_path(entry), expected_path)
+            self.assertTrue(exists(expected_path))
+            self.assertEqual(get_full_file_path(entry.file_name)["data"], expected_path)
+
+    @use_test_image_dir
+    def test_shard_image_files(self):
+        self._upload_article()
+        entries = list(Image.objects.all())
+        flat_paths = [get_image_full_path(entry) for entry in entries]
+        self.assertTrue(all(exists(path) for path in flat_paths))
+
+        with override_settings(IMAGE_SHARD_DEPTH=2, IMAGE_SHARD_PREVIOUS_DEPTH=0):
+            entry = next(
+                entry
+                for entry in entries
+                if entry.resolution != Image.ImageResolutionType.ORIGINAL
+            )
+            # Files under previous layout can still be found
+            self.assertEqual(
+                get_full_file_path(entry.file_name)["data"],
+                get_image_full_path(entry, shard_depth=0),
+            )
+
+            report = shard_image_files(0, batch_size=3)
+            self.assertEqual(report.num_moved, len(entries))
+            self.assertEqual(report.num_skipped, 0)
+            self.assertFalse(any(exists(path) for path in flat_paths))
+            self.assertTrue(
+                all(exists(get_image_full_path(entry)) for entry in entries)
+            )
+            self.assertEqual(
+                get_full_file_path(entry.file_name)["data"],
+                get_image_full_path(entry),
+            )
+
+            # Nothing left to move
+            report = shard_image_files(0)
+            self.assertEqual(report.num_moved, 0)
+
+        # And back to the flat layout
+        with override_settings(IMAGE_SHARD_DEPTH=0, IMAGE_SHARD_PREVIOUS_DEPTH=2):
+            report = shard_image_files(2, dry_run=True)
+            self.assertEqual(report.num_moved, len(entries))
+            self.assertFalse(any(exists(path) for path in flat_paths))
+
+            report = shard_image_files(2)
+            self.assertEqual(report.num_moved, len(entries))
+            self.assertTrue(all(exists(path) for path in flat_paths))
+
+    def tearDown(self):
+        clear_test_image_dirs()
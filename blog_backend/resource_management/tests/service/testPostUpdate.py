@@ -1,11 +1,43 @@
-from os import listdir, remove
-from os.path import join as path_join
+from hashlib import sha256
+from os import listdir, stat
+from os.path import exists, join as path_join
+from tempfile import TemporaryDirectory
+from threading import Event, Thread
+from unittest.mock import patch
 
-from django.test import TestCase
+from bs4 import BeautifulSoup
+from django.test import TestCase, override_settings
 from django.conf import settings
+from django.db import connection
 
-from resource_management.tests.test_utils import use_test_image_dir, TEST_FILE_ROOT_DIR
-from resource_management.service.post_update import PostUpdateHandler
+from resource_management.tests.test_utils import (
+    use_test_image_dir,
+    clear_test_image_dirs,
+    TEST_FILE_ROOT_DIR,
+)
+from resource_management.service.post_update import (
+    PostUpdateHandler,
+    STAGE_READ_ARCHIVE,
+    STAGE_VALIDATE,
+    STAGE_PROCESS_IMAGES,
+    STAGE_WRITE_DB,
+    STAGE_SAVE_IMAGES,
+    SPAN_PARSE_XML,
+    SPAN_RENDER_XML,
+    COUNTER_ARCHIVE_BYTES,
+    COUNTER_PIXELS_PROCESSED,
+    COUNTER_BYTES_WRITTEN,
+    COUNTER_FILES_WRITTEN,
+)
+from resource_management.service.image import get_full_file_path
+from resource_management.service.surrogate_keys import get_tag_key
+from resource_management.model_operations import (
+    advisory_lock,
+    LockNotAcquiredError,
+    LOCK_NAMESPACE_ARTICLE,
+)
+from resource_management.utils.images import get_image_full_path
+from resource_management.utils.instrumentation import Tracer, use_tracer
 from resource_management.models import (
     Article,
     RawArticleData,
@@ -14,6 +46,7 @@ from resource_management.models import (
     Tag,
     ArticleTag,
     Image,
+    SurrogateKeyPurge,
 )
 
 
@@ -303,6 +336,125 @@ class PostUpdateHandlerTestCase(TestCase):
         )
         self.assertFalse(edit_history)
 
+    @use_test_image_dir
+    def test_upload_article_identical_bundle(self):
+        synonym = "test-article"
+        bundle = path_join(TEST_FILE_ROOT_DIR, "TestData_05_title_tag_image.tgz")
+        PostUpdateHandler.upload_article(bundle, synonym)
+        article = Article.objects.get(synonym=synonym)
+        with open(bundle, "rb") as fd_r:
+            self.assertEqual(article.bundle_digest, sha256(fd_r.read()).hexdigest())
+        self.assertEqual(
+            article.bundle_version,
+            RawArticleData.objects.get(article=article).version,
+        )
+
+        # Skipped before the archive is parsed
+        tracer = Tracer()
+        with use_tracer(tracer):
+            PostUpdateHandler.upload_article(bundle, synonym)
+        span_names = set(span.name for span in tracer.spans)
+        self.assertIn(STAGE_READ_ARCHIVE, span_names)
+        self.assertNotIn(STAGE_VALIDATE, span_names)
+        self.assertEqual(Article.objects.get(synonym=synonym).updated, article.updated)
+
+        # Unless it's forced
+        tracer = Tracer()
+        with use_tracer(tracer):
+            PostUpdateHandler.upload_article(bundle, synonym, force=True)
+        self.assertIn(STAGE_VALIDATE, set(span.name for span in tracer.spans))
+        self.assertEqual(Image.objects.filter(article=article).count(), 10)
+
+    @use_test_image_dir
+    def test_upload_article_retry_failed_save(self):
+        synonym = "test-article"
+        bundle = path_join(TEST_FILE_ROOT_DIR, "TestData_05_title_tag_image.tgz")
+        with patch.object(
+            PostUpdateHandler, "_save_images", side_effect=OSError("Disk full")
+        ):
+            self.assertRaises(
+                OSError, PostUpdateHandler.upload_article, bundle, synonym
+            )
+        article = Article.objects.get(synonym=synonym)
+        self.assertIsNone(article.bundle_digest)
+
+        # Not skipped as an identical bundle, and the files are written this time.
+        PostUpdateHandler.upload_article(bundle, synonym)
+        article.refresh_from_db()
+        with open(bundle, "rb") as fd_r:
+            self.assertEqual(article.bundle_digest, sha256(fd_r.read()).hexdigest())
+        images = Image.objects.filter(article=article)
+        self.assertEqual(images.count(), 10)
+        for image in images:
+            self.assertTrue(exists(get_image_full_path(image)))
+
+    @use_test_image_dir
+    def test_upload_article_reuse_renditions(self):
+        bundle = path_join(TEST_FILE_ROOT_DIR, "TestData_05_title_tag_image.tgz")
+        PostUpdateHandler.upload_article(bundle, "test-article-01", create_only=True)
+
+        # Same images in another article are linked without resizing
+        tracer = Tracer()
+        with use_tracer(tracer):
+            PostUpdateHandler.upload_article(
+                bundle, "test-article-02", create_only=True
+            )
+        self.assertNotIn(COUNTER_PIXELS_PROCESSED, tracer.counters)
+        self.assertEqual(tracer.counters[COUNTER_FILES_WRITTEN], 10)
+
+        for entry in Image.objects.filter(article__synonym="test-article-02"):
+            self.assertTrue(entry.source_digest)
+            reused_entry = Image.objects.get(
+                article__synonym="test-article-01",
+                source_digest=entry.source_digest,
+                resolution=entry.resolution,
+            )
+            self.assertEqual(
+                (entry.width, entry.height), (reused_entry.width, reused_entry.height)
+            )
+            self.assertEqual(entry.placeholder, reused_entry.placeholder)
+            self.assertEqual(
+                stat(get_image_full_path(entry)).st_ino,
+                stat(get_image_full_path(reused_entry)).st_ino,
+            )
+        self._assert_image_placeholders(Article.objects.get(synonym="test-article-02"))
+
+    @staticmethod
+    def _hold_article_lock(synonym, locked, release):
+        # Runs in its own thread, hence in another DB session.
+        try:
+            with advisory_lock(LOCK_NAMESPACE_ARTICLE, synonym):
+                locked.set()
+                release.wait(timeout=10)
+        finally:
+            connection.close()
+
+    @use_test_image_dir
+    def test_upload_article_locked(self):
+        bundle = path_join(TEST_FILE_ROOT_DIR, "TestData_05_title_tag_image.tgz")
+        locked, release = Event(), Event()
+        holder = Thread(
+            target=self._hold_article_lock, args=("test-article", locked, release)
+        )
+        holder.start()
+        try:
+            self.assertTrue(locked.wait(timeout=10))
+            with self.assertRaises(LockNotAcquiredError):
+                PostUpdateHandler.upload_article(
+                    bundle, "test-article", wait_for_lock=False
+                )
+            # Other synonyms are not blocked
+            PostUpdateHandler.upload_article(
+                bundle, "test-article-other", wait_for_lock=False
+            )
+        finally:
+            release.set()
+            holder.join(timeout=10)
+
+        self.assertFalse(Article.objects.filter(synonym="test-article"))
+        PostUpdateHandler.upload_article(bundle, "test-article", wait_for_lock=False)
+        self.assertTrue(Article.objects.filter(synonym="test-article"))
+
     @use_test_image_dir
     def test_upload_article_duplicated_synonym(self):
         synonym = "test-article"
@@ -319,11 +471,176 @@ class PostUpdateHandlerTestCase(TestCase):
             create_only=True,
         )
 
-    def tearDown(self):
-        # Simply remove all the files in this directory
-        for dir_path in (
-            settings.OPENED_IMAGE_DIR_TEST,
-            settings.PROTECTED_IMAGE_DIR_TEST,
+    def _assert_image_placeholders(self, article):
+        compiled_xml = BeautifulSoup(
+            CompiledArticleData.objects.get(article=article).data, "html.parser"
+        )
+        image_tags = compiled_xml.find_all("img")
+        self.assertTrue(image_tags)
+        for image_tag in image_tags:
+            self.assertTrue(image_tag["src"].startswith("data:image/jpeg;base64,"))
+            original_entry = Image.objects.get(
+                article=article,
+                resolution=Image.ImageResolutionType.ORIGINAL,
+                placeholder=image_tag["src"],
+            )
+            low_entry = Image.objects.get(
+                article=article,
+                alias=original_entry.alias,
+                resolution=Image.ImageResolutionType.LOW,
+            )
+            self.assertEqual(image_tag["data-src"], "/img/" + low_entry.file_name)
+            self.assertEqual(image_tag["width"], str(original_entry.width))
+            self.assertEqual(image_tag["height"], str(original_entry.height))
+
+    @use_test_image_dir
+    def test_upload_article_placeholders(self):
+        PostUpdateHandler.upload_article(
+            path_join(TEST_FILE_ROOT_DIR, "TestData_05_title_tag_image.tgz"),
+            "test-article",
+            create_only=True,
+        )
+        self._assert_image_placeholders(Article.objects.get(synonym="test-article"))
+
+    @use_test_image_dir
+    def test_upload_article_backfill_placeholders(self):
+        bundle = path_join(TEST_FILE_ROOT_DIR, "TestData_05_title_tag_image.tgz")
+        PostUpdateHandler.upload_article(bundle, "test-article", create_only=True)
+        # Uploaded before placeholders (and bundle digests) were introduced.
+        article = Article.objects.get(synonym="test-article")
+        Article.objects.filter(id=article.id).update(
+            bundle_digest=None, bundle_version=None
+        )
+        Image.objects.filter(article=article).update(placeholder=None)
+
+        PostUpdateHandler.upload_article(bundle, "test-article")
+        self.assertFalse(
+            Image.objects.filter(
+                article=article,
+                resolution=Image.ImageResolutionType.ORIGINAL,
+                placeholder__isnull=True,
+            ).exists()
+        )
+        self._assert_image_placeholders(article)
+
+    @use_test_image_dir
+    def test_upload_article_tag_names(self):
+        PostUpdateHandler.upload_article(
+            path_join(TEST_FILE_ROOT_DIR, "TestData_05_title_tag_image.tgz"),
+            "test-article",
+            create_only=True,
+        )
+        article = Article.objects.get(synonym="test-article")
+        self.assertTrue(article.tag_names)
+        self.assertEqual(
+            article.tag_names,
+            sorted(
+                ArticleTag.objects.filter(article=article).values_list(
+                    "tag__tag_name", flat=True
+                )
+            ),
+        )
+
+    @use_test_image_dir
+    @override_settings(SURROGATE_KEY_PURGE_ENABLED=True)
+    def test_upload_article_purge_outbox(self):
+        PostUpdateHandler.upload_article(
+            path_join(TEST_FILE_ROOT_DIR, "TestData_05_title_tag_image.tgz"),
+            "test-article",
+            create_only=True,
+        )
+        article = Article.objects.get(synonym="test-article")
+        purge = SurrogateKeyPurge.objects.get(synonym="test-article")
+        self.assertIn("article-{0:d}".format(article.id), purge.surrogate_keys)
+        for tag_name in article.tag_names:
+            self.assertIn(get_tag_key(tag_name), purge.surrogate_keys)
+
+    @use_test_image_dir
+    def test_upload_article_instrumentation(self):
+        tracer = Tracer()
+        with use_tracer(tracer):
+            PostUpdateHandler.upload_article(
+                path_join(TEST_FILE_ROOT_DIR, "TestData_05_title_tag_image.tgz"),
+                "test-article",
+                create_only=True,
+            )
+
+        span_names = set(span.name for span in tracer.spans)
+        for name in (
+            STAGE_READ_ARCHIVE,
+            STAGE_VALIDATE,
+            SPAN_PARSE_XML,
+            STAGE_PROCESS_IMAGES,
+            STAGE_WRITE_DB,
+            SPAN_RENDER_XML,
+            STAGE_SAVE_IMAGES,
+        ):
+            self.assertIn(name, span_names)
+        self.assertEqual(tracer.counters[COUNTER_FILES_WRITTEN], 10)
+        for counter in (
+            COUNTER_ARCHIVE_BYTES,
+            COUNTER_PIXELS_PROCESSED,
+            COUNTER_BYTES_WRITTEN,
         ):
-            for filename in listdir(dir_path):
-                remove(path_join(dir_path, filename))
+            self.assertGreater(tracer.counters[counter], 0)
+
+    @use_test_image_dir
+    def test_upload_article_checkpoint(self):
+        bundle = path_join(TEST_FILE_ROOT_DIR, "TestData_05_title_tag_image.tgz")
+        with TemporaryDirectory() as checkpoint_dir, override_settings(
+            UPLOAD_CHECKPOINT_DIR=checkpoint_dir
+        ):
+            # First attempt fails after all renditions are produced
+            with patch.object(
+                PostUpdateHandler, "_run_write_operations", side_effect=OSError
+            ):
+                with self.assertRaises(OSError):
+                    PostUpdateHandler.upload_article(
+                        bundle, "test-article", create_only=True
+                    )
+            self.assertFalse(Article.objects.filter(synonym="test-article"))
+            self.assertEqual(len(listdir(checkpoint_dir)), 1)
+
+            # Retry redoes DB writes and files only
+            tracer = Tracer()
+            with use_tracer(tracer):
+                PostUpdateHandler.upload_article(
+                    bundle, "test-article", create_only=True
+                )
+            self.assertNotIn(COUNTER_PIXELS_PROCESSED, tracer.counters)
+            self.assertEqual(tracer.counters[COUNTER_FILES_WRITTEN], 10)
+            for entry in Image.objects.all():
+                self.assertTrue(exists(get_image_full_path(entry)))
+            self._assert_image_placeholders(Article.objects.get(synonym="test-article"))
+            # Checkpoint is removed after success
+            self.assertFalse(listdir(checkpoint_dir))
+
+    @use_test_image_dir
+    def test_upload_article_lazy_renditions(self):
+        synonym = "test-article"
+        with TemporaryDirectory() as cache_dir, override_settings(
+            IMAGE_LAZY_RENDITIONS=True, RENDITION_CACHE_DIR=cache_dir
+        ):
+            PostUpdateHandler.upload_article(
+                path_join(TEST_FILE_ROOT_DIR, "TestData_05_title_tag_image.tgz"),
+                synonym,
+                create_only=True,
+            )
+            # Entries are created for every resolution, but only originals
+            # are stored.
+            self.assertEqual(Image.objects.count(), 10)
+            self.assertFalse(listdir(settings.OPENED_IMAGE_DIR))
+            self.assertEqual(len(listdir(settings.PROTECTED_IMAGE_DIR)), 2)
+            self._assert_image_placeholders(Article.objects.get(synonym=synonym))
+
+            # Renditions are created on first access
+            entry = Image.objects.filter(
+                resolution=Image.ImageResolutionType.MEDIUM
+            ).first()
+            self.assertFalse(exists(get_image_full_path(entry)))
+            image_path = get_full_file_path(entry.file_name)["data"]
+            self.assertEqual(image_path, path_join(cache_dir, entry.file_name))
+            self.assertTrue(exists(image_path))
+
+    def tearDown(self):
+        clear_test_image_dirs()
@@ -0,0 +1,79 @@
+from django.test import TestCase, override_settings
+
+from resource_management.models import Article, SurrogateKeyPurge
+from resource_management.service.surrogate_keys import (
+    get_tag_key,
+    queue_article_purge,
+    drain_purge_outbox,
+)
+
+
+@override_settings(SURROGATE_KEY_PURGE_ENABLED=True)
+class SurrogateKeyPurgeTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.articles = [
+            Article.objects.create(
+                synonym="test-article-{0:d}".format(i), title="Test Article"
+            )
+            for i in range(3)
+        ]
+
+    def test_queue_article_purge(self):
+        queue_article_purge(self.articles[1], ["tag 1", "tag2"], is_new_article=False)
+        queue_article_purge(self.articles[1], [], is_new_article=True)
+        self.assertEqual(
+            [
+                purge.surrogate_keys
+                for purge in SurrogateKeyPurge.objects.order_by("id")
+            ],
+            [
+                [
+                    "article-{0:d}".format(self.articles[1].id),
+                    "page-listing",
+                    "tag-list",
+                    "tag-tag%201",
+                    "tag-tag2",
+                ],
+                [
+                    "article-{0:d}".format(self.articles[1].id),
+                    "page-listing",
+                    "tag-list",
+                    "article-{0:d}".format(self.articles[0].id),
+                    "article-{0:d}".format(self.articles[2].id),
+                ],
+            ],
+        )
+
+        with self.settings(SURROGATE_KEY_PURGE_ENABLED=False):
+            queue_article_purge(self.articles[1], [], is_new_article=False)
+        self.assertEqual(SurrogateKeyPurge.objects.count(), 2)
+
+    def test_drain_purge_outbox(self):
+        for article in self.articles:
+            queue_article_purge(article, ["tag"], is_new_article=False)
+
+        def fail(_):
+            raise OSError("CDN is down")
+
+        with self.assertRaises(OSError):
+            drain_purge_outbox(fail)
+        self.assertEqual(SurrogateKeyPurge.objects.count(), 3)
+
+        purged = []
+        self.assertEqual(drain_purge_outbox(purged.append, batch_size=2), 2)
+        self.assertEqual(
+            purged[0],
+            sorted(
+                [
+                    "article-{0:d}".format(self.articles[0].id),
+                    "article-{0:d}".format(self.articles[1].id),
+                    "page-listing",
+                    "tag-list",
+                    get_tag_key("tag"),
+                ]
+            ),
+        )
+        self.assertEqual(drain_purge_outbox(purged.append), 1)
+        self.assertEqual(drain_purge_outbox(purged.append), 0)
+        self.assertEqual(len(purged), 2)
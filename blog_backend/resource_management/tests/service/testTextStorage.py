@@ -0,0 +1,66 @@
+from django.db import models
+from django.db.models import Value
+from django.db.models.functions import Substr
+from django.test import TestCase
+
+from resource_management.service.text_storage import convert_article_text_storage
+from resource_management.models import Article, RawArticleData, ArticleEditHistory
+from resource_management.models.fields import COMPRESSED_TEXT_HEADER
+
+
+class TextStorageTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.text = "# Article\nHere's some test text.\n" * 20
+        for article_id in range(1, 6):
+            article = Article.objects.create(
+                synonym="test-article-{0:d}".format(article_id),
+                title="Test Article {0:d}".format(article_id),
+            )
+            RawArticleData.objects.create(
+                article=article, version="0.0.1", data=cls.text
+            )
+            ArticleEditHistory.objects.create(
+                article=article, update_data=cls.text, recover_data=None
+            )
+        # Simulate rows stored before the compression migration
+        plain_value = Value(cls.text.encode("utf-8"), output_field=models.BinaryField())
+        RawArticleData.objects.update(data=plain_value)
+        ArticleEditHistory.objects.update(update_data=plain_value)
+
+    @staticmethod
+    def _count_compressed(model, field_name):
+        return (
+            model.objects.annotate(
+                header=Substr(
+                    field_name,
+                    1,
+                    len(COMPRESSED_TEXT_HEADER),
+                    output_field=models.BinaryField(),
+                )
+            )
+            .filter(header=COMPRESSED_TEXT_HEADER)
+            .count()
+        )
+
+    def test_convert_article_text_storage(self):
+        num_converted = convert_article_text_storage(batch_size=2)
+        self.assertEqual(num_converted, 10)
+        self.assertEqual(self._count_compressed(RawArticleData, "data"), 5)
+        self.assertEqual(self._count_compressed(ArticleEditHistory, "update_data"), 5)
+        for raw_data in RawArticleData.objects.all():
+            self.assertEqual(raw_data.data, self.text)
+        for edit_history in ArticleEditHistory.objects.all():
+            self.assertEqual(edit_history.update_data, self.text)
+            self.assertIsNone(edit_history.recover_data)
+
+        # Nothing left to convert on re-run
+        self.assertEqual(convert_article_text_storage(batch_size=2), 0)
+
+    def test_convert_article_text_storage_decompress(self):
+        convert_article_text_storage(batch_size=3)
+        num_converted = convert_article_text_storage(batch_size=3, compress=False)
+        self.assertEqual(num_converted, 10)
+        self.assertEqual(self._count_compressed(RawArticleData, "data"), 0)
+        for raw_data in RawArticleData.objects.all():
+            self.assertEqual(raw_data.data, self.text)
@@ -0,0 +1,151 @@
+from datetime import timedelta
+from os.path import exists, join as path_join
+from tempfile import TemporaryDirectory
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from resource_management.tests.test_utils import (
+    use_test_image_dir,
+    clear_test_image_dirs,
+    TEST_FILE_ROOT_DIR,
+)
+from resource_management.service.post_update import (
+    STAGE_READ_ARCHIVE,
+    STAGE_VALIDATE,
+    STAGE_PROCESS_IMAGES,
+    STAGE_WRITE_DB,
+    STAGE_SAVE_IMAGES,
+)
+from resource_management.service.upload_job import (
+    InvalidUploadJobError,
+    submit_upload_job,
+    get_upload_job_status,
+    get_upload_job_progress,
+    recover_stale_upload_jobs,
+    run_next_upload_job,
+)
+from resource_management.models import Article, UploadJob
+from resource_management.utils.instrumentation import METRICS
+
+
+class UploadJobTestCase(TestCase):
+    def setUp(self):
+        self.job_dir = TemporaryDirectory()
+        self.settings_override = override_settings(UPLOAD_JOB_DIR=self.job_dir.name)
+        self.settings_override.enable()
+
+    @staticmethod
+    def _read_chunks(file_name):
+        with open(path_join(TEST_FILE_ROOT_DIR, file_name), "rb") as fd_r:
+            yield from iter(lambda: fd_r.read(64 * 1024), b"")
+
+    def test_submit_upload_job(self):
+        job = submit_upload_job(
+            self._read_chunks("TestData_05_title_tag_image.tgz"), "test-article"
+        )
+        self.assertTrue(exists(job.archive_path))
+        status = get_upload_job_status(str(job.uuid))
+        self.assertEqual(status["status"], "pending")
+        self.assertEqual(status["synonym"], "test-article")
+        self.assertIsNone(status["started"])
+
+    def test_submit_upload_job_invalid_synonym(self):
+        self.assertRaises(
+            InvalidUploadJobError,
+            submit_upload_job,
+            self._read_chunks("TestData_05_title_tag_image.tgz"),
+            "-Invalid Synonym-",
+        )
+        self.assertFalse(UploadJob.objects.exists())
+
+    @use_test_image_dir
+    def test_run_next_upload_job(self):
+        job = submit_upload_job(
+            self._read_chunks("TestData_05_title_tag_image.tgz"), "test-article"
+        )
+        self.assertEqual(run_next_upload_job(), job)
+        self.assertIsNone(run_next_upload_job())
+
+        status = get_upload_job_status(str(job.uuid))
+        self.assertEqual(status["status"], "succeeded")
+        self.assertIsNone(status["error"])
+        self.assertFalse(exists(job.archive_path))
+        self.assertTrue(Article.objects.filter(synonym="test-article").exists())
+
+        progress = get_upload_job_progress(str(job.uuid))
+        self.assertIsNone(progress["current_stage"])
+        self.assertEqual(
+            [stage["name"] for stage in progress["stages"]],
+            [
+                STAGE_READ_ARCHIVE,
+                STAGE_VALIDATE,
+                STAGE_PROCESS_IMAGES,
+                STAGE_WRITE_DB,
+                STAGE_SAVE_IMAGES,
+            ],
+        )
+        self.assertTrue(all(stage["finished"] for stage in progress["stages"]))
+
+    @use_test_image_dir
+    def test_run_next_upload_job_failed(self):
+        job_duration = METRICS.histogram(
+            "blog_upload_job_duration_seconds", "", ["result"]
+        )
+        failed_count = job_duration.get(result="failed").count
+        job = submit_upload_job(iter((b"not an archive",)), "test-article")
+        run_next_upload_job()
+        self.assertEqual(job_duration.get(result="failed").count, failed_count + 1)
+
+        status = get_upload_job_status(str(job.uuid))
+        self.assertEqual(status["status"], "failed")
+        self.assertIsNotNone(status["error"])
+        self.assertFalse(exists(job.archive_path))
+        self.assertFalse(Article.objects.exists())
+
+    def _make_running(self, job, heartbeat_age, attempts):
+        UploadJob.objects.filter(uuid=job.uuid).update(
+            status=UploadJob.JobStatus.RUNNING,
+            started=timezone.now() - timedelta(seconds=heartbeat_age),
+            heartbeat=timezone.now() - timedelta(seconds=heartbeat_age),
+            attempts=attempts,
+        )
+
+    @use_test_image_dir
+    @override_settings(UPLOAD_JOB_STALE_SECONDS=60, UPLOAD_JOB_MAX_ATTEMPTS=2)
+    def test_run_next_upload_job_worker_killed(self):
+        # The job was claimed by a worker which got killed while running it.
+        job = submit_upload_job(
+            self._read_chunks("TestData_05_title_tag_image.tgz"), "test-article"
+        )
+        self._make_running(job, heartbeat_age=120, attempts=1)
+
+        self.assertEqual(run_next_upload_job(), job)
+        job.refresh_from_db()
+        self.assertEqual(job.status, UploadJob.JobStatus.SUCCEEDED)
+        self.assertEqual(job.attempts, 2)
+        self.assertFalse(exists(job.archive_path))
+        self.assertTrue(Article.objects.filter(synonym="test-article").exists())
+
+    @override_settings(UPLOAD_JOB_STALE_SECONDS=60, UPLOAD_JOB_MAX_ATTEMPTS=2)
+    def test_recover_stale_upload_jobs(self):
+        running = submit_upload_job(iter((b"archive",)), "running-article")
+        self._make_running(running, heartbeat_age=10, attempts=1)
+        exhausted = submit_upload_job(iter((b"archive",)), "exhausted-article")
+        self._make_running(exhausted, heartbeat_age=120, attempts=2)
+
+        recover_stale_upload_jobs()
+        running.refresh_from_db()
+        self.assertEqual(running.status, UploadJob.JobStatus.RUNNING)
+        self.assertTrue(exists(running.archive_path))
+
+        status = get_upload_job_status(str(exhausted.uuid))
+        self.assertEqual(status["status"], "failed")
+        self.assertIn("Worker stopped", status["error"])
+        self.assertFalse(exists(exhausted.archive_path))
+        self.assertIsNone(run_next_upload_job())
+
+    def tearDown(self):
+        self.settings_override.disable()
+        self.job_dir.cleanup()
+        clear_test_image_dirs()
@@ -0,0 +1,126 @@
+from unittest.mock import patch
+
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.utils import timezone
+
+import resource_management.routers as routers
+from resource_management.middleware import PRIMARY_PIN_COOKIE, ReplicaReadMiddleware
+from resource_management.models import Article, UploadJob
+from resource_management.routers import (
+    ReplicaRouter,
+    replica_reads,
+    primary_reads,
+    pin_primary,
+)
+
+_REPLICA_ALIAS = "replica_0"
+
+
+@override_settings(DB_REPLICA_ALIASES=[_REPLICA_ALIAS])
+class ReplicaRouterTestCase(TestCase):
+    def setUp(self):
+        self.router = ReplicaRouter()
+        routers._unavailable_until.clear()
+        self.addCleanup(routers._unavailable_until.clear)
+
+    def _db_for_read(self, model=Article):
+        return self.router.db_for_read(model)
+
+    @patch.object(routers, "_is_available", return_value=True)
+    def test_replica_reads(self, _):
+        # Transaction of TestCase would keep reads on the primary.
+        with patch.object(transaction.get_connection(), "in_atomic_block", False):
+            self.assertEqual(self._db_for_read(), DEFAULT_DB_ALIAS)
+            with replica_reads():
+                self.assertEqual(self._db_for_read(), _REPLICA_ALIAS)
+                self.assertEqual(self._db_for_read(UploadJob), DEFAULT_DB_ALIAS)
+                with primary_reads():
+                    self.assertEqual(self._db_for_read(), DEFAULT_DB_ALIAS)
+                self.assertEqual(self._db_for_read(), _REPLICA_ALIAS)
+
+                # Read your writes
+                self.assertEqual(self.router.db_for_write(Article), DEFAULT_DB_ALIAS)
+                self.assertEqual(self._db_for_read(), DEFAULT_DB_ALIAS)
+
+            with replica_reads():
+                with primary_reads():
+                    pin_primary()
+                self.assertEqual(self._db_for_read(), DEFAULT_DB_ALIAS)
+
+        with replica_reads():
+            self.assertEqual(self._db_for_read(), DEFAULT_DB_ALIAS)
+
+    def test_unavailable_replica(self):
+        # "replica_0" isn't configured, so connecting to it fails.
+        with patch.object(transaction.get_connection(), "in_atomic_block", False):
+            with replica_reads():
+                self.assertEqual(self._db_for_read(), DEFAULT_DB_ALIAS)
+                self.assertIn(_REPLICA_ALIAS, routers._unavailable_until)
+                # Not retried until the retry time
+                with patch("resource_management.routers.connections") as connections:
+                    self.assertEqual(self._db_for_read(), DEFAULT_DB_ALIAS)
+                    connections[_REPLICA_ALIAS].ensure_connection.assert_not_called()
+
+    def test_allow_migrate(self):
+        self.assertTrue(
+            self.router.allow_migrate(DEFAULT_DB_ALIAS, "resource_management")
+        )
+        self.assertFalse(
+            self.router.allow_migrate(_REPLICA_ALIAS, "resource_management")
+        )
+
+
+@override_settings(DB_REPLICA_ALIASES=[_REPLICA_ALIAS], DB_REPLICA_PIN_SECONDS=5)
+class ReplicaReadMiddlewareTestCase(TestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    @staticmethod
+    def _get_response(request, pin=False):
+        states = []
+
+        def get_response(_):
+            states.append(routers._routing_state.get().replica_reads)
+            if pin:
+                pin_primary()
+            return HttpResponse()
+
+        response = ReplicaReadMiddleware(get_response)(request)
+        return states[0], response.cookies.get(PRIMARY_PIN_COOKIE)
+
+    def test_replica_reads(self):
+        replica_reads_enabled, cookie = self._get_response(self.factory.get("/"))
+        self.assertTrue(replica_reads_enabled)
+        self.assertIsNone(cookie)
+
+        replica_reads_enabled, _ = self._get_response(self.factory.post("/"))
+        self.assertFalse(replica_reads_enabled)
+
+        with override_settings(DB_REPLICA_ALIASES=[]):
+            replica_reads_enabled, _ = self._get_response(self.factory.get("/"))
+            self.assertFalse(replica_reads_enabled)
+
+    def test_pin_cookie(self):
+        _, cookie = self._get_response(self.factory.get("/"), pin=True)
+        self.assertEqual(cookie["max-age"], 5)
+
+        request = self.factory.get("/")
+        request.COOKIES[PRIMARY_PIN_COOKIE] = cookie.value
+        replica_reads_enabled, _ = self._get_response(request)
+        self.assertFalse(replica_reads_enabled)
+
+    @override_settings(UPLOAD_API_TOKEN="test-upload-token")
+    def test_finished_upload_job(self):
+        job = UploadJob.objects.create(synonym="test-article", archive_path="/tmp/x")
+        url = "/resource/upload_jobs/{0:s}".format(str(job.uuid))
+        headers = {"HTTP_AUTHORIZATION": "Bearer test-upload-token"}
+        response = self.client.get(url, **headers)
+        self.assertNotIn(PRIMARY_PIN_COOKIE, response.cookies)
+
+        job.status = UploadJob.JobStatus.SUCCEEDED
+        job.finished = timezone.now()
+        job.save()
+        response = self.client.get(url, **headers)
+        self.assertIn(PRIMARY_PIN_COOKIE, response.cookies)
@@ -1,4 +1,6 @@
+import os
 from os.path import dirname, join as path_join
+from shutil import rmtree
 
 from django.conf import settings
 from django.test import override_settings
@@ -13,3 +15,16 @@ def use_test_image_dir(f):
         OPENED_IMAGE_DIR=settings.OPENED_IMAGE_DIR_TEST,
         PROTECTED_IMAGE_DIR=settings.PROTECTED_IMAGE_DIR_TEST,
     )(f)
+
+
+def clear_test_image_dirs() -> None:
+    for dir_path in (
+        settings.OPENED_IMAGE_DIR_TEST,
+        settings.PROTECTED_IMAGE_DIR_TEST,
+    ):
+        with os.scandir(dir_path) as it:
+            for dir_entry in it:
+                if dir_entry.is_dir(follow_symlinks=False):
+                    rmtree(dir_entry.path)
+                else:
+                    os.remove(dir_entry.path)
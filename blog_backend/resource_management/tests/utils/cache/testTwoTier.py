@@ -0,0 +1,128 @@
+from tempfile import TemporaryDirectory
+from time import monotonic
+from unittest.mock import patch
+
+from django.test import SimpleTestCase, override_settings
+
+import resource_management.utils.cache.two_tier as two_tier
+from resource_management.utils.cache import LocalLRU, TwoTierCache
+
+_CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "shared": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "two-tier-test",
+    },
+}
+
+
+class LocalLRUTestCase(SimpleTestCase):
+    def test_eviction(self):
+        lru = LocalLRU(max_entries=2, max_bytes=100)
+        lru.set("a", b"1", float("inf"))
+        lru.set("b", b"2", float("inf"))
+        lru.get("a")
+        lru.set("c", b"3", float("inf"))
+        self.assertEqual(lru.get("b"), None)
+        self.assertEqual(lru.get("a"), b"1")
+
+        lru.set("d", b"4" * 25, float("inf"))
+        lru.set("e", b"5" * 25, float("inf"))
+        self.assertEqual(len(lru), 2)
+        # Too large to be kept
+        lru.set("f", b"6" * 26, float("inf"))
+        self.assertIsNone(lru.get("f"))
+
+    def test_expiry(self):
+        lru = LocalLRU(max_entries=2, max_bytes=100)
+        lru.set("a", b"1", 0.0)
+        self.assertIsNone(lru.get("a"))
+        self.assertEqual(len(lru), 0)
+
+
+@override_settings(CACHES=_CACHES)
+class TwoTierCacheTestCase(SimpleTestCase):
+    def setUp(self):
+        local_tiers = patch.dict(two_tier._local_tiers, clear=True)
+        local_tiers.start()
+        self.addCleanup(local_tiers.stop)
+        self.cache = self._create_worker_cache()
+        self.cache.clear()
+
+    @staticmethod
+    def _create_worker_cache():
+        # Each worker process has its own local tier.
+        with patch.dict(two_tier._local_tiers, clear=True):
+            return TwoTierCache("shared", {"OPTIONS": {"GENERATION_CHECK_INTERVAL": 0}})
+
+    def test_local_hit(self):
+        self.cache.set("key", [1, 2])
+        with patch.object(TwoTierCache, "shared") as shared:
+            shared.get.return_value = self.cache.local.generation
+            self.assertEqual(self.cache.get("key"), [1, 2])
+            self.assertEqual(self.cache.get_many(["key"]), {"key": [1, 2]})
+            # Only the generation is checked
+            for call in shared.get.call_args_list:
+                self.assertEqual(call[0], (two_tier._GENERATION_KEY,))
+            shared.get_many.assert_not_called()
+
+        # Values are copies
+        self.cache.get("key").append(3)
+        self.assertEqual(self.cache.get("key"), [1, 2])
+
+    def test_timeout(self):
+        self.cache.set("key", 1, timeout=0)
+        self.assertIsNone(self.cache.get("key"))
+        self.assertEqual(len(self.cache.local), 0)
+
+    def test_invalidation(self):
+        other_cache = self._create_worker_cache()
+        self.cache.set("key", 1)
+        self.cache.set("counter", 1)
+        self.assertEqual(other_cache.get("key"), 1)
+        self.assertEqual(other_cache.get("counter"), 1)
+
+        self.cache.incr("counter")
+        self.assertEqual(other_cache.get("counter"), 2)
+        # Local tier of the process making changes stays filled.
+        self.assertEqual(len(self.cache.local), 1)
+        self.cache.delete("key")
+        self.assertIsNone(other_cache.get("key"))
+
+        # Changes of both processes are seen
+        other_cache.get("counter")
+        other_cache.delete("key")
+        self.cache.delete("other-key")
+        other_cache.set("counter", 3)
+        self.assertEqual(other_cache.local.generation + 1, self.cache.local.generation)
+        self.assertEqual(self.cache.get("counter"), 3)
+
+    def test_shared_expiry(self):
+        with TemporaryDirectory() as cache_dir:
+            file_caches = dict(
+                _CACHES,
+                shared={
+                    "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+                    "LOCATION": cache_dir,
+                },
+            )
+            for caches in (_CACHES, file_caches):
+                with self.subTest(backend=caches["shared"]["BACKEND"]):
+                    with override_settings(CACHES=caches):
+                        self._test_shared_expiry(self._create_worker_cache())
+
+    def _test_shared_expiry(self, cache):
+        # Entries read from shared tier don't outlive their expiry there.
+        cache.shared.set("key", 1, timeout=2)
+        cache.shared.set("other-key", 2, timeout=None)
+        self.assertEqual(cache.get("key"), 1)
+        self.assertEqual(cache.get_many(["other-key"]), {"other-key": 2})
+        _, expires_at = cache.local._entries[cache.make_key("key")]
+        self.assertLessEqual(expires_at, monotonic() + 2)
+        _, expires_at = cache.local._entries[cache.make_key("other-key")]
+        self.assertGreater(expires_at, monotonic() + 4)
+
+        cache.shared.set("key", 1, timeout=0)
+        cache.local.clear()
+        self.assertIsNone(cache.get("key"))
+        self.assertEqual(len(cache.local), 0)
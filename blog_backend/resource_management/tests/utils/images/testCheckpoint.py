@@ -0,0 +1,45 @@
+from os import stat
+from os.path import join as path_join
+from tempfile import TemporaryDirectory
+
+from django.test import SimpleTestCase
+from PIL import Image as PILImage
+
+from resource_management.tests.test_utils import TEST_FILE_ROOT_DIR
+from resource_management.utils.images import resize_image, RenditionCheckpoint
+
+_SOURCE_IMAGE_PATH = path_join(TEST_FILE_ROOT_DIR, "TestData_Raw/img/red-fox.jpg")
+
+
+class RenditionCheckpointTestCase(SimpleTestCase):
+    def test_store_and_load(self):
+        with open(_SOURCE_IMAGE_PATH, "rb") as fd_r:
+            resized_image = resize_image(fd_r)
+
+        with TemporaryDirectory() as checkpoint_dir:
+            checkpoint = RenditionCheckpoint(checkpoint_dir, "bundle")
+            self.assertIsNone(checkpoint.load("image"))
+
+            stored_image = checkpoint.store(
+                "image", "jpg", resized_image, "data:image/jpeg;base64,"
+            )
+            loaded_image = checkpoint.load("image")
+            self.assertEqual(loaded_image, stored_image)
+            self.assertEqual(
+                list(loaded_image.renditions.keys()),
+                list(resized_image.renditions.keys()),
+            )
+            for resolution, rendition in loaded_image.renditions.items():
+                # Renditions can be linked to image directories.
+                self.assertEqual(stat(rendition.path).st_mode & 0o777, 0o640)
+                with PILImage.open(rendition.path) as im:
+                    self.assertEqual(im.format, "JPEG")
+                    self.assertEqual(im.size, resized_image.renditions[resolution].size)
+
+            # Damaged renditions are not reused
+            with open(rendition.path, "r+b") as fd_w:
+                fd_w.write(b"\0")
+            self.assertIsNone(checkpoint.load("image"))
+
+            checkpoint.clear()
+            self.assertIsNone(checkpoint.load("image"))
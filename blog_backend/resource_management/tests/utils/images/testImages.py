@@ -0,0 +1,220 @@
+import tarfile
+from base64 import b64decode
+from hashlib import sha256
+from io import BytesIO
+from os import chmod, listdir, stat
+from os.path import exists, join as path_join, samefile
+from tempfile import TemporaryDirectory
+
+from django.conf import settings
+from django.test import SimpleTestCase
+from PIL import Image as PILImage
+
+from resource_management.models import Image
+from resource_management.utils.instrumentation import METRICS
+from resource_management.tests.test_utils import (
+    use_test_image_dir,
+    clear_test_image_dirs,
+    TEST_FILE_ROOT_DIR,
+)
+from resource_management.utils.images import (
+    create_placeholder,
+    load_placeholder,
+    get_image_full_path,
+    get_image_group,
+    set_image_permission,
+    save_image,
+    resize_image,
+    estimate_resize_bytes,
+    ImageWriteBatch,
+)
+
+_SOURCE_IMAGE_PATH = path_join(TEST_FILE_ROOT_DIR, "TestData_Raw/img/red-fox.jpg")
+
+
+class SaveImageTestCase(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        with open(_SOURCE_IMAGE_PATH, "rb") as fd_r:
+            cls.content = fd_r.read()
+        cls.digest = sha256(cls.content).hexdigest()
+
+    @staticmethod
+    def _create_entry():
+        return Image(
+            alias="red-fox",
+            extension="jpg",
+            resolution=Image.ImageResolutionType.ORIGINAL,
+        )
+
+    def _assert_saved(self, entry, info):
+        self.assertEqual(info.bytes_written, len(self.content))
+        self.assertEqual(info.sha256, self.digest)
+        with open(get_image_full_path(entry), "rb") as fd_r:
+            self.assertEqual(fd_r.read(), self.content)
+
+    @use_test_image_dir
+    def test_save_image_from_stream(self):
+        entry = self._create_entry()
+        info = save_image(entry, img_stream=BytesIO(self.content))
+        self._assert_saved(entry, info)
+
+    @use_test_image_dir
+    def test_save_image_metrics(self):
+        images_written = METRICS.counter(
+            "blog_images_written_total", "", ["resolution"]
+        )
+        bytes_written = METRICS.counter(
+            "blog_image_bytes_written_total", "", ["resolution"]
+        )
+        previous_images = images_written.get(resolution="original")
+        previous_bytes = bytes_written.get(resolution="original")
+        save_image(self._create_entry(), img_stream=BytesIO(self.content))
+        self.assertEqual(images_written.get(resolution="original"), previous_images + 1)
+        self.assertEqual(
+            bytes_written.get(resolution="original"),
+            previous_bytes + len(self.content),
+        )
+
+    @use_test_image_dir
+    def test_save_image_from_file(self):
+        entry = self._create_entry()
+        with open(_SOURCE_IMAGE_PATH, "rb") as fd_r:
+            info = save_image(entry, img_stream=fd_r)
+        self._assert_saved(entry, info)
+
+    @use_test_image_dir
+    def test_save_image_from_archive(self):
+        archive_buffer = BytesIO()
+        with tarfile.open(fileobj=archive_buffer, mode="w:gz") as archive:
+            archive.add(_SOURCE_IMAGE_PATH, arcname="red-fox.jpg")
+        archive_buffer.seek(0)
+
+        entry = self._create_entry()
+        with tarfile.open(fileobj=archive_buffer, mode="r:gz") as archive:
+            with archive.extractfile("red-fox.jpg") as image_stream:
+                info = save_image(entry, img_stream=image_stream)
+        self._assert_saved(entry, info)
+
+    def test_placeholder(self):
+        with open(_SOURCE_IMAGE_PATH, "rb") as fd_r:
+            placeholder = load_placeholder(fd_r)
+        with PILImage.open(_SOURCE_IMAGE_PATH) as im:
+            source_size = im.size
+            full_placeholder = create_placeholder(im)
+
+        prefix = "data:image/jpeg;base64,"
+        for data_uri in (placeholder, full_placeholder):
+            self.assertTrue(data_uri.startswith(prefix))
+            with PILImage.open(BytesIO(b64decode(data_uri[len(prefix) :]))) as im:
+                self.assertEqual(max(im.size), 16)
+                # Aspect ratio is kept
+                self.assertAlmostEqual(
+                    im.size[0] / im.size[1],
+                    source_size[0] / source_size[1],
+                    delta=0.1,
+                )
+
+    @staticmethod
+    def _create_rendition_entries(resolutions):
+        return [
+            Image(alias="red-fox", extension="jpg", resolution=resolution)
+            for resolution in resolutions
+        ]
+
+    @use_test_image_dir
+    def test_image_write_batch(self):
+        with open(_SOURCE_IMAGE_PATH, "rb") as fd_r:
+            renditions = resize_image(fd_r).renditions
+        entries = self._create_rendition_entries(renditions.keys())
+        original_entry = self._create_entry()
+
+        with ImageWriteBatch(max_workers=2) as write_batch:
+            for entry, image_buffer in zip(entries, renditions.values()):
+                write_batch.save_buffer(entry, image_buffer)
+            with open(_SOURCE_IMAGE_PATH, "rb") as fd_r:
+                info = write_batch.save_stream(original_entry, fd_r)
+            self.assertEqual(info.sha256, self.digest)
+            # Nothing is visible before publishing
+            self.assertFalse(exists(get_image_full_path(original_entry)))
+
+            staged_images = write_batch.publish()
+
+        self.assertEqual(len(staged_images), len(entries) + 1)
+        self._assert_saved(original_entry, info)
+        for entry, image_buffer in zip(entries, renditions.values()):
+            with PILImage.open(get_image_full_path(entry)) as im:
+                self.assertEqual(im.format, "JPEG")
+                self.assertEqual(im.size, image_buffer.size)
+        # No temporary files are left
+        self.assertEqual(len(listdir(settings.OPENED_IMAGE_DIR)), len(entries))
+        self.assertEqual(len(listdir(settings.PROTECTED_IMAGE_DIR)), 1)
+
+    @use_test_image_dir
+    def test_image_write_batch_error(self):
+        with open(_SOURCE_IMAGE_PATH, "rb") as fd_r:
+            renditions = resize_image(fd_r).renditions
+        entries = self._create_rendition_entries(
+            (Image.ImageResolutionType.LOW, Image.ImageResolutionType.MEDIUM)
+        )
+        # The second one can't be encoded with unknown extension.
+        entries[1].extension = "unknown"
+
+        with self.assertRaises(KeyError):
+            with ImageWriteBatch(max_workers=2) as write_batch:
+                write_batch.save_buffer(
+                    entries[0], renditions[Image.ImageResolutionType.LOW]
+                )
+                write_batch.save_buffer(
+                    entries[1], renditions[Image.ImageResolutionType.MEDIUM]
+                )
+                write_batch.publish()
+
+        # Written files are discarded as well
+        self.assertFalse(listdir(settings.OPENED_IMAGE_DIR))
+
+    @use_test_image_dir
+    def test_image_write_batch_link(self):
+        linked_entry, copied_entry = self._create_entry(), self._create_entry()
+        with TemporaryDirectory() as source_dir:
+            linked_path = path_join(source_dir, "linked.jpg")
+            copied_path = path_join(source_dir, "copied.jpg")
+            for path in (linked_path, copied_path):
+                with open(path, "wb") as fd_w:
+                    fd_w.write(self.content)
+            # Only files with permission of the target are linked.
+            set_image_permission(linked_path, get_image_group(linked_entry))
+            chmod(copied_path, 0o644)
+
+            with ImageWriteBatch(max_workers=2) as write_batch:
+                write_batch.save_file(linked_entry, linked_path)
+                write_batch.save_file(copied_entry, copied_path)
+                write_batch.publish()
+
+            self.assertTrue(samefile(linked_path, get_image_full_path(linked_entry)))
+            self.assertFalse(samefile(copied_path, get_image_full_path(copied_entry)))
+            self.assertEqual(stat(copied_path).st_mode & 0o777, 0o644)
+            with open(get_image_full_path(copied_entry), "rb") as fd_r:
+                self.assertEqual(fd_r.read(), self.content)
+
+    def test_resize_image_pixel_budget(self):
+        with open(_SOURCE_IMAGE_PATH, "rb") as fd_r:
+            resized_image = resize_image(fd_r)
+            fd_r.seek(0)
+            reduced_image = resize_image(fd_r, pixel_budget=1)
+            fd_r.seek(0)
+            full_bytes = estimate_resize_bytes(fd_r)
+            fd_r.seek(0)
+            reduced_bytes = estimate_resize_bytes(fd_r, pixel_budget=1)
+
+        # Renditions are of the same size, but decoded from less pixels.
+        self.assertEqual(reduced_image.original_size, resized_image.original_size)
+        self.assertEqual(
+            [im.size for im in reduced_image.renditions.values()],
+            [im.size for im in resized_image.renditions.values()],
+        )
+        self.assertLess(reduced_bytes, full_bytes)
+
+    def tearDown(self):
+        clear_test_image_dirs()
@@ -0,0 +1,81 @@
+import os
+from os.path import exists, getsize, join as path_join
+from tempfile import TemporaryDirectory
+
+from django.test import TestCase
+from PIL import Image as PILImage
+
+from resource_management.models import Article, Image
+from resource_management.tests.test_utils import use_test_image_dir, TEST_FILE_ROOT_DIR
+from resource_management.utils.images import RenditionCache
+
+_SOURCE_IMAGE_PATH = path_join(TEST_FILE_ROOT_DIR, "TestData_Raw/img/red-fox.jpg")
+
+
+class RenditionCacheTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.article = Article.objects.create(
+            synonym="test-article",
+            title="Test Article",
+        )
+        with PILImage.open(_SOURCE_IMAGE_PATH) as im:
+            cls.source_size = im.size
+        cls.entries = [
+            Image.objects.create(
+                article=cls.article,
+                alias="red-fox",
+                extension="jpg",
+                resolution=resolution,
+                width=width,
+                height=int(cls.source_size[1] * width / cls.source_size[0]),
+            )
+            for resolution, width in (
+                (Image.ImageResolutionType.LOW, 320),
+                (Image.ImageResolutionType.MEDIUM, 640),
+                (Image.ImageResolutionType.LARGE, 960),
+            )
+        ]
+
+    def setUp(self):
+        self.cache_dir = TemporaryDirectory()
+
+    @use_test_image_dir
+    def test_get_or_create(self):
+        cache = RenditionCache(self.cache_dir.name, 1024 * 1024 * 1024)
+        entry = self.entries[0]
+        path = cache.get_or_create(entry, _SOURCE_IMAGE_PATH)
+        self.assertEqual(path, path_join(self.cache_dir.name, entry.file_name))
+        with PILImage.open(path) as im:
+            self.assertEqual(im.size, (entry.width, entry.height))
+            self.assertEqual(im.format, "JPEG")
+
+        # Cached file is reused on later access
+        mtime = os.stat(path).st_mtime_ns
+        os.utime(path, ns=(mtime - 10 ** 9, mtime - 10 ** 9))
+        self.assertEqual(cache.get_or_create(entry, _SOURCE_IMAGE_PATH), path)
+        self.assertGreaterEqual(os.stat(path).st_mtime_ns, mtime)
+        # No temporary files are left
+        self.assertEqual(
+            [name for name in os.listdir(self.cache_dir.name) if name.endswith(".jpg")],
+            [entry.file_name],
+        )
+
+    @use_test_image_dir
+    def test_evict(self):
+        cache = RenditionCache(self.cache_dir.name, 1024 * 1024 * 1024)
+        paths = [
+            cache.get_or_create(entry, _SOURCE_IMAGE_PATH) for entry in self.entries
+        ]
+        # Make the first one the most recently used
+        for index, path in enumerate(paths):
+            os.utime(path, (index, index if index else len(paths)))
+        # Eviction stops at 90% of the limit
+        cache.max_bytes = int(getsize(paths[0]) / 0.9) + 1
+        self.assertGreater(cache.evict(), 0)
+        self.assertTrue(exists(paths[0]))
+        self.assertFalse(exists(paths[1]))
+        self.assertFalse(exists(paths[2]))
+
+    def tearDown(self):
+        self.cache_dir.cleanup()
@@ -0,0 +1,78 @@
+from os.path import getsize, join as path_join
+from threading import Thread
+
+from django.test import SimpleTestCase
+
+from resource_management.models import Image
+from resource_management.tests.test_utils import TEST_FILE_ROOT_DIR
+from resource_management.utils.images import MemoryBudget, RenditionPool
+
+_SOURCE_IMAGE_PATH = path_join(TEST_FILE_ROOT_DIR, "TestData_Raw/img/red-fox.jpg")
+
+
+class MemoryBudgetTestCase(SimpleTestCase):
+    def test_acquire(self):
+        budget = MemoryBudget(100)
+        # Oversized reservation is granted when nothing else is reserved.
+        budget.acquire(150)
+        self.assertEqual(budget.reserved_bytes, 150)
+
+        waiter = Thread(target=budget.acquire, args=(10,))
+        waiter.start()
+        waiter.join(timeout=0.1)
+        self.assertTrue(waiter.is_alive())
+
+        budget.release(150)
+        waiter.join(timeout=5)
+        self.assertFalse(waiter.is_alive())
+        self.assertEqual(budget.reserved_bytes, 10)
+
+
+class RenditionPoolTestCase(SimpleTestCase):
+    @staticmethod
+    def _open_source():
+        return open(_SOURCE_IMAGE_PATH, "rb")
+
+    def test_submit(self):
+        budget = MemoryBudget(1)
+        with RenditionPool(max_workers=2, memory_budget=budget) as pool:
+            futures = [
+                pool.submit(self._open_source, getsize(_SOURCE_IMAGE_PATH), lambda r: r)
+                for _ in range(3)
+            ]
+            results = [future.result() for future in futures]
+
+        self.assertEqual(budget.reserved_bytes, 0)
+        for resized_image in results:
+            self.assertIn(Image.ImageResolutionType.LOW, resized_image.renditions)
+            self.assertEqual(resized_image.original_size, results[0].original_size)
+
+    def test_submit_read_after_reserved(self):
+        opened_streams = []
+
+        def open_source():
+            opened_streams.append(self._open_source())
+            return opened_streams[-1]
+
+        budget = MemoryBudget(1)
+        budget.acquire(1)
+        with RenditionPool(max_workers=1, memory_budget=budget) as pool:
+            futures = []
+            submitter = Thread(
+                target=lambda: futures.append(
+                    pool.submit(open_source, getsize(_SOURCE_IMAGE_PATH), len)
+                )
+            )
+            submitter.start()
+            submitter.join(timeout=0.1)
+            # Only the header is read to estimate memory usage.
+            self.assertTrue(submitter.is_alive())
+            self.assertEqual(len(opened_streams), 1)
+
+            budget.release(1)
+            submitter.join(timeout=5)
+            self.assertFalse(submitter.is_alive())
+            self.assertEqual(len(opened_streams), 2)
+            futures[0].result()
+
+        self.assertEqual(budget.reserved_bytes, 0)
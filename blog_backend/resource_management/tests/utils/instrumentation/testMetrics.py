@@ -0,0 +1,154 @@
+import os
+from json import dump as json_dump
+from subprocess import Popen
+from tempfile import TemporaryDirectory
+
+from django.test import SimpleTestCase
+
+from resource_management.utils.instrumentation import (
+    MetricsRegistry,
+    compact_metrics_dir,
+    format_metrics,
+    read_metrics_dir,
+    write_metrics_file,
+)
+
+
+class MetricsRegistryTestCase(SimpleTestCase):
+    def setUp(self):
+        self.registry = MetricsRegistry()
+        self.requests = self.registry.counter(
+            "test_requests_total", "Requests.", ["route"]
+        )
+        self.workers = self.registry.gauge("test_workers", "Workers.")
+        self.latency = self.registry.histogram(
+            "test_latency_seconds", "Latency.", ["route"], buckets=(0.1, 1.0)
+        )
+
+    def test_register(self):
+        self.assertIs(
+            self.registry.counter("test_requests_total", "", ["route"]), self.requests
+        )
+        self.assertRaises(
+            ValueError, self.registry.gauge, "test_requests_total", "", ["route"]
+        )
+        self.assertRaises(
+            ValueError, self.registry.counter, "test_requests_total", "", ["path"]
+        )
+        self.assertEqual(self.latency.buckets, (0.1, 1.0, float("inf")))
+
+    def test_update(self):
+        self.assertFalse(self.registry.dirty)
+        self.requests.inc(route="a")
+        self.requests.inc(2, route="a")
+        self.assertEqual(self.requests.get(route="a"), 3)
+        self.assertTrue(self.registry.dirty)
+        self.assertRaises(ValueError, self.requests.inc, -1, route="a")
+        self.assertRaises(ValueError, self.requests.inc, path="a")
+        self.assertRaises(ValueError, self.requests.inc)
+
+        self.workers.set(4)
+        self.assertEqual(self.workers.get(), 4)
+        self.latency.observe(0.5, route="a")
+        self.assertEqual(self.latency.get(route="a").counts, (0, 1, 0))
+        self.assertEqual(self.latency.get(route="b").count, 0)
+
+        self.registry.reset()
+        self.assertEqual(self.requests.get(route="a"), 0)
+        self.assertEqual(self.latency.get(route="a").count, 0)
+
+    def test_format_metrics(self):
+        self.requests.inc(route='say "hi"\\')
+        self.workers.set(2)
+        self.latency.observe(0.05, route="a")
+        self.latency.observe(5.0, route="a")
+        self.assertEqual(
+            format_metrics(self.registry.dump()),
+            "# HELP test_requests_total Requests.\n"
+            "# TYPE test_requests_total counter\n"
+            'test_requests_total{route="say \\"hi\\"\\\\"} 1.0\n'
+            "# HELP test_workers Workers.\n"
+            "# TYPE test_workers gauge\n"
+            "test_workers 2.0\n"
+            "# HELP test_latency_seconds Latency.\n"
+            "# TYPE test_latency_seconds histogram\n"
+            'test_latency_seconds_bucket{route="a",le="0.1"} 1\n'
+            'test_latency_seconds_bucket{route="a",le="1.0"} 1\n'
+            'test_latency_seconds_bucket{route="a",le="+Inf"} 2\n'
+            'test_latency_seconds_sum{route="a"} 5.05\n'
+            'test_latency_seconds_count{route="a"} 2\n',
+        )
+
+    @staticmethod
+    def _write_process_file(directory, pid, started, registry):
+        path = os.path.join(directory, "{0:d}-{1:d}.json".format(pid, started))
+        with open(path, "w") as fd_w:
+            json_dump(
+                {"pid": pid, "started": started, "metrics": registry.dump()}, fd_w
+            )
+
+    def test_read_metrics_dir(self):
+        self.requests.inc(route="a")
+        self.workers.set(2)
+        self.latency.observe(0.05, route="a")
+
+        # Process which exited: its gauges are dropped.
+        process = Popen(["true"])
+        process.wait()
+        exited = MetricsRegistry()
+        exited.counter("test_requests_total", "Requests.", ["route"]).inc(route="a")
+        exited.counter("test_requests_total", "Requests.", ["route"]).inc(route="b")
+        exited.gauge("test_workers", "Workers.").set(3)
+        exited.histogram(
+            "test_latency_seconds", "Latency.", ["route"], buckets=(0.1, 1.0)
+        ).observe(0.5, route="a")
+
+        with TemporaryDirectory() as directory:
+            write_metrics_file(self.registry, directory)
+            self.assertFalse(self.registry.dirty)
+            self._write_process_file(directory, process.pid, 1, exited)
+            # Not a metrics file
+            with open(os.path.join(directory, "notes.json"), "w") as fd_w:
+                fd_w.write("{")
+            merged = read_metrics_dir(directory)
+
+        self.assertEqual(
+            sorted(merged["test_requests_total"]["samples"]), [[["a"], 2], [["b"], 1]]
+        )
+        self.assertEqual(merged["test_workers"]["samples"], [[[], 2]])
+        self.assertEqual(
+            merged["test_latency_seconds"]["samples"], [[["a"], [[1, 1, 0], 0.55]]]
+        )
+
+    def test_compact_metrics_dir(self):
+        self.requests.inc(route="a")
+        self.workers.set(2)
+        # Exited process whose pid is reused by this one.
+        exited = MetricsRegistry()
+        exited.counter("test_requests_total", "Requests.", ["route"]).inc(route="a")
+        exited.gauge("test_workers", "Workers.").set(3)
+
+        with TemporaryDirectory() as directory:
+            write_metrics_file(self.registry, directory)
+            self._write_process_file(directory, os.getpid(), 1, exited)
+            merged = read_metrics_dir(directory)
+            self.assertEqual(merged["test_requests_total"]["samples"], [[["a"], 2]])
+            self.assertEqual(merged["test_workers"]["samples"], [[[], 2]])
+
+            self.assertEqual(compact_metrics_dir(directory), 1)
+            self.assertEqual(compact_metrics_dir(directory), 0)
+            file_names = os.listdir(directory)
+            self.assertEqual(len(file_names), 3)
+            self.assertIn("aggregate.json", file_names)
+            self.assertFalse(
+                os.path.exists(
+                    os.path.join(directory, "{0:d}-1.json".format(os.getpid()))
+                )
+            )
+
+            # Totals never go back.
+            self.requests.inc(route="a")
+            write_metrics_file(self.registry, directory)
+            merged = read_metrics_dir(directory)
+            self.assertEqual(merged["test_requests_total"]["samples"], [[["a"], 3]])
+            self.assertEqual(merged["test_workers"]["samples"], [[[], 2]])
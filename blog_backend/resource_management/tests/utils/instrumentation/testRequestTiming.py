@@ -0,0 +1,75 @@
+from json import loads as json_loads
+
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from resource_management.middleware import SERVER_TIMING_HEADER, UNMATCHED_ROUTE
+from resource_management.models import Tag
+from resource_management.utils.instrumentation import (
+    LATENCY_BUCKETS,
+    LatencyHistogram,
+    QueryTimer,
+    get_request_latencies,
+    reset_request_latencies,
+)
+
+
+class LatencyHistogramTestCase(SimpleTestCase):
+    def test_observe(self):
+        histogram = LatencyHistogram(buckets=(0.1, 1.0, float("inf")))
+        for seconds in (0.05, 0.1, 0.5, 30.0):
+            histogram.observe(seconds)
+
+        snapshot = histogram.snapshot()
+        self.assertEqual(snapshot.counts, (2, 1, 1))
+        self.assertEqual(snapshot.count, 4)
+        self.assertAlmostEqual(snapshot.total, 30.65)
+        self.assertEqual(snapshot.get_percentile(50), 0.1)
+        self.assertEqual(snapshot.get_percentile(75), 1.0)
+        self.assertEqual(snapshot.get_percentile(100), float("inf"))
+        self.assertEqual(LatencyHistogram().snapshot().get_percentile(99), 0.0)
+
+
+class QueryTimerTestCase(TestCase):
+    def test_count_queries(self):
+        query_timer = QueryTimer()
+        with connection.execute_wrapper(query_timer):
+            Tag.objects.create(tag_name="tag1")
+            list(Tag.objects.all())
+        self.assertEqual(query_timer.count, 2)
+        self.assertGreater(query_timer.duration, 0)
+
+
+@override_settings(REQUEST_TIMING_ENABLED=True)
+class RequestTimingMiddlewareTestCase(TestCase):
+    def setUp(self):
+        reset_request_latencies()
+        self.addCleanup(reset_request_latencies)
+
+    def test_request_timing(self):
+        Tag.objects.create(tag_name="tag1")
+        with self.assertLogs("resource_management.requests", "INFO") as logs:
+            response = self.client.get("/resource/get_tag_list/")
+            self.client.get("/resource/get_tag_list/")
+            self.client.get("/resource/no_such_view")
+
+        self.assertRegex(
+            response[SERVER_TIMING_HEADER],
+            r'^app;dur=[0-9.]+, db;dur=[0-9.]+;desc="[1-9][0-9]* queries"$',
+        )
+        entry = json_loads(logs.records[0].getMessage())
+        self.assertEqual(entry["route"], "resource/get_tag_list/")
+        self.assertEqual(entry["path"], "/resource/get_tag_list/")
+        self.assertEqual(entry["status"], 200)
+        self.assertGreater(entry["db_queries"], 0)
+
+        latencies = get_request_latencies()
+        self.assertEqual(set(latencies), {"resource/get_tag_list/", UNMATCHED_ROUTE})
+        self.assertEqual(latencies["resource/get_tag_list/"].count, 2)
+        self.assertEqual(latencies["resource/get_tag_list/"].buckets, LATENCY_BUCKETS)
+
+    @override_settings(REQUEST_TIMING_ENABLED=False)
+    def test_disabled(self):
+        response = self.client.get("/resource/get_tag_list/")
+        self.assertFalse(response.has_header(SERVER_TIMING_HEADER))
+        self.assertEqual(get_request_latencies(), {})
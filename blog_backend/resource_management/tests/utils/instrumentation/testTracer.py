@@ -0,0 +1,73 @@
+from io import StringIO
+from json import loads as json_loads
+
+from django.test import SimpleTestCase
+
+from resource_management.utils.instrumentation import (
+    Tracer,
+    get_tracer,
+    use_tracer,
+    traced,
+)
+
+
+@traced("traced_function")
+def _traced_function(value):
+    get_tracer().add("calls")
+    return value
+
+
+class TracerTestCase(SimpleTestCase):
+    def test_span(self):
+        tracer = Tracer()
+        with tracer.span("outer", key="value") as attributes:
+            with tracer.span("inner"):
+                pass
+            with tracer.span("inner"):
+                pass
+            attributes["added"] = 1
+        tracer.add("bytes", 10)
+        tracer.add("bytes", 5)
+
+        self.assertEqual(len(tracer.spans), 3)
+        outer = next(span for span in tracer.spans if span.name == "outer")
+        self.assertIsNone(outer.parent_id)
+        self.assertEqual(outer.attributes, {"key": "value", "added": 1})
+        for span in tracer.spans:
+            if span.name == "inner":
+                self.assertEqual(span.parent_id, outer.span_id)
+                self.assertLessEqual(span.duration, outer.duration)
+        self.assertEqual(tracer.counters, {"bytes": 15})
+
+        fd = StringIO()
+        tracer.write_json_lines(fd)
+        records = [json_loads(line) for line in fd.getvalue().splitlines()]
+        self.assertEqual(
+            [(record["type"], record["name"]) for record in records],
+            [
+                ("span", "outer"),
+                ("span", "inner"),
+                ("span", "inner"),
+                ("counter", "bytes"),
+            ],
+        )
+
+        summary_lines = tracer.format_summary().splitlines()
+        self.assertEqual(len(summary_lines), 4)
+        self.assertTrue(summary_lines[1].startswith("outer "))
+        self.assertTrue(summary_lines[2].startswith("  inner "))
+        self.assertIn(" 2 ", summary_lines[2])
+        self.assertTrue(summary_lines[3].startswith("bytes "))
+
+    def test_use_tracer(self):
+        # Nothing is recorded without installed tracer.
+        self.assertEqual(_traced_function(1), 1)
+
+        tracer = Tracer()
+        with use_tracer(tracer):
+            self.assertIs(get_tracer(), tracer)
+            self.assertEqual(_traced_function(2), 2)
+        self.assertIsNot(get_tracer(), tracer)
+
+        self.assertEqual([span.name for span in tracer.spans], ["traced_function"])
+        self.assertEqual(tracer.counters, {"calls": 1})
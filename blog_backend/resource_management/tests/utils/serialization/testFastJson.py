@@ -0,0 +1,40 @@
+from datetime import datetime, timezone
+from decimal import Decimal
+from json import loads as json_loads
+from unittest import skipIf
+from unittest.mock import patch
+
+from django.http import JsonResponse
+from django.test import SimpleTestCase
+
+import resource_management.utils.serialization.fast_json as fast_json
+from resource_management.utils.serialization import dumps_json
+
+
+class DumpsJsonTestCase(SimpleTestCase):
+    data = {
+        "title": "Tag 標籤",
+        "created": datetime(2021, 3, 4, 5, 6, 7, 890123, tzinfo=timezone.utc),
+        "score": Decimal("1.50"),
+        "tags": ["a", "b"],
+        "prev": None,
+    }
+
+    def assert_same_as_json_response(self, content: bytes):
+        self.assertIsInstance(content, bytes)
+        self.assertEqual(
+            json_loads(content.decode("utf-8")),
+            json_loads(JsonResponse(self.data).content.decode("utf-8")),
+        )
+
+    def test_fallback(self):
+        with patch.object(fast_json, "orjson", None):
+            content = dumps_json(self.data)
+        self.assert_same_as_json_response(content)
+        # Compact, and not escaped
+        self.assertIn('"tags":["a","b"]'.encode("utf-8"), content)
+        self.assertIn("標籤".encode("utf-8"), content)
+
+    @skipIf(fast_json.orjson is None, "orjson is not installed")
+    def test_orjson(self):
+        self.assert_same_as_json_response(dumps_json(self.data))
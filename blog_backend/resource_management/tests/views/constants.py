@@ -30,6 +30,26 @@ SCHEMA_BLOG_POST_POSTS_BY_PAGE = {
 
 SCHEMA_BLOG_POST_POSTS_BY_PAGE_AND_TAG = SCHEMA_BLOG_POST_POSTS_BY_PAGE
 
+SCHEMA_BLOG_POST_POSTS_BY_PAGE_AND_TAGS = {
+    "type": "object",
+    "properties": {
+        "page_num": SCHEMA_BLOG_POST_POSTS_BY_PAGE["properties"]["page_num"],
+        "tags": {"type": "array", "items": {"type": "string"}},
+        "match_all": {"type": "boolean"},
+        "has_next_page": {"type": "boolean"},
+        "has_prev_page": {"type": "boolean"},
+        "posts": SCHEMA_BLOG_POST_POSTS_BY_PAGE["properties"]["posts"],
+    },
+    "required": [
+        "page_num",
+        "tags",
+        "match_all",
+        "has_next_page",
+        "has_prev_page",
+        "posts",
+    ],
+}
+
 SCHEMA_BLOG_POST_GET_POST_DATA = {
     "type": "object",
     "properties": {
@@ -18,11 +18,15 @@ from resource_management.views.constants import (
     RESOURCE_NOT_FOUND_JSON_DATA,
     SUCCESS_CODE,
     PAGE_SIZE,
+    SURROGATE_KEY_HEADER,
+    CACHE_TAG_HEADER,
+    SURROGATE_CONTROL_HEADER,
 )
 from resource_management.tests.test_utils import TEST_FILE_ROOT_DIR
 from .constants import (
     SCHEMA_BLOG_POST_POSTS_BY_PAGE,
     SCHEMA_BLOG_POST_POSTS_BY_PAGE_AND_TAG,
+    SCHEMA_BLOG_POST_POSTS_BY_PAGE_AND_TAGS,
     SCHEMA_BLOG_POST_GET_POST_DATA,
     SCHEMA_BLOG_POST_GET_TAG_LIST,
     DATETIME_STR_FORMAT,
@@ -76,6 +80,13 @@ class ViewBlogPostTestCase(TestCase):
             for tag_entry in cls.tag_entries:
                 if tag_entry.tag_name != "tag3" or article_id in cls.tag3_article_ids:
                     ArticleTag.objects.create(article=article, tag=tag_entry)
+            # Kept in sync with tag relations, as PostUpdateHandler does
+            article.tag_names = (
+                cls.sorted_tags_full
+                if article_id in cls.tag3_article_ids
+                else cls.sorted_tags_partial
+            )
+            article.save()
 
             cls.article_list.append(
                 cls.BlogPostData(
@@ -250,6 +261,48 @@ class ViewBlogPostTestCase(TestCase):
             self.assertEqual(response.status_code, RESOURCE_NOT_FOUND_STATUS_CODE)
             self.assertDictEqual(response_json, RESOURCE_NOT_FOUND_JSON_DATA)
 
+    def _get_tag_listing_synonyms(self, match, tags, page_num):
+        response = self.client.get(
+            "/resource/posts_by_page_and_{0:s}_tags/{1:s}/{2:d}".format(
+                match, ",".join(tags), page_num
+            )
+        )
+        self.assertEqual(response.status_code, SUCCESS_CODE)
+        response_json = response.json()
+        validate(response_json, SCHEMA_BLOG_POST_POSTS_BY_PAGE_AND_TAGS)
+        self.assertEqual(response_json["tags"], tags)
+        self.assertEqual(response_json["match_all"], match == "all")
+        for post in response_json["posts"]:
+            self.assertEqual(post["tags"], self.sorted_tags_full)
+        return [post["synonym"] for post in response_json["posts"]]
+
+    def test_posts_by_page_and_tags(self):
+        expected_synonyms = [
+            self.article_list[idx].article.synonym
+            for idx in reversed(self.tag3_article_indices)
+        ]
+        for match, tags in (
+            ("all", ["tag1", "tag3"]),
+            ("any", ["tag3", "unknown-tag"]),
+        ):
+            synonyms = []
+            for page_num in range(1, 7):
+                synonyms.extend(self._get_tag_listing_synonyms(match, tags, page_num))
+            self.assertEqual(synonyms, expected_synonyms)
+
+    def test_posts_by_page_and_tags_not_found(self):
+        for match, tags in (
+            ("all", ["tag3", "unknown-tag"]),
+            ("any", ["unknown-tag", "another-tag"]),
+        ):
+            response = self.client.get(
+                "/resource/posts_by_page_and_{0:s}_tags/{1:s}/1".format(
+                    match, ",".join(tags)
+                )
+            )
+            self.assertEqual(response.status_code, RESOURCE_NOT_FOUND_STATUS_CODE)
+            self.assertDictEqual(response.json(), RESOURCE_NOT_FOUND_JSON_DATA)
+
     def test_get_post_data_mid(self):
         selected_article_id = 100
         selected_article_index = 99
@@ -342,3 +395,24 @@ class ViewBlogPostTestCase(TestCase):
         self.assertEqual(response.status_code, SUCCESS_CODE)
         validate(response.json(), SCHEMA_BLOG_POST_GET_TAG_LIST)
         self.assertDictEqual(response_json, expected)
+
+    def test_surrogate_keys(self):
+        article = self.article_list[0].article
+        response = self.client.get(
+            "/resource/get_post_data/{0:s}".format(article.synonym)
+        )
+        expected_keys = ["article-{0:d}".format(article.id)] + [
+            "tag-{0:s}".format(tag) for tag in article.tag_names
+        ]
+        self.assertEqual(response[SURROGATE_KEY_HEADER], " ".join(expected_keys))
+        self.assertEqual(response[CACHE_TAG_HEADER], ",".join(expected_keys))
+
+        response = self.client.get("/resource/posts_by_page_and_tag/tag3/1")
+        self.assertEqual(response[SURROGATE_KEY_HEADER], "page-listing tag-tag3")
+
+        response = self.client.get("/resource/get_tag_list/")
+        self.assertEqual(response[SURROGATE_KEY_HEADER], "tag-list")
+        self.assertFalse(response.has_header(SURROGATE_CONTROL_HEADER))
+        with self.settings(SURROGATE_CONTROL_MAX_AGE=86400):
+            response = self.client.get("/resource/get_tag_list/")
+            self.assertEqual(response[SURROGATE_CONTROL_HEADER], "max-age=86400")
@@ -0,0 +1,62 @@
+from tempfile import TemporaryDirectory
+from unittest.mock import patch
+
+from django.test import TestCase, override_settings
+
+from resource_management.models import Tag
+from resource_management.service.metrics import METRICS_CONTENT_TYPE
+from resource_management.views.constants import (
+    RESOURCE_NOT_FOUND_STATUS_CODE,
+    SUCCESS_CODE,
+    UNAUTHORIZED_STATUS_CODE,
+)
+
+_TOKEN = "metrics-token"
+
+
+@override_settings(METRICS_API_TOKEN=_TOKEN, METRICS_DIR="")
+class ViewMetricsTestCase(TestCase):
+    def _get_metrics(self, token=_TOKEN):
+        return self.client.get(
+            "/resource/metrics", HTTP_AUTHORIZATION="Bearer " + token
+        )
+
+    def test_get_metrics(self):
+        Tag.objects.create(tag_name="tag1")
+        self.client.get("/resource/get_tag_list/")
+
+        response = self._get_metrics()
+        self.assertEqual(response.status_code, SUCCESS_CODE)
+        self.assertEqual(response["Content-Type"], METRICS_CONTENT_TYPE)
+        content = response.content.decode("utf-8")
+        self.assertIn("# TYPE blog_request_duration_seconds histogram", content)
+        self.assertIn(
+            'blog_request_duration_seconds_bucket{route="resource/get_tag_list/",le="+Inf"}',
+            content,
+        )
+        self.assertIn(
+            'blog_requests_total{route="resource/get_tag_list/",status="200"}', content
+        )
+        self.assertIn('blog_db_connections_open{alias="default"}', content)
+
+    # Flusher thread of the test process would outlive the directory.
+    @patch("resource_management.middleware.ensure_metrics_flusher")
+    def test_get_metrics_from_dir(self, _):
+        with TemporaryDirectory() as directory:
+            with self.settings(METRICS_DIR=directory):
+                self.client.get("/resource/get_tag_list/")
+                response = self._get_metrics()
+        self.assertEqual(response.status_code, SUCCESS_CODE)
+        self.assertIn(
+            'blog_requests_total{route="resource/get_tag_list/",status="200"}',
+            response.content.decode("utf-8"),
+        )
+
+    def test_get_metrics_unauthorized(self):
+        self.assertEqual(
+            self._get_metrics("wrong-token").status_code, UNAUTHORIZED_STATUS_CODE
+        )
+        with self.settings(METRICS_API_TOKEN=""):
+            self.assertEqual(
+                self._get_metrics().status_code, RESOURCE_NOT_FOUND_STATUS_CODE
+            )
@@ -0,0 +1,84 @@
+from os.path import join as path_join
+from tempfile import TemporaryDirectory
+
+from django.test import TestCase, override_settings
+
+from resource_management.models import UploadJob
+from resource_management.views.constants import (
+    ACCEPTED_CODE,
+    BAD_REQUEST_STATUS_CODE,
+    RESOURCE_NOT_FOUND_STATUS_CODE,
+    SUCCESS_CODE,
+    UNAUTHORIZED_STATUS_CODE,
+)
+from resource_management.tests.test_utils import TEST_FILE_ROOT_DIR
+
+_TOKEN = "test-upload-token"
+
+
+class ViewUploadJobsTestCase(TestCase):
+    def setUp(self):
+        self.job_dir = TemporaryDirectory()
+        self.settings_override = override_settings(
+            UPLOAD_JOB_DIR=self.job_dir.name, UPLOAD_API_TOKEN=_TOKEN
+        )
+        self.settings_override.enable()
+
+    def _submit(self, synonym="test-article", token=_TOKEN):
+        extra = {"HTTP_AUTHORIZATION": "Bearer " + token} if token else {}
+        with open(
+            path_join(TEST_FILE_ROOT_DIR, "TestData_05_title_tag_image.tgz"), "rb"
+        ) as archive:
+            return self.client.post(
+                "/resource/upload_jobs/",
+                {"archive": archive, "synonym": synonym, "new": "1"},
+                **extra,
+            )
+
+    def test_submit_upload_job(self):
+        response = self._submit()
+        self.assertEqual(response.status_code, ACCEPTED_CODE)
+        response_json = response.json()
+        self.assertEqual(response_json["status"], "pending")
+        job = UploadJob.objects.get(uuid=response_json["id"])
+        self.assertTrue(job.create_only)
+
+        auth = {"HTTP_AUTHORIZATION": "Bearer " + _TOKEN}
+        response = self.client.get(
+            "/resource/upload_jobs/{0:s}".format(response_json["id"]), **auth
+        )
+        self.assertEqual(response.status_code, SUCCESS_CODE)
+        self.assertEqual(response.json()["synonym"], "test-article")
+        response = self.client.get(
+            "/resource/upload_jobs/{0:s}/progress".format(response_json["id"]), **auth
+        )
+        self.assertEqual(response.status_code, SUCCESS_CODE)
+        self.assertEqual(response.json()["stages"], [])
+
+    def test_submit_upload_job_unauthorized(self):
+        self.assertEqual(self._submit(token=None).status_code, UNAUTHORIZED_STATUS_CODE)
+        self.assertEqual(
+            self._submit(token="wrong-token").status_code, UNAUTHORIZED_STATUS_CODE
+        )
+        self.assertFalse(UploadJob.objects.exists())
+
+    def test_submit_upload_job_invalid_synonym(self):
+        response = self._submit(synonym="Invalid Synonym")
+        self.assertEqual(response.status_code, BAD_REQUEST_STATUS_CODE)
+        self.assertFalse(UploadJob.objects.exists())
+
+    def test_submit_upload_job_disabled(self):
+        with override_settings(UPLOAD_API_TOKEN=None):
+            response = self._submit()
+        self.assertEqual(response.status_code, RESOURCE_NOT_FOUND_STATUS_CODE)
+
+    def test_get_upload_job_status_non_exist(self):
+        response = self.client.get(
+            "/resource/upload_jobs/00000000-0000-0000-0000-000000000000",
+            HTTP_AUTHORIZATION="Bearer " + _TOKEN,
+        )
+        self.assertEqual(response.status_code, RESOURCE_NOT_FOUND_STATUS_CODE)
+
+    def tearDown(self):
+        self.settings_override.disable()
+        self.job_dir.cleanup()
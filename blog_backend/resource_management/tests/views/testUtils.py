@@ -1,7 +1,7 @@
 from django.test import TestCase
 from django.core.exceptions import ObjectDoesNotExist
 
-from resource_management.views.utils import json_404_on_error
+from resource_management.views.utils import FastJsonResponse, json_404_on_error
 from resource_management.views.constants import (
     RESOURCE_NOT_FOUND_STATUS_CODE,
     RESOURCE_NOT_FOUND_JSON_DATA,
@@ -20,3 +20,15 @@ class ViewUtilsTestCase(TestCase):
         self.assertJSONEqual(
             response.content.decode("utf-8"), RESOURCE_NOT_FOUND_JSON_DATA
         )
+
+    def test_fast_json_response(self):
+        response = FastJsonResponse({"title": "Café", "tags": ["a"]}, status=201)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response["Content-Type"], "application/json")
+        self.assertJSONEqual(
+            response.content.decode("utf-8"), {"title": "Café", "tags": ["a"]}
+        )
+
+        # Serialized content is sent as it is.
+        response = FastJsonResponse(b'{"data":[]}')
+        self.assertEqual(response.content, b'{"data":[]}')
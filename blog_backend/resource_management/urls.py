@@ -1,11 +1,25 @@
 from django.urls import path
 import resource_management.views.blog_post as blog_post
 import resource_management.views.images as images
+import resource_management.views.metrics as metrics
+import resource_management.views.upload_jobs as upload_jobs
 
 urlpatterns = [
     path("posts_by_page/<int:page>", blog_post.posts_by_page),
     path("posts_by_page_and_tag/<str:tag>/<int:page>", blog_post.posts_by_page_and_tag),
+    path(
+        "posts_by_page_and_all_tags/<str:tags>/<int:page>",
+        blog_post.posts_by_page_and_all_tags,
+    ),
+    path(
+        "posts_by_page_and_any_tags/<str:tags>/<int:page>",
+        blog_post.posts_by_page_and_any_tags,
+    ),
     path("get_post_data/<str:synonym>", blog_post.get_post_data),
     path("get_tag_list/", blog_post.get_tag_list),
     path("get_full_file_path/<str:file_name>", images.get_full_file_path),
+    path("upload_jobs/", upload_jobs.submit_upload_job),
+    path("upload_jobs/<uuid:job_id>", upload_jobs.get_upload_job_status),
+    path("upload_jobs/<uuid:job_id>/progress", upload_jobs.get_upload_job_progress),
+    path("metrics", metrics.get_metrics),
 ]
@@ -1,9 +1,19 @@
 from functools import cached_property
-from typing import NamedTuple, final
+from re import match
+from typing import Final, NamedTuple, final
 
 from diff_match_patch import diff_match_patch
 
-__all__ = ["PatchResult", "DocumentPatchCreator"]
+__all__ = ["PatchResult", "DocumentPatchCreator", "is_valid_synonym"]
+
+_SYNONYM_REGEX: Final = r"^[a-z0-9][a-z0-9\\-]+[a-z0-9]$"
+
+
+def is_valid_synonym(s: str) -> bool:
+    """Only lower-case alphabets, digits, and hyphen can be used in synonym,
+    plus it can't start or end with a hyphen.
+    """
+    return match(_SYNONYM_REGEX, s) is not None
 
 
 @final
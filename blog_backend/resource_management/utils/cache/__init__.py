@@ -0,0 +1 @@
+from .two_tier import *  # noqa: F401, F403
@@ -0,0 +1,347 @@
+import pickle
+from collections import OrderedDict
+from threading import Lock
+from time import monotonic, time, time_ns
+from typing import final, Final, Any, Dict, Iterable, List, Optional, Tuple
+
+from django.core.cache import caches
+from django.core.cache.backends.base import BaseCache, DEFAULT_TIMEOUT
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.cache.backends.locmem import LocMemCache
+
+from resource_management.utils.instrumentation import METRICS
+
+__all__ = [
+    "LocalLRU",
+    "TwoTierCache",
+]
+
+# Shared key of the generation counter. Bumped by every invalidation, so
+# other workers clear their local tier when they see it changing.
+_GENERATION_KEY: Final = "two_tier:generation"
+
+# Tier keys are read from: "local", "shared", or "miss" (in neither)
+_READS: Final = METRICS.counter(
+    "blog_two_tier_cache_reads_total",
+    "Keys read from two-tier cache, by tier.",
+    ["tier"],
+)
+
+
+@final
+class LocalLRU(object):
+    """Thread-safe LRU of pickled values, bounded by number of entries and
+    their total size. Each entry has its own expiry time.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, Tuple[bytes, float]]" = OrderedDict()
+        self._size = 0
+        self._lock = Lock()
+        # Last seen shared generation, and when it was checked.
+        self.generation: Optional[int] = None
+        self.checked_at = float("-inf")
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            pickled, expires_at = entry
+            if expires_at <= monotonic():
+                self._pop(key)
+                return None
+            self._entries.move_to_end(key)
+            return pickled
+
+    def set(self, key: str, pickled: bytes, expires_at: float) -> None:
+        # Values too large to share the space with others are not kept.
+        if len(pickled) > self.max_bytes // 4:
+            self.delete(key)
+            return
+        with self._lock:
+            self._pop(key)
+            self._entries[key] = (pickled, expires_at)
+            self._size += len(pickled)
+            while len(self._entries) > self.max_entries or self._size > self.max_bytes:
+                self._pop(next(iter(self._entries)))
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._pop(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def _pop(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._size -= len(entry[0])
+
+
+# Local tiers of the process, by cache location. Django creates a backend
+# instance per thread, while the local tier is shared by all of them.
+_local_tiers: Dict[str, LocalLRU] = {}
+_local_tiers_lock = Lock()
+
+
+@final
+class TwoTierCache(BaseCache):
+    """Per-process LRU in front of a shared cache (e.g. FileBasedCache).
+
+    LOCATION is the alias of the shared cache in CACHES. OPTIONS:
+        LOCAL_TIMEOUT: Max seconds an entry is kept in local tier (5)
+        LOCAL_MAX_ENTRIES: Max number of entries in local tier (1000)
+        LOCAL_MAX_BYTES: Max size of pickled values in local tier (64MiB)
+        GENERATION_CHECK_INTERVAL: Seconds between checks of the shared
+            generation (1)
+
+    Entries never outlive their timeout in local tier. Entries read from
+    shared tier are kept until their expiry there, which is read from
+    FileBasedCache and LocMemCache; of other backends, they're kept for up
+    to LOCAL_TIMEOUT. Deletes and incr/decr (e.g. of generation keys of
+    cached reads) bump the shared generation, and every process clears its
+    local tier once it sees the change. An entry overwritten by set() in
+    another process can be read from local tier for up to LOCAL_TIMEOUT.
+    """
+
+    def __init__(self, location: str, params: Dict[str, Any]):
+        super().__init__(params)
+        options = params.get("OPTIONS", {})
+        self.shared_alias = location
+        self.local_timeout = float(options.get("LOCAL_TIMEOUT", 5))
+        self.generation_check_interval = float(
+            options.get("GENERATION_CHECK_INTERVAL", 1)
+        )
+        with _local_tiers_lock:
+            if location not in _local_tiers:
+                _local_tiers[location] = LocalLRU(
+                    int(options.get("LOCAL_MAX_ENTRIES", 1000)),
+                    int(options.get("LOCAL_MAX_BYTES", 64 * 1024 * 1024)),
+                )
+            self.local = _local_tiers[location]
+
+    @property
+    def shared(self) -> BaseCache:
+        return caches[self.shared_alias]
+
+    def _get_shared_expiry(self, key: str, version: int) -> Optional[float]:
+        """Return the time the entry expires at in shared tier, or None if it
+        never expires. Entries gone meanwhile are treated as expired.
+        """
+        shared = self.shared
+        if isinstance(shared, FileBasedCache):
+            try:
+                # Expiry is pickled in front of the value.
+                with open(shared._key_to_file(key, version), "rb") as f:
+                    return pickle.load(f)
+            except (OSError, EOFError, pickle.UnpicklingError):
+                return time()
+        if isinstance(shared, LocMemCache):
+            return shared._expire_info.get(shared.make_key(key, version), time())
+        return self.get_backend_timeout()
+
+    def _get_local_expiry(self, expires_at: Optional[float]) -> Optional[float]:
+        """Return monotonic expiry time of local entry, which expires at given
+        time (None: never) in shared tier, or None to skip it.
+        """
+        local_expires_at = monotonic() + self.local_timeout
+        if expires_at is None:
+            return local_expires_at
+        remaining = expires_at - time()
+        if remaining <= 0:
+            return None
+        return min(local_expires_at, monotonic() + remaining)
+
+    def _sync_generation(self) -> None:
+        now = monotonic()
+        if now - self.local.checked_at < self.generation_check_interval:
+            return
+        generation = self.shared.get(_GENERATION_KEY)
+        if generation != self.local.generation:
+            self.local.clear()
+            self.local.generation = generation
+        self.local.checked_at = now
+
+    def _bump_generation(self) -> None:
+        previous = self.local.generation
+        try:
+            generation = self.shared.incr(_GENERATION_KEY)
+        except ValueError:
+            generation = time_ns()
+            self.shared.set(_GENERATION_KEY, generation, timeout=None)
+        # Local entries of this process are already up to date, unless
+        # another process bumped the generation as well.
+        if previous is None or generation != previous + 1:
+            self.local.clear()
+        self.local.generation = generation
+
+    def _store_local(
+        self, key: str, value: Any, shared_expires_at: Optional[float]
+    ) -> None:
+        expires_at = self._get_local_expiry(shared_expires_at)
+        if expires_at is None:
+            self.local.delete(key)
+        else:
+            self.local.set(
+                key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL), expires_at
+            )
+
+    def get(self, key: str, default: Any = None, version: Optional[int] = None) -> Any:
+        local_key = self.make_key(key, version)
+        self.validate_key(local_key)
+        self._sync_generation()
+        pickled = self.local.get(local_key)
+        if pickled is not None:
+            _READS.inc(tier="local")
+            return pickle.loads(pickled)
+
+        # Missing values of shared cache can't be told from the default.
+        missing = object()
+        version = self._get_version(version)
+        value = self.shared.get(key, missing, version=version)
+        if value is missing:
+            _READS.inc(tier="miss")
+            return default
+        _READS.inc(tier="shared")
+        self._store_local(local_key, value, self._get_shared_expiry(key, version))
+        return value
+
+    def get_many(
+        self, keys: Iterable[str], version: Optional[int] = None
+    ) -> Dict[str, Any]:
+        self._sync_generation()
+        result = {}
+        missed_keys = []
+        for key in keys:
+            local_key = self.make_key(key, version)
+            self.validate_key(local_key)
+            pickled = self.local.get(local_key)
+            if pickled is None:
+                missed_keys.append(key)
+            else:
+                result[key] = pickle.loads(pickled)
+        _READS.inc(len(result), tier="local")
+
+        if missed_keys:
+            shared_version = self._get_version(version)
+            missed = self.shared.get_many(missed_keys, version=shared_version)
+            for key, value in missed.items():
+                self._store_local(
+                    self.make_key(key, version),
+                    value,
+                    self._get_shared_expiry(key, shared_version),
+                )
+            result.update(missed)
+            _READS.inc(len(missed), tier="shared")
+            _READS.inc(len(missed_keys) - len(missed), tier="miss")
+        return result
+
+    def set(
+        self,
+        key: str,
+        value: Any,
+        timeout: Any = DEFAULT_TIMEOUT,
+        version: Optional[int] = None,
+    ) -> None:
+        local_key = self.make_key(key, version)
+        self.validate_key(local_key)
+        self.shared.set(
+            key, value, self._get_timeout(timeout), version=self._get_version(version)
+        )
+        self._store_local(local_key, value, self.get_backend_timeout(timeout))
+
+    def set_many(
+        self,
+        data: Dict[str, Any],
+        timeout: Any = DEFAULT_TIMEOUT,
+        version: Optional[int] = None,
+    ) -> List[str]:
+        failed_keys = self.shared.set_many(
+            data, self._get_timeout(timeout), version=self._get_version(version)
+        )
+        for key, value in data.items():
+            if key not in failed_keys:
+                self._store_local(
+                    self.make_key(key, version),
+                    value,
+                    self.get_backend_timeout(timeout),
+                )
+        return failed_keys
+
+    def add(
+        self,
+        key: str,
+        value: Any,
+        timeout: Any = DEFAULT_TIMEOUT,
+        version: Optional[int] = None,
+    ) -> bool:
+        local_key = self.make_key(key, version)
+        self.validate_key(local_key)
+        added = self.shared.add(
+            key, value, self._get_timeout(timeout), version=self._get_version(version)
+        )
+        if added:
+            self._store_local(local_key, value, self.get_backend_timeout(timeout))
+        return added
+
+    def touch(
+        self, key: str, timeout: Any = DEFAULT_TIMEOUT, version: Optional[int] = None
+    ) -> bool:
+        local_key = self.make_key(key, version)
+        self.validate_key(local_key)
+        # Expiry in local tier is capped anyway, so it's just dropped.
+        self.local.delete(local_key)
+        return self.shared.touch(
+            key, self._get_timeout(timeout), version=self._get_version(version)
+        )
+
+    def has_key(self, key: str, version: Optional[int] = None) -> bool:
+        local_key = self.make_key(key, version)
+        self.validate_key(local_key)
+        self._sync_generation()
+        if self.local.get(local_key) is not None:
+            return True
+        version = self._get_version(version)
+        return self.shared.has_key(key, version=version)  # noqa: W601
+
+    def incr(self, key: str, delta: int = 1, version: Optional[int] = None) -> int:
+        local_key = self.make_key(key, version)
+        self.validate_key(local_key)
+        value = self.shared.incr(key, delta, version=self._get_version(version))
+        self.local.delete(local_key)
+        self._bump_generation()
+        return value
+
+    def delete(self, key: str, version: Optional[int] = None) -> bool:
+        local_key = self.make_key(key, version)
+        self.validate_key(local_key)
+        deleted = self.shared.delete(key, version=self._get_version(version))
+        self.local.delete(local_key)
+        self._bump_generation()
+        return deleted
+
+    def delete_many(self, keys: Iterable[str], version: Optional[int] = None) -> None:
+        keys = list(keys)
+        self.shared.delete_many(keys, version=self._get_version(version))
+        for key in keys:
+            self.local.delete(self.make_key(key, version))
+        self._bump_generation()
+
+    def clear(self) -> None:
+        self.shared.clear()
+        self.local.clear()
+        self._bump_generation()
+
+    def _get_version(self, version: Optional[int]) -> int:
+        return self.version if version is None else version
+
+    def _get_timeout(self, timeout: Any) -> Any:
+        return self.default_timeout if timeout is DEFAULT_TIMEOUT else timeout
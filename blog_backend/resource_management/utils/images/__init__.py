@@ -1 +1,5 @@
 from .images import *  # noqa: F401, F403
+from .renditions import *  # noqa: F401, F403
+from .resizer import *  # noqa: F401, F403
+from .writer import *  # noqa: F401, F403
+from .checkpoint import *  # noqa: F401, F403
@@ -0,0 +1,207 @@
+import os
+from collections import OrderedDict
+from hashlib import sha256
+from io import BytesIO
+from json import dumps as json_dumps, load as json_load
+from os.path import join as path_join
+from shutil import rmtree
+from tempfile import mkstemp
+from typing import final, Final, Any, Dict, IO, NamedTuple, Optional, Tuple
+
+from django.conf import settings
+
+from resource_management.models.images import Image
+from .images import (
+    get_image_format,
+    get_resolution_group,
+    set_image_permission,
+    sync_directory,
+    ResizedImage,
+    TEMP_FILE_PREFIX,
+)
+
+__all__ = [
+    "CheckpointedRendition",
+    "CheckpointedImage",
+    "RenditionCheckpoint",
+    "get_digest",
+]
+
+_MANIFEST_FILENAME: Final = "manifest.json"
+_RENDITION_FILENAME_FORMAT: Final = "{resolution:s}.{ext:s}"
+_HASH_CHUNK_SIZE: Final = 1024 * 1024
+
+
+@final
+class CheckpointedRendition(NamedTuple):
+    path: str
+    size: Tuple[int, int]
+    num_bytes: int
+    sha256: str
+
+
+@final
+class CheckpointedImage(NamedTuple):
+    original_size: Tuple[int, int]
+    placeholder: str
+    renditions: "OrderedDict[Image.ImageResolutionType, CheckpointedRendition]"
+
+
+def get_digest(fp: IO[bytes]) -> str:
+    hasher = sha256()
+    for chunk in iter(lambda: fp.read(_HASH_CHUNK_SIZE), b""):
+        hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def _get_file_digest(path: str) -> str:
+    with open(path, "rb") as fd_r:
+        return get_digest(fd_r)
+
+
+@final
+class RenditionCheckpoint(object):
+    """Encoded renditions produced for one upload bundle.
+
+    Renditions are kept under "<bundle digest>/<source image digest>/"
+    with a manifest of their sizes and digests. A retry of a failed upload
+    reuses renditions whose files still match the manifest, so only the
+    missing ones are resized again. Checkpoint of a bundle should be
+    cleared once its upload succeeded.
+    """
+
+    def __init__(self, checkpoint_dir: str, bundle_digest: str):
+        self.bundle_dir = path_join(checkpoint_dir, bundle_digest)
+
+    @classmethod
+    def from_settings(cls, bundle_digest: str) -> Optional["RenditionCheckpoint"]:
+        """Return checkpoint of the bundle, or None when checkpoint is
+        disabled.
+        """
+        if not settings.UPLOAD_CHECKPOINT_DIR:
+            return None
+        return cls(settings.UPLOAD_CHECKPOINT_DIR, bundle_digest)
+
+    def _get_image_dir(self, image_digest: str) -> str:
+        return path_join(self.bundle_dir, image_digest)
+
+    def load(self, image_digest: str) -> Optional[CheckpointedImage]:
+        """Return renditions of the source image with given digest, or None
+        if they're not stored or any of the files does not match.
+        """
+        image_dir = self._get_image_dir(image_digest)
+        try:
+            with open(path_join(image_dir, _MANIFEST_FILENAME), "r") as fd_r:
+                manifest: Dict[str, Any] = json_load(fd_r)
+        except (FileNotFoundError, ValueError):
+            return None
+
+        renditions = OrderedDict()
+        for item in manifest["renditions"]:
+            rendition = CheckpointedRendition(
+                path=path_join(image_dir, item["file_name"]),
+                size=(item["width"], item["height"]),
+                num_bytes=item["num_bytes"],
+                sha256=item["sha256"],
+            )
+            try:
+                if (
+                    os.stat(rendition.path).st_size != rendition.num_bytes
+                    or _get_file_digest(rendition.path) != rendition.sha256
+                ):
+                    return None
+            except FileNotFoundError:
+                return None
+            renditions[Image.ImageResolutionType(item["resolution"])] = rendition
+
+        return CheckpointedImage(
+            original_size=tuple(manifest["original_size"]),  # type: ignore
+            placeholder=manifest["placeholder"],
+            renditions=renditions,
+        )
+
+    def store(
+        self,
+        image_digest: str,
+        extension: str,
+        resized_image: ResizedImage,
+        placeholder: str,
+    ) -> CheckpointedImage:
+        """Encode renditions into the checkpoint. The manifest is written
+        last, so partially stored images are never loaded.
+        """
+        image_dir = self._get_image_dir(image_digest)
+        os.makedirs(image_dir, exist_ok=True)
+
+        image_format = get_image_format(extension)
+        renditions = OrderedDict()
+        for resolution, image_buffer in resized_image.renditions.items():
+            buffer = BytesIO()
+            image_buffer.save(buffer, format=image_format)
+            file_name = _RENDITION_FILENAME_FORMAT.format(
+                resolution=Image.ImageResolutionType(resolution).name.lower(),
+                ext=extension,
+            )
+            path = path_join(image_dir, file_name)
+            # Renditions get permission of images, so they can be linked
+            # to image directories as they are.
+            self._write_file(
+                image_dir, path, buffer.getvalue(), get_resolution_group(resolution)
+            )
+            renditions[resolution] = CheckpointedRendition(
+                path=path,
+                size=image_buffer.size,
+                num_bytes=buffer.tell(),
+                sha256=sha256(buffer.getbuffer()).hexdigest(),
+            )
+
+        # Renditions must be durable before the manifest refers to them.
+        sync_directory(image_dir)
+        manifest = {
+            "original_size": resized_image.original_size,
+            "placeholder": placeholder,
+            "renditions": [
+                {
+                    "resolution": int(resolution),
+                    "file_name": os.path.basename(rendition.path),
+                    "width": rendition.size[0],
+                    "height": rendition.size[1],
+                    "num_bytes": rendition.num_bytes,
+                    "sha256": rendition.sha256,
+                }
+                for resolution, rendition in renditions.items()
+            ],
+        }
+        self._write_file(
+            image_dir,
+            path_join(image_dir, _MANIFEST_FILENAME),
+            json_dumps(manifest).encode("utf-8"),
+        )
+        sync_directory(image_dir)
+
+        return CheckpointedImage(
+            original_size=resized_image.original_size,
+            placeholder=placeholder,
+            renditions=renditions,
+        )
+
+    def clear(self) -> None:
+        rmtree(self.bundle_dir, ignore_errors=True)
+
+    @staticmethod
+    def _write_file(
+        image_dir: str, path: str, data: bytes, group: Optional[str] = None
+    ) -> None:
+        fd, temp_path = mkstemp(dir=image_dir, prefix=TEMP_FILE_PREFIX)
+        try:
+            with os.fdopen(fd, "wb") as fd_w:
+                fd_w.write(data)
+                fd_w.flush()
+                os.fsync(fd_w.fileno())
+            if group:
+                set_image_permission(temp_path, group)
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
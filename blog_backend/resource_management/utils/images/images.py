@@ -1,16 +1,47 @@
+import io
 import stat
-from os import chmod
+from grp import getgrnam
+from base64 import b64encode
+from hashlib import sha256
+from mmap import mmap, ACCESS_READ
+from errno import EMLINK, EXDEV
+from os import (
+    chmod,
+    close,
+    fstat,
+    stat as os_stat,
+    fsync,
+    link,
+    makedirs,
+    open as os_open,
+    remove,
+    replace,
+    O_RDONLY,
+)
 from shutil import chown
-from os.path import join as path_join
+from os.path import dirname, exists, join as path_join
 from PIL import (
     Image as PILImage,
     ImageFile,
 )
 from collections import OrderedDict
-from typing import Final, final, IO, Optional
+from tempfile import mkstemp
+from uuid import uuid4
+from typing import (
+    Final,
+    final,
+    IO,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+)
 
 from django.conf import settings
 from resource_management.models.images import Image
+from resource_management.utils.instrumentation import METRICS
 
 
 # Allow loading truncated images
@@ -18,9 +49,32 @@ ImageFile.LOAD_TRUNCATED_IMAGES = True
 
 __all__ = [
     "resize_image",
+    "estimate_resize_bytes",
+    "reduce_decoding",
+    "ResizedImage",
+    "resize_to",
+    "plan_renditions",
+    "plan_renditions_by_size",
+    "create_placeholder",
+    "load_placeholder",
     "image_compare",
+    "get_image_format",
+    "get_image_dir",
+    "get_image_shard_dirs",
     "get_image_full_path",
+    "locate_image_file",
+    "get_image_group",
+    "get_resolution_group",
+    "set_image_permission",
+    "sync_directory",
+    "stage_image",
+    "stage_image_link",
+    "publish_staged_images",
+    "discard_staged_image",
     "save_image",
+    "SavedImageInfo",
+    "StagedImage",
+    "TEMP_FILE_PREFIX",
     "ImgSrcNotProvidedError",
 ]
 
@@ -32,6 +86,36 @@ _RESOLUTION_WIDTH_MAPPING: Final = (
 )
 
 _BUF_SIZE: Final = 8 * 1024
+# Placeholders are tiny JPEG images embedded as data URI, which are shown
+# while the actual image is being loaded.
+_PLACEHOLDER_MAX_EDGE: Final = 16
+_PLACEHOLDER_QUALITY: Final = 40
+_PLACEHOLDER_URI_FORMAT: Final = "data:image/jpeg;base64,{data:s}"
+
+# Prefix of files being written. Files starting with "." are skipped when
+# scanning image directories.
+TEMP_FILE_PREFIX: Final = ".tmp-"
+# Image files are readable by the group, and only the backend server's
+# runner can modify them.
+_IMAGE_FILE_MODE: Final = stat.S_IRUSR | stat.S_IWUSR | stat.S_IRGRP
+# Chunk size of streaming original images to disk.
+_COPY_CHUNK_SIZE: Final = 1024 * 1024
+
+# Number of leading UUID characters used as directory name on each level
+# of sharded image layout.
+_SHARD_NAME_LENGTH: Final = 2
+
+_IMAGES_WRITTEN: Final = METRICS.counter(
+    "blog_images_written_total",
+    "Images (originals and renditions) published, by resolution.",
+    ["resolution"],
+)
+# Hard-linked images count as no bytes written.
+_IMAGE_BYTES_WRITTEN: Final = METRICS.counter(
+    "blog_image_bytes_written_total",
+    "Bytes of published images, by resolution.",
+    ["resolution"],
+)
 
 
 @final
@@ -42,38 +126,162 @@ class ImgSrcNotProvidedError(Exception):
         super().__init__(message)
 
 
-def resize_image(
-    fp: IO[bytes],
-) -> "OrderedDict[Image.ImageResolutionType, PILImage.Image]":
-    """Resize image as much as it can and return mapping between
-    resolution Enum and processed image.
+@final
+class ResizedImage(NamedTuple):
+    original_size: Tuple[int, int]
+    renditions: "OrderedDict[Image.ImageResolutionType, PILImage.Image]"
+
+
+@final
+class SavedImageInfo(NamedTuple):
+    bytes_written: int
+    # Only available when the image is copied from a stream.
+    sha256: Optional[str]
+
+
+@final
+class StagedImage(NamedTuple):
+    entry: Image
+    temp_path: str
+    target_path: str
+    info: SavedImageInfo
+
+
+def _rendition_sizes(
+    width: int, height: int
+) -> Iterator[Tuple[Image.ImageResolutionType, Tuple[int, int]]]:
+    """Yield resolution Enum and size of each rendition for an image
+    of the given size.
+    """
+    for enum_val, c_width in _RESOLUTION_WIDTH_MAPPING:
+        # If can't further compressed for higher resolution, then exit;
+        # if it's even smaller than LOW's requirement, then take a clone
+        # for the lowest quality.
+        if c_width > width:
+            if enum_val == Image.ImageResolutionType.LOW:
+                yield enum_val, (width, height)
+            break
+        else:
+            yield enum_val, (c_width, int(height * (c_width / width)))
+
+
+def reduce_decoding(
+    im: PILImage.Image, min_size: Tuple[int, int], pixel_budget: int
+) -> None:
+    """Let decoder scale the image down while decoding when it has more
+    pixels than pixel_budget. The result is never smaller than min_size.
+
+    Note: Only JPEG supports reduced-scale decoding. Other formats are
+          decoded in full size anyway.
+    """
+    width, height = im.size
+    if width * height > pixel_budget:
+        im.draft(im.mode, min_size)
+
+
+def _get_decode_size(
+    im: PILImage.Image, pixel_budget: Optional[int]
+) -> Tuple[Tuple[int, int], List[Tuple[Image.ImageResolutionType, Tuple[int, int]]]]:
+    # Rendition sizes are always planned by the size of source image,
+    # even when it's decoded at reduced scale.
+    original_size = im.size
+    rendition_sizes = list(_rendition_sizes(*original_size))
+    if pixel_budget is None:
+        pixel_budget = settings.IMAGE_DECODE_PIXEL_BUDGET
+    reduce_decoding(im, rendition_sizes[-1][1], pixel_budget)
+    return original_size, rendition_sizes
+
+
+def resize_image(fp: IO[bytes], pixel_budget: Optional[int] = None) -> ResizedImage:
+    """Resize image as much as it can and return size of the source image
+    and mapping between resolution Enum and processed image.
 
     If the input image is smaller than least width requirement on
     the list, then a copy of the same image will be provided to the
-    lowest resolution.
+    lowest resolution. Sources with more pixels than pixel_budget
+    (default: IMAGE_DECODE_PIXEL_BUDGET) are decoded at reduced scale
+    when the format supports it.
     """
-    result = OrderedDict()
+    renditions = OrderedDict()
 
     with PILImage.open(fp) as im:
-        width, height = im.size
-        # We still need size information when filling up DB entries, so
-        # here we create a clone of original buffer
-        result[Image.ImageResolutionType.ORIGINAL] = im.copy()
-        for enum_val, c_width in _RESOLUTION_WIDTH_MAPPING:
-            # If can't further compressed for higher resolution, then exit;
-            # if it's even smaller than LOW's requirement, then take a clone
-            # for the lowest quality.
-            if c_width > width:
-                if enum_val == Image.ImageResolutionType.LOW:
-                    result[enum_val] = im.copy()
-                break
-            else:
-                c_height = int(height * (c_width / width))
-                result[enum_val] = im.resize((c_width, c_height), PILImage.LANCZOS)
+        original_size, rendition_sizes = _get_decode_size(im, pixel_budget)
+        for enum_val, size in rendition_sizes:
+            renditions[enum_val] = resize_to(im, size)
+
+    return ResizedImage(original_size=original_size, renditions=renditions)
+
+
+def estimate_resize_bytes(fp: IO[bytes], pixel_budget: Optional[int] = None) -> int:
+    """Estimate peak memory usage of resize_image() by image header."""
+    with PILImage.open(fp) as im:
+        _, rendition_sizes = _get_decode_size(im, pixel_budget)
+        num_bands = PILImage.getmodebands(im.mode)
+        num_pixels = im.size[0] * im.size[1]
+        num_pixels += sum(width * height for _, (width, height) in rendition_sizes)
+
+    return num_pixels * num_bands
+
+
+def resize_to(im: PILImage.Image, size: Tuple[int, int]) -> PILImage.Image:
+    if im.size == size:
+        return im.copy()
+    return im.resize(size, PILImage.LANCZOS)
+
+
+def plan_renditions(
+    fp: IO[bytes],
+) -> "OrderedDict[Image.ImageResolutionType, Tuple[int, int]]":
+    """Same as resize_image(), but only return size of each rendition.
+
+    Only image header is parsed here, so it's cheap to call even for
+    large images.
+    """
+    with PILImage.open(fp) as im:
+        return plan_renditions_by_size(im.size)
+
+
+def plan_renditions_by_size(
+    original_size: Tuple[int, int]
+) -> "OrderedDict[Image.ImageResolutionType, Tuple[int, int]]":
+    """ Same as plan_renditions(), but with known size of the source. """
+    result = OrderedDict()
+    result[Image.ImageResolutionType.ORIGINAL] = original_size
+    for enum_val, size in _rendition_sizes(*original_size):
+        result[enum_val] = size
 
     return result
 
 
+def create_placeholder(im: PILImage.Image) -> str:
+    """Return a placeholder of the image as data URI.
+
+    Note: Pass a downsized image (e.g. the LOW rendition) when available,
+          since the full image would be read to make the placeholder.
+    """
+    width, height = im.size
+    ratio = _PLACEHOLDER_MAX_EDGE / max(width, height)
+    size = (max(1, round(width * ratio)), max(1, round(height * ratio)))
+    placeholder = im.resize(size, PILImage.BOX).convert("RGB")
+
+    buffer = io.BytesIO()
+    placeholder.save(buffer, format="JPEG", quality=_PLACEHOLDER_QUALITY)
+    return _PLACEHOLDER_URI_FORMAT.format(
+        data=b64encode(buffer.getvalue()).decode("ascii")
+    )
+
+
+def load_placeholder(fp: IO[bytes]) -> str:
+    """Same as create_placeholder(), but read the image from stream.
+
+    JPEG images are decoded at reduced scale, so it's much cheaper than
+    decoding the whole image.
+    """
+    with PILImage.open(fp) as im:
+        im.draft("RGB", (_PLACEHOLDER_MAX_EDGE, _PLACEHOLDER_MAX_EDGE))
+        return create_placeholder(im)
+
+
 def image_compare(stream_a: IO[bytes], path_b: str) -> bool:
     # Given binary stream reader stream_a, compare its content
     # with file stored in path_b.
@@ -91,34 +299,278 @@ def image_compare(stream_a: IO[bytes], path_b: str) -> bool:
                 return True
 
 
-def get_image_full_path(entry: Image) -> str:
+def get_image_dir(entry: Image) -> str:
     if entry.resolution == Image.ImageResolutionType.ORIGINAL:
-        return path_join(settings.PROTECTED_IMAGE_DIR, entry.file_name)
-    return path_join(settings.OPENED_IMAGE_DIR, entry.file_name)
+        return settings.PROTECTED_IMAGE_DIR
+    return settings.OPENED_IMAGE_DIR
 
 
-def save_image(
-    entry: Image,
-    img_buffer: Optional[PILImage.Image] = None,
-    img_stream: Optional[IO[bytes]] = None,
-) -> None:
+def get_image_shard_dirs(file_name: str, shard_depth: int) -> List[str]:
+    """Return sub-directory names of file under sharded layout, e.g.:
+    "3fa85f64-....jpg" is placed at "3f/a8/3fa85f64-....jpg" with depth 2.
+    """
+    return [
+        file_name[level * _SHARD_NAME_LENGTH : (level + 1) * _SHARD_NAME_LENGTH]
+        for level in range(shard_depth)
+    ]
+
+
+def get_image_full_path(entry: Image, shard_depth: Optional[int] = None) -> str:
+    if shard_depth is None:
+        shard_depth = settings.IMAGE_SHARD_DEPTH
+    return path_join(
+        get_image_dir(entry),
+        *get_image_shard_dirs(entry.file_name, shard_depth),
+        entry.file_name,
+    )
+
+
+def locate_image_file(entry: Image) -> str:
+    """Return path of stored image file.
+
+    While files are being moved to a new layout, a file may still be
+    stored under the previous layout, so both layouts are checked here.
+    Returns path under current layout if the file is not found.
+    """
     target_path = get_image_full_path(entry)
-    target_group: str = (
+    if settings.IMAGE_SHARD_DEPTH == settings.IMAGE_SHARD_PREVIOUS_DEPTH:
+        return target_path
+    for shard_depth in (None, settings.IMAGE_SHARD_PREVIOUS_DEPTH, None):
+        # Check current layout again, in case the file was moved between
+        # the two checks.
+        path = get_image_full_path(entry, shard_depth)
+        if exists(path):
+            return path
+
+    return target_path
+
+
+def get_resolution_group(resolution: int) -> str:
+    return (
         settings.OPENED_IMAGE_GROUP
-        if entry.resolution == Image.ImageResolutionType.ORIGINAL
+        if resolution == Image.ImageResolutionType.ORIGINAL
         else settings.PROTECTED_IMAGE_GROUP
     )
-    if img_buffer:
-        img_buffer.save(target_path)
-    elif img_stream:
-        with open(target_path, "wb") as fd_w:
-            fd_w.write(img_stream.read())
-    else:
-        raise ImgSrcNotProvidedError()
 
+
+def get_image_group(entry: Image) -> str:
+    return get_resolution_group(entry.resolution)
+
+
+def set_image_permission(path: str, group: str) -> None:
     # Note: Share with OPENED_GROUP to let frontend server access
     # these images. Otherwise, mask it to make it available to backend
     # server only.
-    chown(target_path, group=target_group)
+    chown(path, group=group)
     # Note: Only backend server's runner can modify image files.
-    chmod(target_path, stat.S_IRUSR | stat.S_IWUSR | stat.S_IRGRP)
+    chmod(path, _IMAGE_FILE_MODE)
+
+
+def _has_image_permission(path: str, group: str) -> bool:
+    file_stat = os_stat(path)
+    return (
+        stat.S_IMODE(file_stat.st_mode) == _IMAGE_FILE_MODE
+        and file_stat.st_gid == getgrnam(group).gr_gid
+    )
+
+
+def _sync_file(path: str) -> None:
+    fd = os_open(path, O_RDONLY)
+    try:
+        fsync(fd)
+    finally:
+        close(fd)
+
+
+def sync_directory(path: str) -> None:
+    """ Sync a directory, so renames and links in it survive a crash. """
+    _sync_file(path)
+
+
+def get_image_format(extension: str) -> str:
+    """ Return PIL format name of file extension, e.g. "jpg" -> "JPEG". """
+    return PILImage.registered_extensions()["." + extension.lower()]
+
+
+def _is_regular_file(stream: IO[bytes]) -> bool:
+    # Streams of archive members may also expose fileno() of the archive
+    # itself, so only trust plain file objects here.
+    raw = getattr(stream, "raw", stream)
+    if not isinstance(raw, io.FileIO) or raw.closed:
+        return False
+    return stat.S_ISREG(fstat(raw.fileno()).st_mode)
+
+
+def _write_all(fd_w: IO[bytes], chunk: memoryview) -> None:
+    # Unbuffered writers may write only a part of the chunk.
+    while chunk:
+        num_written = fd_w.write(chunk)
+        chunk = chunk[num_written:]
+
+
+def _copy_file(src: IO[bytes], fd_w: IO[bytes]) -> SavedImageInfo:
+    """Copy a regular file through a read-only memory map, so file content
+    goes to both the hash and the writer without being copied into Python
+    objects.
+    """
+    hasher = sha256()
+    offset = src.tell()
+    size = fstat(src.fileno()).st_size
+    if offset >= size:
+        return SavedImageInfo(bytes_written=0, sha256=hasher.hexdigest())
+
+    with mmap(src.fileno(), 0, access=ACCESS_READ) as mapped, memoryview(
+        mapped
+    ) as view:
+        for start in range(offset, size, _COPY_CHUNK_SIZE):
+            with view[start : start + _COPY_CHUNK_SIZE] as chunk:
+                hasher.update(chunk)
+                _write_all(fd_w, chunk)
+
+    src.seek(size)
+    return SavedImageInfo(bytes_written=size - offset, sha256=hasher.hexdigest())
+
+
+def _copy_stream(src: IO[bytes], fd_w: IO[bytes]) -> SavedImageInfo:
+    """Copy stream in fixed-size chunks through a single reusable buffer,
+    hashing and counting bytes in the same pass.
+    """
+    if _is_regular_file(src):
+        return _copy_file(src, fd_w)
+
+    hasher = sha256()
+    bytes_written = 0
+    buffer = bytearray(_COPY_CHUNK_SIZE)
+    with memoryview(buffer) as view:
+        while True:
+            if hasattr(src, "readinto"):
+                num_read = src.readinto(buffer)  # type: ignore
+            else:
+                data = src.read(_COPY_CHUNK_SIZE)
+                num_read = len(data)
+                buffer[:num_read] = data
+            if not num_read:
+                break
+            with view[:num_read] as chunk:
+                hasher.update(chunk)
+                _write_all(fd_w, chunk)
+            bytes_written += num_read
+
+    return SavedImageInfo(bytes_written=bytes_written, sha256=hasher.hexdigest())
+
+
+def stage_image(
+    entry: Image,
+    img_buffer: Optional[PILImage.Image] = None,
+    img_stream: Optional[IO[bytes]] = None,
+) -> StagedImage:
+    """Write image from either a PIL.Image buffer or a binary stream to a
+    temporary file next to its target path. The file is synced to disk
+    before return, and becomes visible after publish_staged_images().
+
+    Note: Streams are copied chunk by chunk and never read as a whole, so
+          large originals do not need to fit in memory.
+    """
+    if not (img_buffer or img_stream):
+        raise ImgSrcNotProvidedError()
+
+    target_path = get_image_full_path(entry)
+    target_dir = dirname(target_path)
+    if settings.IMAGE_SHARD_DEPTH:
+        makedirs(target_dir, exist_ok=True)
+    fd, temp_path = mkstemp(
+        dir=target_dir, prefix=TEMP_FILE_PREFIX, suffix="." + entry.extension
+    )
+    try:
+        # Chunks are already large, skip buffering of the writer.
+        with open(fd, "wb", buffering=0) as fd_w:
+            if img_buffer:
+                img_buffer.save(fd_w, format=get_image_format(entry.extension))
+                info = SavedImageInfo(bytes_written=fd_w.tell(), sha256=None)
+            elif img_stream:
+                info = _copy_stream(img_stream, fd_w)
+            fsync(fd_w.fileno())
+        set_image_permission(temp_path, get_image_group(entry))
+    except BaseException:
+        remove(temp_path)
+        raise
+
+    return StagedImage(
+        entry=entry, temp_path=temp_path, target_path=target_path, info=info
+    )
+
+
+def stage_image_link(entry: Image, source_path: str) -> StagedImage:
+    """Stage an existing file of identical content as a hard link, so no
+    data is copied. The file is copied instead when it can't be linked,
+    e.g. it's on another file system.
+
+    Note: A link shares permission with its source, so the source is
+          copied as well when its permission differs from the target's.
+          Permission of the source is never changed.
+    """
+    target_path = get_image_full_path(entry)
+    target_dir = dirname(target_path)
+    if settings.IMAGE_SHARD_DEPTH:
+        makedirs(target_dir, exist_ok=True)
+    if not _has_image_permission(source_path, get_image_group(entry)):
+        with open(source_path, "rb") as fd_r:
+            return stage_image(entry, img_stream=fd_r)
+
+    # Only the renames are synced on publishing, so content of the source
+    # has to be durable before it's linked.
+    _sync_file(source_path)
+    temp_path = path_join(
+        target_dir,
+        "{prefix:s}{name:s}.{ext:s}".format(
+            prefix=TEMP_FILE_PREFIX, name=uuid4().hex, ext=entry.extension
+        ),
+    )
+    try:
+        link(source_path, temp_path)
+    except OSError as error:
+        if error.errno not in (EXDEV, EMLINK):
+            raise
+        with open(source_path, "rb") as fd_r:
+            return stage_image(entry, img_stream=fd_r)
+
+    return StagedImage(
+        entry=entry,
+        temp_path=temp_path,
+        target_path=target_path,
+        info=SavedImageInfo(bytes_written=0, sha256=None),
+    )
+
+
+def publish_staged_images(staged_images: Iterable[StagedImage]) -> None:
+    """Move staged files to their target paths, and sync the renames."""
+    target_dirs = set()
+    for staged_image in staged_images:
+        replace(staged_image.temp_path, staged_image.target_path)
+        target_dirs.add(dirname(staged_image.target_path))
+        resolution = Image.ImageResolutionType(
+            staged_image.entry.resolution
+        ).name.lower()
+        _IMAGES_WRITTEN.inc(resolution=resolution)
+        _IMAGE_BYTES_WRITTEN.inc(staged_image.info.bytes_written, resolution=resolution)
+
+    for target_dir in target_dirs:
+        sync_directory(target_dir)
+
+
+def discard_staged_image(staged_image: StagedImage) -> None:
+    try:
+        remove(staged_image.temp_path)
+    except FileNotFoundError:
+        # Already published.
+        pass
+
+
+def save_image(
+    entry: Image,
+    img_buffer: Optional[PILImage.Image] = None,
+    img_stream: Optional[IO[bytes]] = None,
+) -> SavedImageInfo:
+    staged_image = stage_image(entry, img_buffer, img_stream)
+    publish_staged_images([staged_image])
+    return staged_image.info
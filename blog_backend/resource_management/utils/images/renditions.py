@@ -0,0 +1,151 @@
+import os
+from os.path import join as path_join, splitext
+from contextlib import contextmanager
+from fcntl import flock, LOCK_EX, LOCK_NB, LOCK_UN
+from tempfile import mkstemp
+from typing import Final, final, Iterator, List, Tuple
+from zlib import crc32
+
+from PIL import Image as PILImage
+from django.conf import settings
+
+from resource_management.models.images import Image
+from .images import (
+    reduce_decoding,
+    resize_to,
+    get_image_group,
+    set_image_permission,
+    TEMP_FILE_PREFIX,
+)
+
+__all__ = [
+    "RenditionCache",
+]
+
+# Lock files are striped by key so the cache directory never collects one
+# lock file per rendition.
+_LOCK_STRIPES: Final = 64
+_LOCK_FILE_FORMAT: Final = ".lock-{stripe:02d}"
+_EVICTION_LOCK_FILE: Final = ".lock-eviction"
+# Evict down to this ratio of the size limit, so eviction does not run on
+# every single insertion once the cache is full.
+_EVICTION_TARGET_RATIO: Final = 0.9
+
+
+@final
+class RenditionCache(object):
+    """Size-bounded on-disk cache of resized renditions.
+
+    Renditions are created from their original image on first access.
+    Access time is tracked with file mtime, and least recently used files
+    are evicted when the total size exceeds the limit. Creation of the
+    same rendition is guarded by a file lock, so concurrent first hits
+    from multiple workers only resize the image once.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+
+    @classmethod
+    def from_settings(cls) -> "RenditionCache":
+        return cls(settings.RENDITION_CACHE_DIR, settings.RENDITION_CACHE_MAX_BYTES)
+
+    def get_path(self, entry: Image) -> str:
+        return path_join(self.cache_dir, entry.file_name)
+
+    def get_or_create(self, entry: Image, original_path: str) -> str:
+        """Return path to the cached rendition, and create it from the
+        original image file when it's not cached yet.
+        """
+        target_path = self.get_path(entry)
+        if self._touch(target_path):
+            return target_path
+
+        stripe = crc32(entry.file_name.encode("utf-8")) % _LOCK_STRIPES
+        with self._file_lock(_LOCK_FILE_FORMAT.format(stripe=stripe)):
+            # Someone else may have created it while we're waiting for lock.
+            if not self._touch(target_path):
+                self._render(entry, original_path, target_path)
+
+        self.evict()
+        return target_path
+
+    def evict(self) -> int:
+        """Remove least recently used renditions until the cache fits the
+        size limit. Return number of bytes removed.
+        """
+        try:
+            with self._file_lock(_EVICTION_LOCK_FILE, blocking=False):
+                return self._evict()
+        except BlockingIOError:
+            # Another worker is evicting right now.
+            return 0
+
+    def _evict(self) -> int:
+        cached_files: List[Tuple[float, int, str]] = []
+        total_bytes = 0
+        with os.scandir(self.cache_dir) as it:
+            for dir_entry in it:
+                if dir_entry.name.startswith(".") or not dir_entry.is_file():
+                    continue
+                file_stat = dir_entry.stat()
+                cached_files.append(
+                    (file_stat.st_mtime, file_stat.st_size, dir_entry.path)
+                )
+                total_bytes += file_stat.st_size
+
+        if total_bytes <= self.max_bytes:
+            return 0
+
+        target_bytes = self.max_bytes * _EVICTION_TARGET_RATIO
+        removed_bytes = 0
+        cached_files.sort()
+        for _, file_size, file_path in cached_files:
+            if total_bytes - removed_bytes <= target_bytes:
+                break
+            try:
+                os.remove(file_path)
+            except FileNotFoundError:
+                continue
+            removed_bytes += file_size
+
+        return removed_bytes
+
+    def _render(self, entry: Image, original_path: str, target_path: str) -> None:
+        # Write to a temporary file first, so readers never see a partially
+        # written rendition.
+        fd, temp_path = mkstemp(
+            dir=self.cache_dir,
+            prefix=TEMP_FILE_PREFIX,
+            suffix=splitext(target_path)[1],
+        )
+        try:
+            with os.fdopen(fd, "wb") as fd_w, PILImage.open(original_path) as im:
+                size = (entry.width, entry.height)
+                reduce_decoding(im, size, settings.IMAGE_DECODE_PIXEL_BUDGET)
+                resize_to(im, size).save(fd_w, format=im.format)
+            set_image_permission(temp_path, get_image_group(entry))
+            os.replace(temp_path, target_path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    @staticmethod
+    def _touch(path: str) -> bool:
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return False
+        return True
+
+    @contextmanager
+    def _file_lock(self, lock_name: str, blocking: bool = True) -> Iterator[None]:
+        lock_path = path_join(self.cache_dir, lock_name)
+        with open(lock_path, "a") as lock_file:
+            flock(lock_file, LOCK_EX if blocking else (LOCK_EX | LOCK_NB))
+            try:
+                yield
+            finally:
+                flock(lock_file, LOCK_UN)
@@ -0,0 +1,106 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from io import BytesIO
+from threading import Condition
+from typing import final, Any, Callable, IO, Optional
+
+from django.conf import settings
+
+from .images import resize_image, estimate_resize_bytes, ResizedImage
+
+__all__ = [
+    "MemoryBudget",
+    "RenditionPool",
+]
+
+
+@final
+class MemoryBudget(object):
+    """Counting semaphore measured in bytes.
+
+    A reservation larger than the whole budget is still granted once
+    nothing else is reserved, so a single huge image never blocks forever.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._reserved_bytes = 0
+        self._condition = Condition()
+
+    @property
+    def reserved_bytes(self) -> int:
+        return self._reserved_bytes
+
+    def acquire(self, num_bytes: int) -> None:
+        with self._condition:
+            while (
+                self._reserved_bytes
+                and self._reserved_bytes + num_bytes > self.max_bytes
+            ):
+                self._condition.wait()
+            self._reserved_bytes += num_bytes
+
+    def release(self, num_bytes: int) -> None:
+        with self._condition:
+            self._reserved_bytes -= num_bytes
+            self._condition.notify_all()
+
+
+@final
+class RenditionPool(object):
+    """Create renditions of source images on a thread pool.
+
+    Before a source is read, its size plus peak memory usage of resizing
+    (estimated from the image header) is reserved from the memory budget.
+    Submitting blocks until the reservation fits, so fewer images are
+    resized at the same time when they are large.
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        memory_budget: Optional[MemoryBudget] = None,
+    ):
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or settings.IMAGE_RESIZE_THREADS
+        )
+        self._memory_budget = memory_budget or MemoryBudget(
+            settings.IMAGE_RESIZE_MEMORY_BUDGET
+        )
+
+    def __enter__(self) -> "RenditionPool":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self._executor.shutdown(wait=True)
+
+    def submit(
+        self,
+        open_source: Callable[[], IO[bytes]],
+        source_size: int,
+        then: Callable[[ResizedImage], Any],
+    ) -> "Future[Any]":
+        """Resize the source image in the pool. then is called with the
+        result in the same worker, and the future returns what it returns.
+
+        Note: The reservation is released once then returns, so then should
+              write the renditions out (e.g. to checkpoint files) instead of
+              returning their decoded buffers.
+        """
+        with open_source() as fp:
+            num_bytes = estimate_resize_bytes(fp) + source_size
+        self._memory_budget.acquire(num_bytes)
+        try:
+            # Encoded source is read in the calling thread, since streams of
+            # archive members can't be shared between threads.
+            with open_source() as fp:
+                source = fp.read()
+            future = self._executor.submit(self._resize, source, then)
+        except BaseException:
+            self._memory_budget.release(num_bytes)
+            raise
+        future.add_done_callback(lambda _: self._memory_budget.release(num_bytes))
+        return future
+
+    @staticmethod
+    def _resize(source: bytes, then: Callable[[ResizedImage], Any]) -> Any:
+        return then(resize_image(BytesIO(source)))
@@ -0,0 +1,80 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import final, IO, List, Optional
+
+from PIL import Image as PILImage
+from django.conf import settings
+
+from resource_management.models.images import Image
+from .images import (
+    stage_image,
+    stage_image_link,
+    publish_staged_images,
+    discard_staged_image,
+    SavedImageInfo,
+    StagedImage,
+)
+
+__all__ = [
+    "ImageWriteBatch",
+]
+
+
+@final
+class ImageWriteBatch(object):
+    """Write image files of one upload as a batch.
+
+    Resized renditions are encoded and written by a thread pool, so disk
+    I/O of one file overlaps with encoding of others. Every file is first
+    written to a temporary file and synced, and nothing becomes visible
+    until publish() is called after all the files are durable. Files that
+    were not published are removed when leaving the context.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None):
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or settings.IMAGE_WRITER_THREADS
+        )
+        self._futures: List["Future[StagedImage]"] = []
+        self._staged_images: List[StagedImage] = []
+
+    def __enter__(self) -> "ImageWriteBatch":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self._executor.shutdown(wait=True)
+        for future in self._futures:
+            if not future.cancelled() and future.exception() is None:
+                discard_staged_image(future.result())
+        for staged_image in self._staged_images:
+            discard_staged_image(staged_image)
+
+    def save_buffer(self, entry: Image, img_buffer: PILImage.Image) -> None:
+        self._futures.append(
+            self._executor.submit(stage_image, entry, img_buffer=img_buffer)
+        )
+
+    def save_file(self, entry: Image, path: str) -> None:
+        """Link or copy an encoded image file, e.g. a checkpointed rendition
+        or an existing image of the same source.
+        """
+        self._futures.append(self._executor.submit(stage_image_link, entry, path))
+
+    def save_stream(self, entry: Image, img_stream: IO[bytes]) -> SavedImageInfo:
+        # Streams are copied in the calling thread, since streams of
+        # archive members can't be shared between threads.
+        staged_image = stage_image(entry, img_stream=img_stream)
+        self._staged_images.append(staged_image)
+        return staged_image.info
+
+    def publish(self) -> List[StagedImage]:
+        """Wait until all the files are written, then move them to their
+        target paths. Nothing is published if any of the writes failed.
+        """
+        for future in self._futures:
+            self._staged_images.append(future.result())
+        self._futures.clear()
+
+        staged_images = self._staged_images
+        publish_staged_images(staged_images)
+        self._staged_images = []
+        return staged_images
@@ -0,0 +1,3 @@
+from .tracer import *  # noqa: F401, F403
+from .metrics import *  # noqa: F401, F403
+from .request_timing import *  # noqa: F401, F403
@@ -0,0 +1,644 @@
+""" metrics.py
+
+    Counters, gauges and histograms, exported in Prometheus text format.
+
+    Each process keeps its metrics in memory. When processes share a metrics
+    directory (e.g. gunicorn workers of a node), each one writes its metrics
+    to a file named by its pid and start time, and the scraped process merges
+    all of them. Counters and histograms of exited processes are kept, so
+    totals never go back, while their gauges are dropped. Files of exited
+    processes are folded into an aggregate file by compact_metrics_dir().
+"""
+import os
+from abc import ABCMeta, abstractmethod
+from bisect import bisect_left
+from collections import OrderedDict
+from fcntl import flock, LOCK_EX, LOCK_SH
+from json import dump as json_dump, load as json_load
+from math import isinf, isnan
+from tempfile import mkstemp
+from threading import Event, Lock, Thread
+from time import time_ns
+from typing import (
+    final,
+    Final,
+    Any,
+    Dict,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Set,
+    Tuple,
+    Type,
+    TypeVar,
+)
+
+__all__ = [
+    "LATENCY_BUCKETS",
+    "METRICS",
+    "HistogramSnapshot",
+    "LatencyHistogram",
+    "Counter",
+    "Gauge",
+    "Histogram",
+    "MetricsRegistry",
+    "MetricsFlusher",
+    "write_metrics_file",
+    "read_metrics_dir",
+    "compact_metrics_dir",
+    "format_metrics",
+]
+
+# Upper bounds (seconds) of latency buckets; the last one is unbounded.
+LATENCY_BUCKETS: Final = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    float("inf"),
+)
+
+_METRICS_FILE_SUFFIX: Final = ".json"
+_METRICS_FILE_FORMAT: Final = "{pid:d}-{started:d}" + _METRICS_FILE_SUFFIX
+# Metrics of exited processes, and names of files folded into it.
+_AGGREGATE_FILE_NAME: Final = "aggregate" + _METRICS_FILE_SUFFIX
+_LOCK_FILE_NAME: Final = ".lock"
+_TEMP_FILE_SUFFIX: Final = ".tmp"
+
+_LabelValues = Tuple[str, ...]
+_M = TypeVar("_M", bound="_Metric")
+
+
+@final
+class HistogramSnapshot(NamedTuple):
+    buckets: Tuple[float, ...]
+    # Number of observations in each bucket (not cumulative)
+    counts: Tuple[int, ...]
+    count: int
+    total: float
+
+    def get_percentile(self, percentile: float) -> float:
+        """Return upper bound of the bucket holding the percentile (0-100),
+        or 0 when nothing was observed.
+        """
+        if not self.count:
+            return 0.0
+        rank = self.count * percentile / 100
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            if cumulative >= rank:
+                return bound
+        return self.buckets[-1]
+
+
+@final
+class LatencyHistogram(object):
+    """ Thread-safe histogram of durations in seconds. """
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self._counts = [0] * len(buckets)
+        self._count = 0
+        self._total = 0.0
+        self._lock = Lock()
+
+    def observe(self, seconds: float) -> None:
+        index = min(bisect_left(self.buckets, seconds), len(self.buckets) - 1)
+        with self._lock:
+            self._counts[index] += 1
+            self._count += 1
+            self._total += seconds
+
+    def snapshot(self) -> HistogramSnapshot:
+        with self._lock:
+            return HistogramSnapshot(
+                self.buckets, tuple(self._counts), self._count, self._total
+            )
+
+
+class _Metric(object, metaclass=ABCMeta):
+    metric_type = ""
+
+    def __init__(
+        self,
+        registry: "MetricsRegistry",
+        name: str,
+        documentation: str,
+        label_names: Tuple[str, ...],
+    ):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.label_names = label_names
+        self._lock = Lock()
+
+    def _get_label_values(self, labels: Dict[str, Any]) -> _LabelValues:
+        if len(labels) != len(self.label_names) or not all(
+            name in labels for name in self.label_names
+        ):
+            raise ValueError(
+                "Labels of {name:s} should be ({expected:s}), got ({actual:s})".format(
+                    name=self.name,
+                    expected=", ".join(self.label_names),
+                    actual=", ".join(labels),
+                )
+            )
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    @abstractmethod
+    def dump_samples(self) -> List[List[Any]]:
+        """ Return [label values, value] of each labelled series. """
+        pass
+
+    @abstractmethod
+    def reset(self) -> None:
+        pass
+
+
+@final
+class Counter(_Metric):
+    metric_type = "counter"
+
+    def __init__(self, *args: Any):
+        super().__init__(*args)
+        self._values: Dict[_LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels: Any) -> None:
+        if amount < 0:
+            raise ValueError("Counter {0:s} can't be decreased".format(self.name))
+        key = self._get_label_values(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+        self.registry.dirty = True
+
+    def get(self, **labels: Any) -> float:
+        return self._values.get(self._get_label_values(labels), 0)
+
+    def dump_samples(self) -> List[List[Any]]:
+        with self._lock:
+            return [[list(key), value] for key, value in self._values.items()]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+
+@final
+class Gauge(_Metric):
+    metric_type = "gauge"
+
+    def __init__(self, *args: Any):
+        super().__init__(*args)
+        self._values: Dict[_LabelValues, float] = {}
+
+    def set(self, value: float, **labels: Any) -> None:
+        key = self._get_label_values(labels)
+        with self._lock:
+            self._values[key] = value
+        self.registry.dirty = True
+
+    def get(self, **labels: Any) -> float:
+        return self._values.get(self._get_label_values(labels), 0)
+
+    def dump_samples(self) -> List[List[Any]]:
+        with self._lock:
+            return [[list(key), value] for key, value in self._values.items()]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+
+@final
+class Histogram(_Metric):
+    metric_type = "histogram"
+
+    def __init__(self, *args: Any, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        super().__init__(*args)
+        if not isinf(buckets[-1]):
+            buckets = tuple(buckets) + (float("inf"),)
+        self.buckets = buckets
+        self._histograms: Dict[_LabelValues, LatencyHistogram] = {}
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = self._get_label_values(labels)
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(
+                    key, LatencyHistogram(self.buckets)
+                )
+        histogram.observe(value)
+        self.registry.dirty = True
+
+    def get(self, **labels: Any) -> HistogramSnapshot:
+        histogram = self._histograms.get(self._get_label_values(labels))
+        if histogram is None:
+            return HistogramSnapshot(self.buckets, (0,) * len(self.buckets), 0, 0.0)
+        return histogram.snapshot()
+
+    def get_all(self) -> Dict[_LabelValues, HistogramSnapshot]:
+        with self._lock:
+            histograms = list(self._histograms.items())
+        return {key: histogram.snapshot() for key, histogram in histograms}
+
+    def dump_samples(self) -> List[List[Any]]:
+        return [
+            [list(key), [list(snapshot.counts), snapshot.total]]
+            for key, snapshot in self.get_all().items()
+        ]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+
+
+@final
+class MetricsRegistry(object):
+    """Metrics of the process. Metrics are registered where they're used, by
+    name; registering the same name again returns the existing metric.
+    """
+
+    def __init__(self):
+        self._metrics: "OrderedDict[str, _Metric]" = OrderedDict()
+        self._lock = Lock()
+        # Set by updates, and cleared when metrics are written to a file.
+        self.dirty = False
+
+    def _register(
+        self,
+        metric_class: Type[_M],
+        name: str,
+        documentation: str,
+        label_names: Iterable[str],
+        **kwargs: Any,
+    ) -> _M:
+        label_names = tuple(label_names)
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = metric_class(self, name, documentation, label_names, **kwargs)
+                self._metrics[name] = metric
+            elif type(metric) is not metric_class or metric.label_names != label_names:
+                raise ValueError(
+                    "Metric {0:s} is already registered with another type or "
+                    "labels".format(name)
+                )
+        return metric  # type: ignore
+
+    def counter(
+        self, name: str, documentation: str, label_names: Iterable[str] = ()
+    ) -> Counter:
+        return self._register(Counter, name, documentation, label_names)
+
+    def gauge(
+        self, name: str, documentation: str, label_names: Iterable[str] = ()
+    ) -> Gauge:
+        return self._register(Gauge, name, documentation, label_names)
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        label_names: Iterable[str] = (),
+        buckets: Tuple[float, ...] = LATENCY_BUCKETS,
+    ) -> Histogram:
+        return self._register(
+            Histogram, name, documentation, label_names, buckets=buckets
+        )
+
+    def dump(self) -> Dict[str, Dict[str, Any]]:
+        """ Return JSON-serializable state of all metrics. """
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return {
+            metric.name: {
+                "type": metric.metric_type,
+                "documentation": metric.documentation,
+                "label_names": list(metric.label_names),
+                "buckets": list(getattr(metric, "buckets", [])),
+                "samples": metric.dump_samples(),
+            }
+            for metric in metrics
+        }
+
+    def reset(self) -> None:
+        """ Clear values of all metrics, e.g. between tests. """
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            metric.reset()
+
+
+# Registry of the process
+METRICS: Final = MetricsRegistry()
+
+
+# (pid, start time) of this process; a forked process gets its own file.
+_process_key: Optional[Tuple[int, int]] = None
+
+
+def _get_process_key() -> Tuple[int, int]:
+    """Files are named by pid and start time of the process, so a process
+    reusing pid of an exited one never overwrites its file.
+    """
+    global _process_key
+    if _process_key is None or _process_key[0] != os.getpid():
+        _process_key = (os.getpid(), time_ns())
+    return _process_key
+
+
+def _write_json_file(directory: str, file_name: str, data: Dict[str, Any]) -> None:
+    fd, temp_path = mkstemp(dir=directory, prefix=".", suffix=_TEMP_FILE_SUFFIX)
+    try:
+        with open(fd, "w") as fd_w:
+            json_dump(data, fd_w)
+        # Renamed, so readers never see a partially written file.
+        os.replace(temp_path, os.path.join(directory, file_name))
+    except BaseException:
+        os.remove(temp_path)
+        raise
+
+
+def write_metrics_file(registry: MetricsRegistry, directory: str) -> None:
+    """ Replace metrics file of this process in the directory. """
+    registry.dirty = False
+    pid, started = _get_process_key()
+    _write_json_file(
+        directory,
+        _METRICS_FILE_FORMAT.format(pid=pid, started=started),
+        {"pid": pid, "started": started, "metrics": registry.dump()},
+    )
+
+
+def _is_process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _lock_dir(directory: str, operation: int) -> Any:
+    """Lock the directory until the returned file is closed. Readers take
+    a shared lock, so they never see metrics being folded twice or not at all.
+    """
+    lock_file = open(os.path.join(directory, _LOCK_FILE_NAME), "a")
+    try:
+        flock(lock_file, operation)
+    except BaseException:
+        lock_file.close()
+        raise
+    return lock_file
+
+
+def _load_json_file(path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path, "r") as fd_r:
+            return json_load(fd_r)
+    except (OSError, ValueError):
+        # Removed meanwhile, or not a metrics file.
+        return None
+
+
+def _load_aggregate(directory: str) -> Dict[str, Any]:
+    return _load_json_file(os.path.join(directory, _AGGREGATE_FILE_NAME)) or {
+        "metrics": {},
+        "folded": [],
+    }
+
+
+def _load_process_files(
+    directory: str, folded: Iterable[str]
+) -> List[Tuple[str, Dict[str, Any], bool]]:
+    """Return (file name, content, whether the process is alive) of metrics
+    files of processes, except ones already folded into the aggregate.
+    """
+    skipped = set(folded)
+    skipped.add(_AGGREGATE_FILE_NAME)
+    files = []
+    for file_name in sorted(os.listdir(directory)):
+        if (
+            file_name.startswith(".")
+            or not file_name.endswith(_METRICS_FILE_SUFFIX)
+            or file_name in skipped
+        ):
+            continue
+        data = _load_json_file(os.path.join(directory, file_name))
+        if data is not None:
+            files.append((file_name, data))
+
+    # Only the latest file of a pid can belong to a running process.
+    latest: Dict[int, int] = {}
+    for _, data in files:
+        latest[data["pid"]] = max(latest.get(data["pid"], 0), data.get("started", 0))
+    return [
+        (
+            file_name,
+            data,
+            latest[data["pid"]] == data.get("started", 0)
+            and _is_process_alive(data["pid"]),
+        )
+        for file_name, data in files
+    ]
+
+
+def _merge_samples(
+    merged: Dict[str, Any], metric: Dict[str, Any], samples: List[List[Any]]
+) -> None:
+    merged_samples = merged["samples"]
+    for label_values, value in samples:
+        key = tuple(label_values)
+        if metric["type"] != Histogram.metric_type:
+            merged_samples[key] = merged_samples.get(key, 0) + value
+            continue
+        counts, total = value
+        previous_counts, previous_total = merged_samples.get(
+            key, ([0] * len(counts), 0.0)
+        )
+        merged_samples[key] = (
+            [a + b for a, b in zip(previous_counts, counts)],
+            previous_total + total,
+        )
+
+
+def _merge_metrics(
+    merged: Dict[str, Dict[str, Any]], metrics: Dict[str, Any], alive: bool
+) -> None:
+    for name, metric in metrics.items():
+        if metric["type"] == Gauge.metric_type and not alive:
+            continue
+        if name not in merged:
+            merged[name] = dict(metric, samples=OrderedDict())
+        elif any(
+            merged[name][field] != metric[field]
+            for field in ("type", "label_names", "buckets")
+        ):
+            # Written by a process of another version, e.g. during deploy
+            continue
+        _merge_samples(merged[name], metric, metric["samples"])
+
+
+def _dump_merged(merged: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    for metric in merged.values():
+        metric["samples"] = [
+            [list(key), list(value) if isinstance(value, tuple) else value]
+            for key, value in metric["samples"].items()
+        ]
+    return merged
+
+
+def read_metrics_dir(directory: str) -> Dict[str, Dict[str, Any]]:
+    """Merge metrics files of all processes in the directory, in the same
+    form as MetricsRegistry.dump(). Series of the same labels are summed.
+    """
+    merged: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+    with _lock_dir(directory, LOCK_SH):
+        aggregate = _load_aggregate(directory)
+        _merge_metrics(merged, aggregate["metrics"], alive=False)
+        for _, data, alive in _load_process_files(directory, aggregate["folded"]):
+            _merge_metrics(merged, data["metrics"], alive)
+
+    return _dump_merged(merged)
+
+
+def compact_metrics_dir(directory: str) -> int:
+    """Fold metrics files of exited processes into the aggregate file, and
+    remove them. Return number of removed files.
+
+    Note: Folded files are recorded in the aggregate before being removed,
+          so they're never counted twice if removing them is interrupted.
+    """
+    with _lock_dir(directory, LOCK_EX):
+        aggregate = _load_aggregate(directory)
+        folded: Set[str] = set(aggregate["folded"])
+        exited = [
+            (file_name, data)
+            for file_name, data, alive in _load_process_files(directory, folded)
+            if not alive
+        ]
+        remaining = [
+            file_name
+            for file_name in folded
+            if os.path.exists(os.path.join(directory, file_name))
+        ]
+        if not (exited or remaining):
+            return 0
+
+        merged: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        _merge_metrics(merged, aggregate["metrics"], alive=False)
+        for _, data in exited:
+            _merge_metrics(merged, data["metrics"], alive=False)
+        removed = remaining + [file_name for file_name, _ in exited]
+        _write_json_file(
+            directory,
+            _AGGREGATE_FILE_NAME,
+            {"metrics": _dump_merged(merged), "folded": sorted(removed)},
+        )
+        for file_name in removed:
+            try:
+                os.remove(os.path.join(directory, file_name))
+            except FileNotFoundError:
+                pass
+
+    return len(removed)
+
+
+def _format_float(value: float) -> str:
+    if isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if isnan(value):
+        return "NaN"
+    return repr(float(value))
+
+
+def _format_labels(label_names: Iterable[str], label_values: Iterable[str]) -> str:
+    pairs = [
+        '{0:s}="{1:s}"'.format(
+            name,
+            value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"'),
+        )
+        for name, value in zip(label_names, label_values)
+    ]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def format_metrics(metrics: Dict[str, Dict[str, Any]]) -> str:
+    """ Format dumped metrics in Prometheus text format (version 0.0.4). """
+    lines = []
+    for name, metric in metrics.items():
+        lines.append(
+            "# HELP {0:s} {1:s}".format(
+                name, metric["documentation"].replace("\\", "\\\\").replace("\n", "\\n")
+            )
+        )
+        lines.append("# TYPE {0:s} {1:s}".format(name, metric["type"]))
+        label_names = metric["label_names"]
+        for label_values, value in metric["samples"]:
+            if metric["type"] != Histogram.metric_type:
+                lines.append(
+                    "{0:s}{1:s} {2:s}".format(
+                        name,
+                        _format_labels(label_names, label_values),
+                        _format_float(value),
+                    )
+                )
+                continue
+
+            counts, total = value
+            cumulative = 0
+            for bound, count in zip(metric["buckets"], counts):
+                cumulative += count
+                lines.append(
+                    "{0:s}_bucket{1:s} {2:d}".format(
+                        name,
+                        _format_labels(
+                            label_names + ["le"], label_values + [_format_float(bound)]
+                        ),
+                        cumulative,
+                    )
+                )
+            labels = _format_labels(label_names, label_values)
+            lines.append(
+                "{0:s}_sum{1:s} {2:s}".format(name, labels, _format_float(total))
+            )
+            lines.append("{0:s}_count{1:s} {2:d}".format(name, labels, cumulative))
+
+    return "\n".join(lines) + "\n"
+
+
+@final
+class MetricsFlusher(Thread):
+    """ Write metrics of the process to the directory when they change. """
+
+    def __init__(self, registry: MetricsRegistry, directory: str, interval: float):
+        super().__init__(name="metrics-flusher", daemon=True)
+        self.registry = registry
+        self.directory = directory
+        self.interval = interval
+        self._stopped = Event()
+
+    def stop(self) -> None:
+        self._stopped.set()
+
+    def flush(self) -> None:
+        if self.registry.dirty:
+            write_metrics_file(self.registry, self.directory)
+
+    def run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            try:
+                self.flush()
+            except OSError as e:
+                print("Failed to write metrics: {0!s}".format(e))
@@ -0,0 +1,85 @@
+""" request_timing.py
+
+    Per-request timing of views and their database queries, recorded in
+    metrics of each URL pattern.
+"""
+from time import perf_counter
+from typing import final, Final, Any, Callable, Dict
+
+from .metrics import METRICS, HistogramSnapshot
+
+__all__ = [
+    "REQUEST_LATENCY",
+    "QueryTimer",
+    "record_request",
+    "get_request_latencies",
+    "reset_request_latencies",
+]
+
+REQUEST_LATENCY: Final = METRICS.histogram(
+    "blog_request_duration_seconds",
+    "Wall time of requests, by URL pattern.",
+    ["route"],
+)
+_REQUESTS: Final = METRICS.counter(
+    "blog_requests_total",
+    "Requests, by URL pattern and status code.",
+    ["route", "status"],
+)
+_REQUEST_DB_QUERIES: Final = METRICS.counter(
+    "blog_request_db_queries_total",
+    "Database queries run by requests, by URL pattern.",
+    ["route"],
+)
+_REQUEST_DB_SECONDS: Final = METRICS.counter(
+    "blog_request_db_seconds_total",
+    "Time spent in database queries of requests, by URL pattern.",
+    ["route"],
+)
+
+
+@final
+class QueryTimer(object):
+    """Count queries and time spent in them, installed on connections with
+    connection.execute_wrapper().
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(
+        self,
+        execute: Callable[..., Any],
+        sql: str,
+        params: Any,
+        many: bool,
+        context: Dict[str, Any],
+    ) -> Any:
+        start = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += perf_counter() - start
+            self.count += 1
+
+
+def record_request(
+    route: str, status_code: int, duration: float, query_timer: QueryTimer
+) -> None:
+    REQUEST_LATENCY.observe(duration, route=route)
+    _REQUESTS.inc(route=route, status=status_code)
+    _REQUEST_DB_QUERIES.inc(query_timer.count, route=route)
+    _REQUEST_DB_SECONDS.inc(query_timer.duration, route=route)
+
+
+def get_request_latencies() -> Dict[str, HistogramSnapshot]:
+    """ Return latency histograms of this process, by URL pattern. """
+    return {
+        label_values[0]: snapshot
+        for label_values, snapshot in REQUEST_LATENCY.get_all().items()
+    }
+
+
+def reset_request_latencies() -> None:
+    REQUEST_LATENCY.reset()
@@ -0,0 +1,204 @@
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from json import dumps as json_dumps
+from threading import Lock, local
+from time import perf_counter
+from typing import (
+    final,
+    Final,
+    Any,
+    Callable,
+    Dict,
+    IO,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+    TypeVar,
+    cast,
+)
+
+__all__ = [
+    "SpanRecord",
+    "Tracer",
+    "get_tracer",
+    "use_tracer",
+    "traced",
+]
+
+_F = TypeVar("_F", bound=Callable[..., Any])
+
+_SUMMARY_HEADER_FORMAT: Final = "{name:<40s} {count:>6s} {total:>12s} {share:>7s}"
+_SUMMARY_ROW_FORMAT: Final = "{name:<40s} {count:>6d} {total:>12.1f} {share:>6.1f}%"
+_SUMMARY_COUNTER_FORMAT: Final = "{name:<40s} {value:>27,d}"
+_SUMMARY_INDENT: Final = "  "
+
+
+@final
+class SpanRecord(NamedTuple):
+    span_id: int
+    parent_id: Optional[int]
+    name: str
+    # Both in seconds. Start time is relative to creation of the tracer.
+    start: float
+    duration: float
+    attributes: Dict[str, Any]
+
+
+@final
+class Tracer(object):
+    """Collect timing spans and counters of a single run.
+
+    Spans can be nested, and are tracked separately in each thread.
+    Instrumented code reaches the tracer through get_tracer(), so nothing
+    is recorded unless the caller installs one with use_tracer().
+    """
+
+    def __init__(self):
+        self._origin = perf_counter()
+        self._lock = Lock()
+        self._local = local()
+        self._next_span_id = 1
+        self.spans: List[SpanRecord] = []
+        self.counters: "OrderedDict[str, int]" = OrderedDict()
+
+    def _get_stack(self) -> List[int]:
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        return self._local.stack
+
+    @contextmanager
+    def span(self, name: str, **attributes: Any) -> Iterator[Dict[str, Any]]:
+        """Record time spent in the block. Attributes can be added to the
+        yielded dict before the block ends.
+        """
+        stack = self._get_stack()
+        with self._lock:
+            span_id = self._next_span_id
+            self._next_span_id += 1
+        parent_id = stack[-1] if stack else None
+        stack.append(span_id)
+        start = perf_counter()
+        try:
+            yield attributes
+        finally:
+            duration = perf_counter() - start
+            stack.pop()
+            with self._lock:
+                self.spans.append(
+                    SpanRecord(
+                        span_id=span_id,
+                        parent_id=parent_id,
+                        name=name,
+                        start=start - self._origin,
+                        duration=duration,
+                        attributes=attributes,
+                    )
+                )
+
+    def add(self, counter: str, value: int = 1) -> None:
+        with self._lock:
+            self.counters[counter] = self.counters.get(counter, 0) + value
+
+    def write_json_lines(self, fd: IO[str]) -> None:
+        for span in sorted(self.spans, key=lambda record: record.start):
+            fd.write(json_dumps(dict(type="span", **span._asdict()), default=str))
+            fd.write("\n")
+        for counter, value in self.counters.items():
+            fd.write(json_dumps({"type": "counter", "name": counter, "value": value}))
+            fd.write("\n")
+
+    def format_summary(self) -> str:
+        """Return a table of spans, aggregated by their path from the root
+        span, followed by counters.
+        """
+        span_map = {span.span_id: span for span in self.spans}
+
+        def get_path(span: SpanRecord) -> Tuple[str, ...]:
+            path = [span.name]
+            while span.parent_id in span_map:
+                span = span_map[span.parent_id]
+                path.append(span.name)
+            return tuple(reversed(path))
+
+        # Paths are kept in the order they first started.
+        aggregated: "OrderedDict[Tuple[str, ...], List[float]]" = OrderedDict()
+        for span in sorted(self.spans, key=lambda record: record.start):
+            aggregated.setdefault(get_path(span), []).append(span.duration)
+        total_time = sum(
+            span.duration for span in self.spans if span.parent_id not in span_map
+        )
+
+        lines = [
+            _SUMMARY_HEADER_FORMAT.format(
+                name="Span", count="Count", total="Total (ms)", share="Share"
+            )
+        ]
+
+        def append_rows(parent_path: Tuple[str, ...]) -> None:
+            for path, durations in aggregated.items():
+                if path[:-1] != parent_path:
+                    continue
+                lines.append(
+                    _SUMMARY_ROW_FORMAT.format(
+                        name=_SUMMARY_INDENT * (len(path) - 1) + path[-1],
+                        count=len(durations),
+                        total=sum(durations) * 1000,
+                        share=(sum(durations) / total_time * 100)
+                        if total_time
+                        else 0.0,
+                    )
+                )
+                append_rows(path)
+
+        append_rows(())
+        for counter, value in self.counters.items():
+            lines.append(_SUMMARY_COUNTER_FORMAT.format(name=counter, value=value))
+
+        return "\n".join(lines)
+
+
+@final
+class _NullTracer(object):
+    """Tracer used when nothing is installed. It records nothing."""
+
+    @contextmanager
+    def span(self, name: str, **attributes: Any) -> Iterator[Dict[str, Any]]:
+        yield attributes
+
+    def add(self, counter: str, value: int = 1) -> None:
+        pass
+
+
+_NULL_TRACER: Final = _NullTracer()
+_current_tracer: ContextVar[Any] = ContextVar("tracer", default=_NULL_TRACER)
+
+
+def get_tracer() -> Tracer:
+    return cast(Tracer, _current_tracer.get())
+
+
+@contextmanager
+def use_tracer(tracer: Tracer) -> Iterator[Tracer]:
+    token = _current_tracer.set(tracer)
+    try:
+        yield tracer
+    finally:
+        _current_tracer.reset(token)
+
+
+def traced(name: str) -> Callable[[_F], _F]:
+    """Decorator recording each call of the function as a span."""
+
+    def decorator(f: _F) -> _F:
+        @wraps(f)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with get_tracer().span(name):
+                return f(*args, **kwargs)
+
+        return cast(_F, wrapper)
+
+    return decorator
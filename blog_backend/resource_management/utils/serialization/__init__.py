@@ -0,0 +1 @@
+from .fast_json import *  # noqa: F401, F403
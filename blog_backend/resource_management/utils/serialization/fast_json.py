@@ -0,0 +1,40 @@
+""" fast_json.py
+
+    JSON encoding of API payloads, with orjson when it's installed. orjson
+    encodes large strings (e.g. compiled articles) several times faster than
+    the json module, which is used as fallback.
+"""
+from json import dumps as json_dumps
+from typing import Any, Final
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None  # type: ignore
+
+__all__ = [
+    "JSON_ENCODER_NAME",
+    "dumps_json",
+]
+
+JSON_ENCODER_NAME: Final = "json" if orjson is None else "orjson"
+
+# Encodes types orjson doesn't support natively (e.g. Decimal, lazy strings)
+# the same way as JsonResponse. Date and time values are passed through to
+# it as well, since orjson formats them differently.
+_django_encoder: Final = DjangoJSONEncoder()
+
+
+def dumps_json(data: Any) -> bytes:
+    """ Return compact UTF-8 encoded JSON of the data. """
+    if orjson is not None:
+        return orjson.dumps(
+            data,
+            default=_django_encoder.default,
+            option=orjson.OPT_PASSTHROUGH_DATETIME,
+        )
+    return json_dumps(
+        data, cls=DjangoJSONEncoder, ensure_ascii=False, separators=(",", ":")
+    ).encode("utf-8")
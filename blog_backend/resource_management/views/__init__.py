@@ -1,2 +1,4 @@
 from .blog_post import *  # noqa: F401, F403
 from .images import *  # noqa: F401, F403
+from .upload_jobs import *  # noqa: F401, F403
+from .metrics import *  # noqa: F401, F403
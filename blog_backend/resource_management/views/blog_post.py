@@ -1,14 +1,15 @@
-from django.http import JsonResponse
 from django.views.decorators.http import require_GET
 
 import resource_management.service.blog_post as blog_post
 
-from .utils import json_404_on_error
-from .constants import PAGE_SIZE
+from .utils import json_404_on_error, surrogate_keyed_response
+from .constants import PAGE_SIZE, TAG_SEPARATOR
 
 __all__ = [
     "posts_by_page",
     "posts_by_page_and_tag",
+    "posts_by_page_and_all_tags",
+    "posts_by_page_and_any_tags",
     "get_post_data",
     "get_tag_list",
 ]
@@ -19,7 +20,7 @@ __all__ = [
 def posts_by_page(_, page):
     result = blog_post.get_posts_by_page(page, PAGE_SIZE)
 
-    return JsonResponse(result)
+    return surrogate_keyed_response(result)
 
 
 @require_GET
@@ -27,18 +28,38 @@ def posts_by_page(_, page):
 def posts_by_page_and_tag(_, tag, page):
     result = blog_post.get_posts_by_page(page, PAGE_SIZE, tag)
 
-    return JsonResponse(result)
+    return surrogate_keyed_response(result)
+
+
+@require_GET
+@json_404_on_error
+def posts_by_page_and_all_tags(_, tags, page):
+    result = blog_post.get_posts_by_page_and_tags(
+        page, PAGE_SIZE, tags.split(TAG_SEPARATOR), match_all=True
+    )
+
+    return surrogate_keyed_response(result)
+
+
+@require_GET
+@json_404_on_error
+def posts_by_page_and_any_tags(_, tags, page):
+    result = blog_post.get_posts_by_page_and_tags(
+        page, PAGE_SIZE, tags.split(TAG_SEPARATOR), match_all=False
+    )
+
+    return surrogate_keyed_response(result)
 
 
 @require_GET
 @json_404_on_error
 def get_post_data(_, synonym):
     result = blog_post.get_post_data(synonym)
-    return JsonResponse(result)
+    return surrogate_keyed_response(result)
 
 
 @require_GET
 @json_404_on_error
 def get_tag_list(_):
-    result = {"data": blog_post.get_all_tags()}
-    return JsonResponse(result)
+    result = blog_post.get_all_tags()
+    return surrogate_keyed_response(result)
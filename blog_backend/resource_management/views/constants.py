@@ -2,9 +2,30 @@ from http import HTTPStatus
 
 SUCCESS_CODE = HTTPStatus.OK
 RESOURCE_NOT_FOUND_STATUS_CODE = HTTPStatus.NOT_FOUND
+ACCEPTED_CODE = HTTPStatus.ACCEPTED
+BAD_REQUEST_STATUS_CODE = HTTPStatus.BAD_REQUEST
+UNAUTHORIZED_STATUS_CODE = HTTPStatus.UNAUTHORIZED
 
 RESOURCE_NOT_FOUND_JSON_DATA = {
     "message": "Can not find the requested data",
 }
 
+UNAUTHORIZED_JSON_DATA = {
+    "message": "Missing or invalid access token",
+}
+
 PAGE_SIZE = 10
+# Separator of tag names in multi-tag listing URLs, e.g. "python,django"
+TAG_SEPARATOR = ","
+
+# CDN purging by surrogate keys
+SURROGATE_KEY_HEADER = "Surrogate-Key"
+CACHE_TAG_HEADER = "Cache-Tag"
+SURROGATE_CONTROL_HEADER = "Surrogate-Control"
+
+# Upload job submission
+UPLOAD_TOKEN_HEADER = "HTTP_AUTHORIZATION"
+UPLOAD_TOKEN_PREFIX = "Bearer "
+UPLOAD_ARCHIVE_FIELD = "archive"
+UPLOAD_SYNONYM_FIELD = "synonym"
+UPLOAD_CREATE_ONLY_FIELD = "new"
@@ -0,0 +1,19 @@
+from django.http import HttpResponse
+from django.views.decorators.http import require_GET
+
+import resource_management.service.metrics as metrics_service
+
+from .utils import require_metrics_token
+
+__all__ = [
+    "get_metrics",
+]
+
+
+@require_GET
+@require_metrics_token
+def get_metrics(_):
+    return HttpResponse(
+        metrics_service.get_metrics_text(),
+        content_type=metrics_service.METRICS_CONTENT_TYPE,
+    )
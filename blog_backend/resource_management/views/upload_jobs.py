@@ -0,0 +1,64 @@
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
+
+import resource_management.service.upload_job as upload_job_service
+from resource_management.routers import pin_primary
+
+from .utils import FastJsonResponse, json_404_on_error, require_upload_token
+from .constants import (
+    ACCEPTED_CODE,
+    BAD_REQUEST_STATUS_CODE,
+    UPLOAD_ARCHIVE_FIELD,
+    UPLOAD_SYNONYM_FIELD,
+    UPLOAD_CREATE_ONLY_FIELD,
+)
+
+__all__ = [
+    "submit_upload_job",
+    "get_upload_job_status",
+    "get_upload_job_progress",
+]
+
+_TRUE_VALUES = ("1", "true", "yes")
+
+
+@csrf_exempt
+@require_POST
+@require_upload_token
+def submit_upload_job(request):
+    archive = request.FILES.get(UPLOAD_ARCHIVE_FIELD)
+    synonym = request.POST.get(UPLOAD_SYNONYM_FIELD, "")
+    create_only = request.POST.get(UPLOAD_CREATE_ONLY_FIELD, "").lower() in _TRUE_VALUES
+    if archive is None:
+        return FastJsonResponse(
+            {"message": "Missing archive file."}, status=BAD_REQUEST_STATUS_CODE
+        )
+    try:
+        job = upload_job_service.submit_upload_job(
+            archive.chunks(), synonym, create_only=create_only
+        )
+    except upload_job_service.InvalidUploadJobError as e:
+        return FastJsonResponse({"message": str(e)}, status=BAD_REQUEST_STATUS_CODE)
+
+    return FastJsonResponse(
+        upload_job_service.get_upload_job_status(str(job.uuid)), status=ACCEPTED_CODE
+    )
+
+
+@require_GET
+@require_upload_token
+@json_404_on_error
+def get_upload_job_status(_, job_id):
+    status = upload_job_service.get_upload_job_status(str(job_id))
+    if status["finished"] is not None:
+        # Worker wrote the article on the primary; let the client read it
+        # back before replicas catch up.
+        pin_primary()
+    return FastJsonResponse(status)
+
+
+@require_GET
+@require_upload_token
+@json_404_on_error
+def get_upload_job_progress(_, job_id):
+    return FastJsonResponse(upload_job_service.get_upload_job_progress(str(job_id)))
@@ -1,8 +1,35 @@
 from functools import wraps
+from hmac import compare_digest
+from typing import Any
 
-from django.http import JsonResponse
+from django.conf import settings
+from django.http import HttpResponse
 
-from .constants import RESOURCE_NOT_FOUND_STATUS_CODE, RESOURCE_NOT_FOUND_JSON_DATA
+from resource_management.service.surrogate_keys import PayloadResult
+from resource_management.utils.serialization import dumps_json
+
+from .constants import (
+    RESOURCE_NOT_FOUND_STATUS_CODE,
+    RESOURCE_NOT_FOUND_JSON_DATA,
+    UNAUTHORIZED_STATUS_CODE,
+    UNAUTHORIZED_JSON_DATA,
+    UPLOAD_TOKEN_HEADER,
+    UPLOAD_TOKEN_PREFIX,
+    SURROGATE_KEY_HEADER,
+    CACHE_TAG_HEADER,
+    SURROGATE_CONTROL_HEADER,
+)
+
+
+class FastJsonResponse(HttpResponse):
+    """Same as JsonResponse, but encoded by dumps_json(). Content which is
+    already serialized (bytes) is sent as it is.
+    """
+
+    def __init__(self, data: Any, **kwargs: Any):
+        kwargs.setdefault("content_type", "application/json")
+        content = data if isinstance(data, bytes) else dumps_json(data)
+        super().__init__(content=content, **kwargs)
 
 
 def json_404_on_error(view_fn):
@@ -13,8 +40,58 @@ def json_404_on_error(view_fn):
         try:
             return view_fn(*args, **kwargs)
         except Exception:
-            return JsonResponse(
+            return FastJsonResponse(
                 RESOURCE_NOT_FOUND_JSON_DATA, status=RESOURCE_NOT_FOUND_STATUS_CODE
             )
 
     return wrapper
+
+
+def require_bearer_token(setting_name: str):
+    """Wrapper function to reject requests without valid API token, which
+    is read from the setting. Endpoints are disabled (404) when no token is
+    configured.
+    """
+
+    def decorator(view_fn):
+        @wraps(view_fn)
+        def wrapper(request, *args, **kwargs):
+            expected_token = getattr(settings, setting_name)
+            if not expected_token:
+                return FastJsonResponse(
+                    RESOURCE_NOT_FOUND_JSON_DATA, status=RESOURCE_NOT_FOUND_STATUS_CODE
+                )
+            auth_header = request.META.get(UPLOAD_TOKEN_HEADER, "")
+            token = auth_header[len(UPLOAD_TOKEN_PREFIX) :]
+            if not (
+                auth_header.startswith(UPLOAD_TOKEN_PREFIX)
+                and compare_digest(
+                    token.encode("utf-8"), expected_token.encode("utf-8")
+                )
+            ):
+                return FastJsonResponse(
+                    UNAUTHORIZED_JSON_DATA, status=UNAUTHORIZED_STATUS_CODE
+                )
+            return view_fn(request, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+require_upload_token = require_bearer_token("UPLOAD_API_TOKEN")
+require_metrics_token = require_bearer_token("METRICS_API_TOKEN")
+
+
+def surrogate_keyed_response(result: PayloadResult) -> FastJsonResponse:
+    """JSON response of the payload, naming the data it depends on for CDN
+    (Surrogate-Key for Fastly, Cache-Tag for Cloudflare).
+    """
+    response = FastJsonResponse(result.content)
+    response[SURROGATE_KEY_HEADER] = " ".join(result.surrogate_keys)
+    response[CACHE_TAG_HEADER] = ",".join(result.surrogate_keys)
+    if settings.SURROGATE_CONTROL_MAX_AGE:
+        response[SURROGATE_CONTROL_HEADER] = "max-age={0:d}".format(
+            settings.SURROGATE_CONTROL_MAX_AGE
+        )
+    return response